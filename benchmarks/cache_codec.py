@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""Compare cache codecs (load time and size) on a realistic refuges.info payload.
+
+Usage:
+    python benchmarks/cache_codec.py [number of features]
+"""
+
+import sys
+import time
+import typing as t
+
+from hut_services.core.cache import Codec
+from hut_services.refuges_info.schema import RefugesInfoFeatureCollection
+
+
+def _valeur(nom: str, valeur: str | None = "oui") -> dict[str, t.Any]:
+    return {"nom": nom, "valeur": valeur}
+
+
+def make_feature(ident: int) -> dict[str, t.Any]:
+    """Feature as returned by `https://www.refuges.info/api/massif?detail=complet`."""
+    lon, lat, alt = 6.0 + (ident % 500) / 100, 44.0 + (ident % 300) / 100, 1200 + ident % 1800
+    return {
+        "type": "Feature",
+        "id": ident,
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {
+            "id": ident,
+            "lien": f"https://www.refuges.info/point/{ident}/cabane-non-gardee/massif/cabane-{ident}/",
+            "nom": f"Cabane numero {ident}",
+            "sym": "Cabane Non-Gardee",
+            "coord": {"alt": alt, "long": lon, "lat": lat, "precision": {"nom": "GPS", "type": "1"}},
+            "type": {"id": 7, "valeur": "cabane non gardée", "icone": "cabane_cheminee"},
+            "places": _valeur("Places prévues pour dormir", "8"),
+            "etat": {"id": "ouverture", "valeur": "Ouverte"},
+            "date": {"derniere_modif": "2024-05-12 10:12:00", "creation": "2010-03-02 08:00:00"},
+            "remarque": _valeur("Remarque", "Cabane sympa, bois à proximité. " * 8),
+            "acces": _valeur("Accès", "Depuis le parking suivre le sentier balisé pendant 2h. " * 6),
+            "proprio": _valeur("Propriétaire", "Commune"),
+            "createur": {"id": 12, "nom": "contributeur"},
+            "article": {"demonstratif": "cette", "defini": "la", "partitif": "d'une"},
+            "info_comp": {
+                "site_officiel": {"nom": "Site officiel", "url": None, "valeur": None},
+                "manque_un_mur": _valeur("Manque un mur", "non"),
+                "cheminee": _valeur("Cheminée"),
+                "poele": _valeur("Poêle", "non"),
+                "couvertures": _valeur("Couvertures"),
+                "places_matelas": {"nom": "Places sur matelas", "valeur": "6", "nb": 6},
+                "latrines": _valeur("Latrines", "non"),
+                "bois": _valeur("Bois à proximité"),
+                "eau": _valeur("Eau à proximité"),
+            },
+            "description": {"valeur": "Petite cabane en pierre, rénovée en 2015. " * 10},
+        },
+    }
+
+
+def make_payload(size: int) -> RefugesInfoFeatureCollection:
+    return RefugesInfoFeatureCollection(
+        type="FeatureCollection",
+        generator="Refuges.info API",
+        copyright="The data included in this document is from www.refuges.info.",
+        timestamp="2024-05-12T10:12:00+02:00",
+        size=str(size),
+        features=[make_feature(i) for i in range(size)],  # type: ignore[misc]
+    )
+
+
+def _best_of(func: t.Callable[[], t.Any], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(size: int = 2000) -> None:
+    payload = make_payload(size)
+    codecs: list[Codec] = []
+    for serializer in ["pickle", "json", "msgpack"]:
+        for compression in ["none", "zlib", "lz4", "zstd"]:
+            try:
+                codecs.append(Codec(serializer, compression, type_=RefugesInfoFeatureCollection))  # type: ignore[arg-type]
+            except ImportError as e:
+                print(f"skip {serializer}+{compression}: {e}")
+    print(f"refuges.info payload with {size} features\n")
+    print(f"{'codec':<20}{'size [KiB]':>12}{'dump [ms]':>12}{'load [ms]':>12}")
+    for codec in codecs:
+        data = codec.dumps(payload)
+        assert codec.loads(data) == payload  # noqa: S101
+        dump = _best_of(lambda codec=codec: codec.dumps(payload))  # type: ignore[misc]
+        load = _best_of(lambda codec=codec, data=data: codec.loads(data))  # type: ignore[misc]
+        name = f"{codec.serializer}+{codec.compression}"
+        print(f"{name:<20}{len(data) / 1024:>12.0f}{dump * 1000:>12.1f}{load * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
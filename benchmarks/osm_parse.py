@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""Compare the parsing of an Overpass JSON response into `OsmHutSource` objects:
+the full `overpy` result, `overpy` objects per element and the raw elements validated in batches.
+
+Usage:
+    python benchmarks/osm_parse.py [number of elements]
+"""
+
+import json
+import sys
+import time
+import typing as t
+
+import overpy  # type: ignore[import-untyped]
+
+from hut_services.osm.schema import OsmHutSchema, OsmHutSource, OsmProperties
+from hut_services.osm.service import iter_huts_from_elements
+
+
+def make_element(ident: int) -> dict[str, t.Any]:
+    """Element as returned by `out qt center` for huts (every third one is a way)."""
+    lat, lon = 45.8 + (ident % 200) / 100, 5.9 + (ident % 460) / 100
+    tags = {
+        "tourism": "alpine_hut" if ident % 2 else "wilderness_hut",
+        "name": f"Hütte {ident}",
+        "ele": str(1500 + ident % 1500),
+        "operator": "Schweizer Alpen-Club SAC",
+        "website": f"https://www.sac-cas.ch/huetten/{ident}",
+        "phone": "+41 33 123 45 67",
+        "capacity": "42",
+        "wikidata": f"Q{1000 + ident}",
+        "source": "survey",
+    }
+    if ident % 3:
+        return {"type": "node", "id": ident, "lat": lat, "lon": lon, "tags": tags}
+    nodes = list(range(ident * 10, ident * 10 + 8))
+    return {"type": "way", "id": ident, "center": {"lat": lat, "lon": lon}, "nodes": nodes, "tags": tags}
+
+
+def make_response(size: int) -> bytes:
+    data = {"version": 0.6, "generator": "Overpass API", "elements": [make_element(i) for i in range(size)]}
+    return json.dumps(data).encode()
+
+
+def parse_overpy_result(content: bytes) -> list[OsmHutSource]:
+    """The whole `overpy.Result` is built first."""
+    result = overpy.Overpass().parse_json(content)
+    huts = []
+    for osm_type, res in (("node", result.nodes), ("way", result.ways)):
+        for h in res:
+            osm_hut = OsmHutSchema.model_validate(h, from_attributes=True)
+            osm_hut.osm_type = osm_type
+            huts.append(
+                OsmHutSource(
+                    name=osm_hut.get_name(),
+                    source_id=osm_hut.get_id(),
+                    location=osm_hut.get_location(),
+                    source_data=osm_hut,
+                    source_properties=OsmProperties(osm_type=osm_type),
+                )
+            )
+    return huts
+
+
+def parse_overpy_elements(content: bytes) -> list[OsmHutSource]:
+    return list(iter_huts_from_elements(json.loads(content)["elements"], fast=False))
+
+
+def parse_raw_elements(content: bytes) -> list[OsmHutSource]:
+    return list(iter_huts_from_elements(json.loads(content)["elements"]))
+
+
+def _best_of(func: t.Callable[[], t.Any], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(size: int = 5000) -> None:
+    content = make_response(size)
+    parsers = {
+        "overpy result": parse_overpy_result,
+        "overpy elements": parse_overpy_elements,
+        "raw elements": parse_raw_elements,
+    }
+    print(f"overpass response with {size} elements ({len(content) / 1024:.0f} KiB)\n")
+    print(f"{'parser':<20}{'time [ms]':>12}{'speedup':>10}")
+    baseline = None
+    for name, parser in parsers.items():
+        assert len(parser(content)) == size  # noqa: S101
+        duration = _best_of(lambda parser=parser: parser(content))  # type: ignore[misc]
+        baseline = baseline or duration
+        print(f"{name:<20}{duration * 1000:>12.1f}{baseline / duration:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
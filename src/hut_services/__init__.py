@@ -25,13 +25,15 @@ __all__ = [
     "SourcePropertiesSchema",
     "SourceSchema",
     "TranslationSchema",
+    "cache_stats",
     "clear_file_cache",
     "file_cache",
+    "reset_cache_stats",
 ]
 
 from httpx import Auth
 
-from .core.cache import clear_file_cache, file_cache
+from .core.cache import cache_stats, clear_file_cache, file_cache, reset_cache_stats
 from .core.schema import (
     AnswerEnum,
     AuthorSchema,
@@ -0,0 +1,66 @@
+from ._backends import (
+    CacheBackend,
+    CacheEntry,
+    CacheEntryInfo,
+    CachePriority,
+    JoblibBackend,
+    SQLiteBackend,
+    cachedir,
+    get_cache_backend,
+    set_cache_backend,
+)
+from ._bundle import export_cache, import_cache
+from ._codecs import Codec
+from ._compaction import CacheCompactor, compact_cache
+from ._file_cache import (
+    AsyncCachedFunction,
+    CachedFunction,
+    cache_stats,
+    canonical,
+    canonical_key,
+    clear_file_cache,
+    default_seconds,
+    file_cache,
+    forever_seconds,
+    invalidate_cache,
+    reset_cache_stats,
+)
+from ._locks import FileLock, KeyLocks, get_key_locks
+from ._memory import MISSING, MemoryTier
+from ._spatial import SpatialCache
+from ._stats import CacheStats
+
+__all__ = [
+    "MISSING",
+    "AsyncCachedFunction",
+    "CacheBackend",
+    "CacheCompactor",
+    "CacheEntry",
+    "CacheEntryInfo",
+    "CachePriority",
+    "CacheStats",
+    "CachedFunction",
+    "Codec",
+    "FileLock",
+    "JoblibBackend",
+    "KeyLocks",
+    "MemoryTier",
+    "SQLiteBackend",
+    "SpatialCache",
+    "cache_stats",
+    "cachedir",
+    "canonical",
+    "canonical_key",
+    "clear_file_cache",
+    "compact_cache",
+    "default_seconds",
+    "export_cache",
+    "file_cache",
+    "forever_seconds",
+    "get_cache_backend",
+    "get_key_locks",
+    "import_cache",
+    "invalidate_cache",
+    "reset_cache_stats",
+    "set_cache_backend",
+]
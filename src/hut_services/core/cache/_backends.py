@@ -0,0 +1,402 @@
+import base64
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import typing as t
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from enum import IntEnum
+
+from joblib import Memory  # type: ignore[import-untyped]
+
+__all__ = [
+    "CacheBackend",
+    "CacheEntry",
+    "CacheEntryInfo",
+    "CachePriority",
+    "JoblibBackend",
+    "SQLiteBackend",
+    "get_cache_backend",
+    "set_cache_backend",
+]
+
+logger = logging.getLogger(__name__)
+
+cachedir = os.environ.get("HUT_SERVICE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "py_file_cache"))
+default_backend = os.environ.get("HUT_SERVICE_CACHE_BACKEND", "joblib")
+default_journal_mode = os.environ.get("HUT_SERVICE_SQLITE_JOURNAL_MODE", "WAL")
+access_resolution = 60  # only record the access time of an entry once per minute
+
+
+class CachePriority(IntEnum):
+    """Eviction priority of cache entries, lower priorities are evicted first."""
+
+    low = 0
+    normal = 10
+    high = 20
+
+
+class CacheEntry(t.NamedTuple):
+    """Entry saved in a cache backend.
+
+    Attributes:
+        payload: Serialized value.
+        created: Creation time (unix timestamp).
+        expires: Time after which the entry is never used again (unix timestamp).
+        duration: Time in seconds it took to compute the value.
+        priority: Eviction priority.
+        arguments: Pickled arguments of the call, used for invalidation by argument.
+    """
+
+    payload: bytes
+    created: float
+    expires: float
+    duration: float = 0.0
+    priority: int = CachePriority.normal
+    arguments: bytes = b""
+
+
+class CacheEntryInfo(t.NamedTuple):
+    """Information about a cache entry used for eviction (without the payload).
+
+    Attributes:
+        namespace: Namespace of the entry.
+        key: Key of the entry.
+        size: Size in bytes.
+        accessed: Last access time (unix timestamp).
+        expires: Expiration time (unix timestamp).
+        priority: Eviction priority.
+    """
+
+    namespace: str
+    key: str
+    size: int
+    accessed: float
+    expires: float
+    priority: int
+
+
+class CacheBackend(ABC):
+    """Storage used by [`file_cache`][hut_services.core.cache.file_cache].
+
+    Entries are addressed by a `namespace` (the cached function) and a `key` (the hashed arguments).
+    Backends only store bytes, the serialization is done by the cached function.
+    """
+
+    name: str = "base"
+
+    @property
+    def lock_directory(self) -> str | None:
+        """Directory for the lock files shared by all processes using this backend,
+        `None` if only in-process locks are possible."""
+        return None
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> CacheEntry | None:
+        """Get an entry (expired entries included), `None` if it does not exist."""
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, entry: CacheEntry) -> None:
+        """Add or replace an entry."""
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        """Remove an entry if it exists."""
+
+    @abstractmethod
+    def clear(self, namespace: str | None = None) -> None:
+        """Remove all entries of a namespace or all entries if `namespace` is `None`."""
+
+    @abstractmethod
+    def entries(self) -> Iterator[CacheEntryInfo]:
+        """Information about all entries, used for eviction."""
+
+    @abstractmethod
+    def arguments(self, namespace: str) -> Iterator[tuple[str, bytes]]:
+        """Keys and pickled arguments of all entries in a namespace, used for invalidation."""
+
+    def vacuum(self) -> None:  # noqa: B027
+        """Release space after entries were removed (if needed by the backend)."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({getattr(self, 'location', '')!r})"
+
+
+class JoblibBackend(CacheBackend):
+    """Directory tree backend using the joblib store (one directory per entry).
+
+    Files are written to a temporary file and renamed (atomic, also on NFS).
+    The payload is written before the metadata, which contains its size and checksum,
+    incomplete or mixed up entries of concurrent writers are therefore ignored.
+
+    Args:
+        location: Cache directory.
+    """
+
+    name = "joblib"
+
+    def __init__(self, location: str = cachedir):
+        self.location = location
+        self._store = Memory(location, verbose=0).store_backend
+
+    @property
+    def lock_directory(self) -> str:
+        return os.path.join(self.location, "locks")
+
+    def get(self, namespace: str, key: str) -> CacheEntry | None:
+        call_id = [namespace, key]
+        metadata = self._store.get_metadata(call_id)
+        if "expires" not in metadata:  # missing or written by an older version
+            return None
+        try:
+            payload = self._store.load_item(call_id, verbose=0)
+        except Exception as e:
+            logger.debug(f"Could not load cache entry '{namespace}/{key}': {e}")
+            return None
+        if not isinstance(payload, bytes):
+            return None
+        if "checksum" in metadata and (
+            len(payload) != metadata.get("size") or zlib.crc32(payload) != metadata["checksum"]
+        ):
+            logger.warning(f"Ignore corrupt or incomplete cache entry '{namespace}/{key}'.")
+            return None
+        self._touch(os.path.join(self._store.location, namespace, key, "output.pkl"))
+        return CacheEntry(
+            payload,
+            created=metadata["time"],
+            expires=metadata["expires"],
+            duration=metadata["duration"],
+            priority=metadata.get("priority", CachePriority.normal),
+            arguments=base64.b64decode(metadata.get("arguments", "")),
+        )
+
+    def set(self, namespace: str, key: str, entry: CacheEntry) -> None:
+        call_id = [namespace, key]
+        self._store.dump_item(call_id, entry.payload, verbose=0)
+        self._store.store_metadata(
+            call_id,
+            {
+                "time": entry.created,
+                "expires": entry.expires,
+                "duration": entry.duration,
+                "priority": entry.priority,
+                "arguments": base64.b64encode(entry.arguments).decode(),
+                "size": len(entry.payload),
+                "checksum": zlib.crc32(entry.payload),
+            },
+        )
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._store.clear_item([namespace, key])
+
+    def clear(self, namespace: str | None = None) -> None:
+        if namespace is None:
+            self._store.clear()
+        else:
+            self._store.clear_path([namespace])
+
+    def entries(self) -> Iterator[CacheEntryInfo]:
+        for dirpath, _, filenames in os.walk(self._store.location):
+            if "metadata.json" not in filenames or "output.pkl" not in filenames:
+                continue
+            try:
+                with open(os.path.join(dirpath, "metadata.json"), "rb") as f:
+                    metadata = json.loads(f.read())
+                output = os.path.join(dirpath, "output.pkl")
+                size = os.path.getsize(output)
+                accessed = os.path.getmtime(output)
+            except (OSError, ValueError):  # removed in the meantime
+                continue
+            namespace, key = os.path.split(os.path.relpath(dirpath, self._store.location))
+            yield CacheEntryInfo(
+                namespace=namespace.replace(os.sep, "/"),
+                key=key,
+                size=size,
+                accessed=accessed,
+                expires=metadata.get("expires", 0),
+                priority=metadata.get("priority", CachePriority.normal),
+            )
+
+    def arguments(self, namespace: str) -> Iterator[tuple[str, bytes]]:
+        path = os.path.join(self._store.location, namespace)
+        try:
+            keys = os.listdir(path)
+        except OSError:
+            return
+        for key in keys:
+            try:
+                with open(os.path.join(path, key, "metadata.json"), "rb") as f:
+                    metadata = json.loads(f.read())
+            except (OSError, ValueError):  # not an entry or removed in the meantime
+                continue
+            yield key, base64.b64decode(metadata.get("arguments", ""))
+
+    @staticmethod
+    def _touch(filename: str) -> None:
+        """Record the access time as modification time (atime is often disabled)."""
+        try:
+            now = time.time()
+            if os.path.getmtime(filename) < now - access_resolution:
+                os.utime(filename, (now, now))
+        except OSError:
+            pass
+
+
+class SQLiteBackend(CacheBackend):
+    """Single file backend using SQLite with indexed keys and expiry.
+
+    Note:
+        The WAL journal requires shared memory and does not work on network file systems (NFS),
+        use `journal_mode="DELETE"` there (`HUT_SERVICE_SQLITE_JOURNAL_MODE`).
+
+    Args:
+        path: Path to the database file.
+        journal_mode: SQLite journal mode.
+    """
+
+    name = "sqlite"
+    schema_version = 3
+
+    def __init__(self, path: str = os.path.join(cachedir, "cache.sqlite"), journal_mode: str = default_journal_mode):
+        self.location = path
+        self.journal_mode = journal_mode
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as con:
+            if con.execute("PRAGMA user_version").fetchone()[0] != self.schema_version:
+                # it is only a cache, start with a new table if the schema changed
+                con.execute("DROP TABLE IF EXISTS cache")
+                con.execute(f"PRAGMA user_version = {self.schema_version}")
+            con.execute(
+                """CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    created REAL NOT NULL,
+                    expires REAL NOT NULL,
+                    duration REAL NOT NULL DEFAULT 0,
+                    priority INTEGER NOT NULL DEFAULT 10,
+                    accessed REAL NOT NULL,
+                    arguments BLOB NOT NULL DEFAULT x'',
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID"""
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+            con.execute("CREATE INDEX IF NOT EXISTS cache_eviction ON cache (priority, accessed)")
+
+    @property
+    def lock_directory(self) -> str:
+        return os.path.join(os.path.dirname(os.path.abspath(self.location)), "locks")
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread."""
+        con: sqlite3.Connection | None = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.location, timeout=30)
+            con.execute("PRAGMA auto_vacuum=INCREMENTAL")  # only applied to new databases
+            con.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def get(self, namespace: str, key: str) -> CacheEntry | None:
+        con = self._connection()
+        row = con.execute(
+            "SELECT payload, created, expires, duration, priority, arguments, accessed FROM cache"
+            " WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[6] < now - access_resolution:
+            with con:
+                con.execute("UPDATE cache SET accessed = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+        return CacheEntry(*row[:6])
+
+    def set(self, namespace: str, key: str, entry: CacheEntry) -> None:
+        with self._connection() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO cache"
+                " (namespace, key, payload, created, expires, duration, priority, arguments, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    namespace,
+                    key,
+                    entry.payload,
+                    entry.created,
+                    entry.expires,
+                    entry.duration,
+                    entry.priority,
+                    entry.arguments,
+                    time.time(),
+                ),
+            )
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._connection() as con:
+            con.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace: str | None = None) -> None:
+        with self._connection() as con:
+            if namespace is None:
+                con.execute("DELETE FROM cache")
+            else:
+                con.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+    def entries(self) -> Iterator[CacheEntryInfo]:
+        rows = self._connection().execute(
+            "SELECT namespace, key, length(payload), accessed, expires, priority FROM cache"
+        )
+        for row in rows.fetchall():
+            yield CacheEntryInfo(*row)
+
+    def arguments(self, namespace: str) -> Iterator[tuple[str, bytes]]:
+        rows = self._connection().execute("SELECT key, arguments FROM cache WHERE namespace = ?", (namespace,))
+        yield from rows.fetchall()
+
+    def vacuum(self) -> None:
+        con = self._connection()
+        con.execute("PRAGMA incremental_vacuum").fetchall()
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def purge_expired(self) -> int:
+        """Remove expired entries.
+
+        Returns:
+            Number of removed entries."""
+        with self._connection() as con:
+            return con.execute("DELETE FROM cache WHERE expires < ?", (time.time(),)).rowcount
+
+
+BACKENDS: dict[str, type[CacheBackend]] = {"joblib": JoblibBackend, "sqlite": SQLiteBackend}
+"""Available backends by name, used for `HUT_SERVICE_CACHE_BACKEND`."""
+
+_backend: CacheBackend | None = None
+
+
+def get_cache_backend() -> CacheBackend:
+    """Current cache backend, created from `HUT_SERVICE_CACHE_BACKEND` (`joblib` or `sqlite`) on first use."""
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[default_backend]()
+    return _backend
+
+
+def set_cache_backend(backend: CacheBackend | str) -> CacheBackend:
+    """Set the backend used by all cached functions without their own backend.
+
+    Args:
+        backend: Backend or name of a backend (`joblib` or `sqlite`).
+
+    Returns:
+        The new backend.
+    """
+    global _backend
+    _backend = BACKENDS[backend]() if isinstance(backend, str) else backend
+    return _backend
@@ -0,0 +1,78 @@
+import logging
+import os
+import time
+from collections.abc import Sequence
+
+from ._backends import CacheBackend, SQLiteBackend, get_cache_backend
+
+__all__ = ["export_cache", "import_cache"]
+
+logger = logging.getLogger(__name__)
+
+
+def _in_namespaces(namespace: str, namespaces: Sequence[str] | None) -> bool:
+    return namespaces is None or any(namespace == n or namespace.startswith(f"{n}/") for n in namespaces)
+
+
+def export_cache(path: str, backend: CacheBackend | None = None, namespaces: Sequence[str] | None = None) -> int:
+    """Exports all valid cache entries into a bundle (a SQLite file), e.g. to warm up other nodes.
+
+    Args:
+        path: Bundle file, replaced if it exists.
+        backend: Backend to export, the global backend if not set.
+        namespaces: Only export these namespaces (e.g. `hut_services/osm`), all if not set.
+
+    Returns:
+        Number of exported entries.
+    """
+    backend = get_cache_backend() if backend is None else backend
+    if os.path.exists(path):
+        os.remove(path)
+    bundle = SQLiteBackend(path, journal_mode="DELETE")
+    now = time.time()
+    exported = 0
+    for info in backend.entries():
+        if info.expires < now or not _in_namespaces(info.namespace, namespaces):
+            continue
+        entry = backend.get(info.namespace, info.key)
+        if entry is not None:
+            bundle.set(info.namespace, info.key, entry)
+            exported += 1
+    bundle.vacuum()
+    logger.info(f"Exported {exported} cache entries from {backend} to '{path}'.")
+    return exported
+
+
+def import_cache(path: str, backend: CacheBackend | None = None, namespaces: Sequence[str] | None = None) -> int:
+    """Imports a bundle created with [`export_cache()`][hut_services.core.cache.export_cache].
+
+    Entries which are expired or older than the ones in the backend are skipped.
+
+    Args:
+        path: Bundle file.
+        backend: Backend to import into, the global backend if not set.
+        namespaces: Only import these namespaces, all if not set.
+
+    Returns:
+        Number of imported entries.
+    """
+    if not os.path.exists(path):
+        err_msg = f"Cache bundle '{path}' does not exist."
+        raise FileNotFoundError(err_msg)
+    backend = get_cache_backend() if backend is None else backend
+    bundle = SQLiteBackend(path, journal_mode="DELETE")
+    now = time.time()
+    imported = 0
+    for info in bundle.entries():
+        if info.expires < now or not _in_namespaces(info.namespace, namespaces):
+            continue
+        entry = bundle.get(info.namespace, info.key)
+        if entry is None:
+            continue
+        current = backend.get(info.namespace, info.key)
+        if current is not None and current.created >= entry.created:
+            continue
+        backend.set(info.namespace, info.key, entry)
+        imported += 1
+    logger.info(f"Imported {imported} cache entries from '{path}' into {backend}.")
+    return imported
@@ -0,0 +1,153 @@
+import logging
+import os
+import pickle
+import typing as t
+import zlib
+
+from pydantic import TypeAdapter
+
+__all__ = ["Codec", "CodecName", "CompressionName"]
+
+logger = logging.getLogger(__name__)
+
+CodecName: t.TypeAlias = t.Literal["pickle", "json", "msgpack"]
+CompressionName: t.TypeAlias = t.Literal["none", "zlib", "lz4", "zstd"]
+
+default_serializer: CodecName = os.environ.get("HUT_SERVICE_CACHE_CODEC", "pickle")  # type: ignore[assignment]
+default_compression: CompressionName = os.environ.get("HUT_SERVICE_CACHE_COMPRESSION", "zlib")  # type: ignore[assignment]
+
+# first byte of a payload: serializer, second byte: compression
+_SERIALIZER_TAGS: dict[str, bytes] = {"pickle": b"P", "json": b"J", "msgpack": b"M", "raw": b"R"}
+_COMPRESSION_TAGS: dict[str, bytes] = {"none": b"0", "zlib": b"z", "lz4": b"4", "zstd": b"s"}
+_SERIALIZERS = {v: k for k, v in _SERIALIZER_TAGS.items()}
+_COMPRESSIONS = {v: k for k, v in _COMPRESSION_TAGS.items()}
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "zlib":
+        return zlib.compress(data, 3)
+    if compression == "lz4":
+        import lz4.frame
+
+        return t.cast(bytes, lz4.frame.compress(data))
+    if compression == "zstd":
+        import zstandard
+
+        return t.cast(bytes, zstandard.ZstdCompressor(level=3).compress(data))
+    return data
+
+
+def _decompress(data: bytes, compression: str) -> bytes:
+    if compression == "zlib":
+        return zlib.decompress(data)
+    if compression == "lz4":
+        import lz4.frame
+
+        return t.cast(bytes, lz4.frame.decompress(data))
+    if compression == "zstd":
+        import zstandard
+
+        return t.cast(bytes, zstandard.ZstdDecompressor().decompress(data))
+    return data
+
+
+def _check_installed(module: str, name: str) -> None:
+    try:
+        __import__(module)
+    except ImportError as e:
+        err_msg = f"'{name}' requires the '{module}' package, install it with 'pip install hut-services[cache]'."
+        raise ImportError(err_msg) from e
+
+
+class Codec:
+    """Serialization of cached values.
+
+    Pydantic values are dumped as JSON (or msgpack) and validated again on load,
+    which is faster and smaller than pickling whole model graphs.
+    Values which cannot be serialized with `serializer` fall back to pickle.
+    Raw `bytes` are always stored as they are (no compression).
+
+    The payload starts with a two byte header (serializer and compression),
+    entries can therefore always be loaded, even if the codec of a function changes.
+
+    Examples:
+        ```python
+        @file_cache(codec=Codec("json", type_=list[OsmHutSource], compression="zstd"))
+        def get_huts() -> list[OsmHutSource]:
+            ...
+        ```
+
+    Args:
+        serializer: `pickle`, `json` or `msgpack` (requires `msgpack`).
+        compression: `none`, `zlib`, `lz4` (requires `lz4`) or `zstd` (requires `zstandard`).
+        type_: Type of the value (e.g. `list[OsmHutSource]`), required for `json` and `msgpack`
+            in order to get pydantic models back.
+    """
+
+    def __init__(
+        self,
+        serializer: CodecName = default_serializer,
+        compression: CompressionName = default_compression,
+        type_: t.Any = None,
+    ):
+        if serializer not in _SERIALIZER_TAGS or serializer == "raw":
+            err_msg = f"Unknown cache serializer '{serializer}'."
+            raise ValueError(err_msg)
+        if compression not in _COMPRESSION_TAGS:
+            err_msg = f"Unknown cache compression '{compression}'."
+            raise ValueError(err_msg)
+        if serializer == "msgpack":
+            _check_installed("msgpack", "msgpack serializer")
+        if compression == "lz4":
+            _check_installed("lz4", "lz4 compression")
+        elif compression == "zstd":
+            _check_installed("zstandard", "zstd compression")
+        if serializer != "pickle" and type_ is None:
+            err_msg = f"Serializer '{serializer}' requires 'type_'."
+            raise ValueError(err_msg)
+        self.serializer = serializer
+        self.compression = compression
+        self.type_ = type_
+        self._adapter: TypeAdapter | None = TypeAdapter(type_) if type_ is not None else None
+
+    def __repr__(self) -> str:
+        return f"Codec({self.serializer!r}, {self.compression!r}, type_={self.type_!r})"
+
+    def dumps(self, value: t.Any) -> bytes:
+        """Serialize a value."""
+        if type(value) is bytes:
+            return _SERIALIZER_TAGS["raw"] + _COMPRESSION_TAGS["none"] + value
+        serializer = self.serializer
+        data: bytes | None = None
+        if serializer != "pickle" and self._adapter is not None:
+            try:
+                if serializer == "json":
+                    data = self._adapter.dump_json(value, by_alias=True, warnings="error")
+                else:
+                    import msgpack
+
+                    obj = self._adapter.dump_python(value, mode="json", by_alias=True, warnings="error")
+                    data = msgpack.packb(obj)
+            except Exception as e:
+                logger.debug(f"Could not serialize value with '{serializer}', use pickle: {e}")
+        if data is None:
+            serializer = "pickle"
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return _SERIALIZER_TAGS[serializer] + _COMPRESSION_TAGS[self.compression] + _compress(data, self.compression)
+
+    def loads(self, payload: bytes) -> t.Any:
+        """Deserialize a value."""
+        serializer = _SERIALIZERS[payload[:1]]
+        data = _decompress(payload[2:], _COMPRESSIONS[payload[1:2]])
+        if serializer == "raw":
+            return data
+        if serializer == "pickle":
+            return pickle.loads(data)  # noqa: S301 # local cache data
+        if self._adapter is None:
+            err_msg = f"Entry serialized with '{serializer}' but the codec has no 'type_'."
+            raise ValueError(err_msg)
+        if serializer == "json":
+            return self._adapter.validate_json(data)
+        import msgpack
+
+        return self._adapter.validate_python(msgpack.unpackb(data))
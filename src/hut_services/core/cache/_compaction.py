@@ -0,0 +1,103 @@
+import logging
+import os
+import threading
+import time
+
+from ._backends import CacheBackend, get_cache_backend
+
+__all__ = ["CacheCompactor", "compact_cache"]
+
+logger = logging.getLogger(__name__)
+
+default_max_bytes = int(os.environ.get("HUT_SERVICE_CACHE_MAX_BYTES", 1024 * 1024 * 1024 * 2))  # 2 GiB
+
+
+def compact_cache(
+    backend: CacheBackend | None = None, max_bytes: int = default_max_bytes, target: float = 0.9
+) -> tuple[int, int]:
+    """Removes expired entries and evicts entries until the cache is smaller than `max_bytes`.
+
+    Entries with a lower [`CachePriority`][hut_services.core.cache.CachePriority] are evicted first,
+    within the same priority the least recently used entries.
+    Evicts down to `target * max_bytes` in order to not compact again after the next write.
+
+    Args:
+        backend: Cache backend, the global backend if not set.
+        max_bytes: Maximal size of the cache in bytes, `0` only removes expired entries.
+        target: Fraction of `max_bytes` to evict down to.
+
+    Returns:
+        Number of removed entries and bytes.
+    """
+    backend = get_cache_backend() if backend is None else backend
+    now = time.time()
+    removed_entries, removed_bytes = 0, 0
+    entries = []
+    for info in backend.entries():
+        if info.expires < now:
+            backend.delete(info.namespace, info.key)
+            removed_entries += 1
+            removed_bytes += info.size
+        else:
+            entries.append(info)
+    total = sum(e.size for e in entries)
+    if max_bytes and total > max_bytes:
+        entries.sort(key=lambda e: (e.priority, e.accessed))
+        for info in entries:
+            if total <= max_bytes * target:
+                break
+            backend.delete(info.namespace, info.key)
+            total -= info.size
+            removed_entries += 1
+            removed_bytes += info.size
+    if removed_entries:
+        backend.vacuum()
+        logger.info(f"Removed {removed_entries} cache entries ({removed_bytes / 1024 / 1024:.1f} MiB) from {backend}.")
+    return removed_entries, removed_bytes
+
+
+class CacheCompactor:
+    """Runs [`compact_cache()`][hut_services.core.cache.compact_cache] in a background thread
+    whenever `check_bytes` were written to a backend, never on the request path.
+
+    Args:
+        max_bytes: Maximal size of the cache in bytes, `0` disables the compactor.
+        check_bytes: Compact after this many bytes were written, defaults to 5% of `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = default_max_bytes, check_bytes: int | None = None):
+        self.max_bytes = max_bytes
+        self.check_bytes = check_bytes if check_bytes is not None else max(max_bytes // 20, 1024 * 1024)
+        self._pending: dict[int, tuple[CacheBackend, int]] = {}
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def written(self, backend: CacheBackend, nbytes: int) -> None:
+        """Record written bytes, schedules a compaction if needed (checks after the first write as well)."""
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            _, pending = self._pending.get(id(backend), (backend, self.check_bytes))
+            pending += nbytes
+            self._pending[id(backend)] = (backend, pending)
+            if pending < self.check_bytes:
+                return
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="hut-cache-compactor", daemon=True)
+                self._thread.start()
+        self._event.set()
+
+    def _run(self) -> None:
+        while True:
+            self._event.wait()
+            self._event.clear()
+            with self._lock:
+                due = [b for b, pending in self._pending.values() if pending >= self.check_bytes]
+                for backend in due:
+                    self._pending[id(backend)] = (backend, 0)
+            for backend in due:
+                try:
+                    compact_cache(backend, max_bytes=self.max_bytes)
+                except Exception as e:
+                    logger.warning(f"Cache compaction of {backend} failed: {e}")
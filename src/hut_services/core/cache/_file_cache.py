@@ -0,0 +1,760 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import threading
+import time
+from collections.abc import Callable, Hashable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, TypeVar
+
+from joblib import hash as joblib_hash  # type: ignore[import-untyped]
+from joblib.func_inspect import filter_args, get_func_name  # type: ignore[import-untyped]
+from pydantic import BaseModel
+
+from ._backends import CacheBackend, CacheEntry, CachePriority, get_cache_backend
+from ._codecs import Codec
+from ._compaction import CacheCompactor
+from ._locks import KeyLocks, get_key_locks
+from ._memory import MISSING, MemoryTier, default_bytes, default_entries, default_ttl
+from ._stats import CacheStats
+
+__all__ = [
+    "AsyncCachedFunction",
+    "CachedFunction",
+    "cache_stats",
+    "canonical",
+    "canonical_key",
+    "clear_file_cache",
+    "file_cache",
+    "invalidate_cache",
+    "reset_cache_stats",
+]
+
+logger = logging.getLogger(__name__)
+
+default_seconds = int(os.environ.get("HUT_SERVICE_EXPIRE_SECONDS", 3600 * 24 * 2))  # 2 days
+default_stale_seconds = int(os.environ.get("HUT_SERVICE_STALE_SECONDS", 0))
+default_negative_seconds = float(os.environ.get("HUT_SERVICE_NEGATIVE_SECONDS", 30))
+negative_entries = 128  # maximal number of remembered failures per function
+forever_seconds = 3600 * 24 * 365 * 10  # 10 years
+refresh_workers = int(os.environ.get("HUT_SERVICE_REFRESH_WORKERS", 2))
+_cached_functions: list["CachedFunction"] = []
+_compactor = CacheCompactor()
+_default_codec = Codec()
+_refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="hut-cache-refresh")
+T = TypeVar("T")
+ArgumentsPredicate = Callable[[dict[str, Any]], bool]
+KeyFunction = Callable[[dict[str, Any]], Hashable]
+
+
+def _freeze(value: Any) -> Any:
+    """Converts lists, dicts and sets recursively into hashable tuples and frozensets."""
+    if isinstance(value, list | tuple):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set | frozenset):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+def canonical(value: Any, digits: int = 6) -> Hashable:
+    """Canonical, hashable representation of a value for cache keys.
+
+    Pydantic models are dumped, dictionaries sorted, sets sorted and floats rounded to `digits`,
+    semantically equal values (e.g. boundary boxes with float noise) get the same representation.
+
+    Args:
+        value: Value to convert.
+        digits: Number of decimal digits floats are rounded to.
+
+    Returns:
+        Nested tuples of basic types.
+    """
+    if isinstance(value, float):
+        return round(value, digits) + 0.0  # no negative zero
+    if isinstance(value, str | int | bool | bytes) or value is None:
+        return value
+    if isinstance(value, BaseModel):
+        return (type(value).__name__, canonical(value.model_dump(), digits))
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), canonical(v, digits)) for k, v in value.items()))
+    if isinstance(value, list | tuple):
+        return tuple(canonical(v, digits) for v in value)
+    if isinstance(value, set | frozenset):
+        return tuple(sorted((canonical(v, digits) for v in value), key=repr))
+    other: Hashable = value  # e.g. dates or enums
+    return other
+
+
+def canonical_key(arguments: dict[str, Any]) -> Hashable:
+    """Key function for [`file_cache`][hut_services.core.cache.file_cache] using
+    [`canonical()`][hut_services.core.cache.canonical] representations of all arguments."""
+    return canonical(arguments)
+
+
+def _func_source(func: Callable) -> str:
+    """Source code of the function, used to invalidate the cache if the function changes."""
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return repr(getattr(func, "__code__", func))
+
+
+class CachedFunction:
+    """Function cached on disk with an in-process memory tier in front.
+
+    Created by [`file_cache`][hut_services.core.cache.file_cache] and called like the wrapped function.
+    Values found in the memory tier are returned without hashing the arguments
+    with joblib or touching the disk.
+
+    Expired disk entries younger than `expire_in_seconds + stale_ttl` are returned
+    at once while the value is refreshed in the background (stale-while-revalidate).
+    With `refresh_ahead` entries which are accessed shortly before they expire are refreshed
+    in the background as well.
+
+    Concurrent calls with the same arguments which miss the cache wait for one computation
+    and share its result (single flight), within the process and across processes
+    using the same backend (lock files next to the cache, see
+    [`CacheBackend.lock_directory`][hut_services.core.cache.CacheBackend.lock_directory]).
+
+    Exceptions are never written to the disk cache. Failed calls are remembered in memory
+    for `negative_ttl` seconds, during this time the same exception is raised again
+    without calling the function (negative caching).
+
+    Attributes:
+        func: Wrapped function.
+        func_id: Identifier of the function in the disk cache.
+        namespace: Dotted namespace used for invalidation (e.g. `hut_services.osm`).
+        memory: Memory tier, `None` if disabled.
+        expire_in_seconds: Seconds until a disk entry expires.
+        stale_ttl: Seconds an expired disk entry is still returned while it is refreshed.
+        refresh_ahead: Seconds before expiration an accessed entry is refreshed.
+        backend: Storage backend, see [`set_cache_backend()`][hut_services.core.cache.set_cache_backend].
+        priority: Eviction priority of the entries.
+        codec: Serialization of the values.
+        negative: Recently failed calls, `None` if negative caching is disabled.
+        negative_exceptions: Exceptions which are remembered in `negative`.
+        single_flight: Concurrent misses of the same key wait for one computation.
+        key_func: Computes the key from the arguments instead of hashing them with joblib.
+        stats: Cache statistics, see [`cache_stats()`][hut_services.core.cache.cache_stats].
+    """
+
+    def __init__(
+        self,
+        func: Callable,
+        ignore: Sequence[str],
+        expire_in_seconds: int,
+        memory: MemoryTier | None,
+        stale_ttl: int = 0,
+        refresh_ahead: int = 0,
+        backend: CacheBackend | None = None,
+        priority: int = CachePriority.normal,
+        codec: Codec | None = None,
+        namespace: str | None = None,
+        negative_ttl: float = 0,
+        negative_exceptions: tuple[type[BaseException], ...] = (Exception,),
+        single_flight: bool = True,
+        key_func: KeyFunction | None = None,
+    ) -> None:
+        self.func = func
+        self.ignore = list(ignore)
+        self.memory = memory
+        self.expire_in_seconds = expire_in_seconds
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self._backend = backend
+        self.priority = priority
+        self.codec = codec if codec is not None else _default_codec
+        self.negative = MemoryTier(max_entries=negative_entries, ttl=negative_ttl) if negative_ttl > 0 else None
+        self.negative_exceptions = negative_exceptions
+        self.single_flight = single_flight
+        self.key_func = key_func
+        self._signature = inspect.signature(func)
+        modules, name = get_func_name(func)
+        self.func_id = os.path.join(*modules, name)
+        self.namespace = namespace if namespace is not None else func.__module__
+        self._func_hash = joblib_hash(_func_source(func))
+        self.stats = CacheStats()
+        self._refreshing: set[str] = set()
+        self._refreshing_lock = threading.Lock()
+        functools.update_wrapper(self, func)
+        _cached_functions.append(self)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        value, key, memory_key = self._lookup(args, kwargs)
+        if value is not MISSING:
+            return value
+        value, age = self._load(key)
+        if value is MISSING:
+            return self._miss(key, memory_key, args, kwargs)
+        if self._loaded(value, age, memory_key):
+            self._refresh(key, memory_key, args, kwargs)
+        return value
+
+    def register_async(self, func: Callable) -> "AsyncCachedFunction":
+        """Decorator registering an async implementation of this function which shares its cache.
+
+        The async function must take the same arguments and return the same values,
+        the cache key includes the source code of both functions.
+
+        Examples:
+            ```python
+            @file_cache(ignore=["client"])
+            def get_page(url: str, client: httpx.Client) -> bytes:
+                return client.get(url).content
+
+            @get_page.register_async
+            async def get_page_async(url: str, client: httpx.AsyncClient) -> bytes:
+                return (await client.get(url)).content
+            ```
+
+        Args:
+            func: Async function (`async def`).
+
+        Returns:
+            Cached async function.
+        """
+        self._func_hash = joblib_hash((_func_source(self.func), _func_source(func)))
+        return AsyncCachedFunction(func, self)
+
+    @property
+    def backend(self) -> CacheBackend:
+        """Backend of this function, the global backend if not set explicitly."""
+        return self._backend if self._backend is not None else get_cache_backend()
+
+    @property
+    def locks(self) -> KeyLocks:
+        """Per key locks shared by all processes using the backend."""
+        return get_key_locks(self.backend.lock_directory)
+
+    def clear(self) -> None:
+        """Clears the cache of this function (memory and disk)."""
+        if self.memory is not None:
+            self.memory.clear()
+        if self.negative is not None:
+            self.negative.clear()
+        self.backend.clear(self.func_id)
+
+    def in_namespace(self, namespace: str) -> bool:
+        """Whether the function belongs to `namespace` (or one of its sub namespaces)."""
+        return self.namespace == namespace or self.namespace.startswith(f"{namespace}.")
+
+    def invalidate(self, where: ArgumentsPredicate | None = None) -> int:
+        """Removes entries of this function, all of them or only the ones whose arguments match `where`.
+
+        The memory tier is always cleared completely.
+
+        Args:
+            where: Called with the arguments of an entry (as dictionary with the argument names as keys,
+                ignored arguments are not included), the entry is removed if it returns `True`.
+                Entries with unknown arguments (written by older versions) are always removed.
+
+        Returns:
+            Number of removed entries.
+        """
+        if self.memory is not None:
+            self.memory.clear()
+        if self.negative is not None:
+            self.negative.clear()
+        backend = self.backend
+        removed = 0
+        for key, arguments in list(backend.arguments(self.func_id)):
+            if where is not None and arguments:
+                try:
+                    if not where(pickle.loads(arguments)):  # noqa: S301 # local cache data
+                        continue
+                except Exception as e:
+                    logger.debug(f"Could not check arguments of '{self.func_id}' entry, remove it: {e}")
+            backend.delete(self.func_id, key)
+            removed += 1
+        return removed
+
+    def peek(self, *args: Any, **kwargs: Any) -> Any:
+        """Cached value for the arguments without calling the function, `MISSING` if it is not cached.
+
+        Stale entries are returned and refreshed in the background the same as on a call."""
+        value, key, memory_key = self._lookup(args, kwargs)
+        if value is not MISSING:
+            return value
+        value, age = self._load(key)
+        if value is not MISSING and self._loaded(value, age, memory_key):
+            self._refresh(key, memory_key, args, kwargs)
+        return value
+
+    def put(self, value: Any, *args: Any, **kwargs: Any) -> None:
+        """Stores a value for the arguments which was computed elsewhere (e.g. as part of a larger request)."""
+        memory_key = self._memory_key(args, kwargs) if self.memory is not None or self.key_func is not None else None
+        key = self._key(args, kwargs) if self.key_func is None else self._digest(memory_key)
+        self._store(key, memory_key, args, kwargs, value, time.time())
+
+    def _memory_key(self, args: tuple, kwargs: dict) -> Hashable:
+        """Cheap key for the memory tier, falls back to the joblib hash for unhashable arguments."""
+        if self.key_func is not None:
+            bound = self._signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {k: v for k, v in bound.arguments.items() if k not in self.ignore}
+            key: Hashable = self.key_func(arguments)
+            try:
+                hash(key)
+            except TypeError:
+                return repr(key)
+            return key
+        arguments = filter_args(self.func, self.ignore, args, kwargs)
+        try:
+            key = _freeze(arguments)
+            hash(key)
+        except TypeError:
+            return str(joblib_hash(arguments))
+        return key
+
+    def _key(self, args: tuple, kwargs: dict) -> str:
+        """Key of the entry in the backend."""
+        arguments = filter_args(self.func, self.ignore, args, kwargs)
+        return str(joblib_hash((self._func_hash, arguments)))
+
+    def _digest(self, key: Hashable) -> str:
+        """Key of the entry in the backend for a key computed by `key_func`."""
+        return hashlib.blake2b(f"{self._func_hash}:{key!r}".encode(), digest_size=16).hexdigest()
+
+    def _arguments(self, args: tuple, kwargs: dict) -> bytes:
+        """Pickled arguments saved with the entry, empty if they cannot be pickled."""
+        try:
+            return pickle.dumps(filter_args(self.func, self.ignore, args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.debug(f"Could not pickle arguments of '{self.func_id}': {e}")
+            return b""
+
+    def _load(self, key: str) -> tuple[Any, float]:
+        """Load an entry from the backend.
+
+        Returns:
+            Value (or `MISSING` if not available or too old) and its age in seconds."""
+        start = time.perf_counter()
+        entry = self.backend.get(self.func_id, key)
+        if entry is None:
+            return MISSING, 0
+        age = time.time() - entry.created
+        if age >= self.expire_in_seconds:
+            self.stats.add(expirations=1)
+        if age >= self.expire_in_seconds + self.stale_ttl:
+            return MISSING, age
+        try:
+            value = self.codec.loads(entry.payload)
+        except Exception as e:
+            logger.debug(f"Could not load cache entry for '{self.func_id}': {e}")
+            return MISSING, age
+        self.stats.add(bytes_read=len(entry.payload), load_seconds=time.perf_counter() - start)
+        return value, age
+
+    def _lookup(self, args: tuple, kwargs: dict) -> tuple[Any, str, Hashable]:
+        """Looks up the memory tier and raises remembered failures.
+
+        Returns:
+            Value (or `MISSING` if not in memory), the backend key and the memory key."""
+        start = time.perf_counter()
+        memory_key = (
+            self._memory_key(args, kwargs)
+            if self.memory is not None or self.negative is not None or self.key_func is not None
+            else None
+        )
+        if self.memory is not None:
+            value = self.memory.get(memory_key)
+            if value is not MISSING:
+                self.stats.add(memory_hits=1, key_seconds=time.perf_counter() - start)
+                return value, "", memory_key
+        if self.negative is not None:
+            error = self.negative.get(memory_key)
+            if error is not MISSING:
+                self.stats.add(negative_hits=1, key_seconds=time.perf_counter() - start)
+                raise error
+        key = self._key(args, kwargs) if self.key_func is None else self._digest(memory_key)
+        self.stats.add(key_seconds=time.perf_counter() - start)
+        return MISSING, key, memory_key
+
+    def _loaded(self, value: Any, age: float, memory_key: Hashable) -> bool:
+        """Records a value loaded from the backend.
+
+        Returns:
+            Whether the entry should be refreshed in the background."""
+        if age >= self.expire_in_seconds:
+            logger.debug(f"Return stale entry for '{self.func_id}' and refresh it in the background.")
+            self.stats.add(stale_hits=1)
+            return True
+        self.stats.add(disk_hits=1)
+        if self.refresh_ahead and age >= self.expire_in_seconds - self.refresh_ahead:
+            return True
+        if self.memory is not None:
+            self.memory.set(memory_key, value, ttl=self.expire_in_seconds - age)
+        return False
+
+    def _coalesced(self, key: str, memory_key: Hashable) -> Any:
+        """Value computed by a concurrent call (`MISSING` if none), raises its remembered failure."""
+        error = self.negative.get(memory_key) if self.negative is not None else MISSING
+        if error is not MISSING:
+            self.stats.add(negative_hits=1)
+            raise error
+        value, age = self._load(key)
+        if value is MISSING or age >= self.expire_in_seconds:
+            return MISSING
+        self.stats.add(coalesced=1)
+        if self.memory is not None:
+            self.memory.set(memory_key, value, ttl=self.expire_in_seconds - age)
+        return value
+
+    def _failed(self, memory_key: Hashable, error: BaseException) -> None:
+        self.stats.add(errors=1)
+        if self.negative is not None:
+            logger.debug(f"Call of '{self.func_id}' failed, remember it for {self.negative.ttl}s: {error}")
+            self.negative.set(memory_key, error, size=1)
+
+    def _miss(self, key: str, memory_key: Hashable, args: tuple, kwargs: dict) -> Any:
+        """Compute a missing value, concurrent callers of the same key wait for one computation."""
+        with self.locks.hold(key) if self.single_flight else nullcontext(False) as waited:
+            if waited:  # computed by someone else in the meantime?
+                value = self._coalesced(key, memory_key)
+                if value is not MISSING:
+                    return value
+            self.stats.add(misses=1)
+            try:
+                return self._compute(key, memory_key, args, kwargs)
+            except self.negative_exceptions as e:
+                self._failed(memory_key, e)
+                raise
+
+    def _compute(self, key: str, memory_key: Hashable, args: tuple, kwargs: dict) -> Any:
+        start = time.time()
+        value = self.func(*args, **kwargs)
+        self._store(key, memory_key, args, kwargs, value, start)
+        return value
+
+    def _store(self, key: str, memory_key: Hashable, args: tuple, kwargs: dict, value: Any, start: float) -> None:
+        """Writes a value computed since `start` to the backend and the memory tier."""
+        duration = time.time() - start
+        payload = self.codec.dumps(value)
+        expires = start + self.expire_in_seconds + self.stale_ttl
+        entry = CacheEntry(
+            payload,
+            created=start,
+            expires=expires,
+            duration=duration,
+            priority=self.priority,
+            arguments=self._arguments(args, kwargs),
+        )
+        self.backend.set(self.func_id, key, entry)
+        self.stats.add(compute_seconds=duration, bytes_written=len(payload))
+        _compactor.written(self.backend, len(payload))
+        if self.memory is not None:
+            self.memory.set(memory_key, value, ttl=self.expire_in_seconds)
+
+    def _refresh(self, key: str, memory_key: Hashable, args: tuple, kwargs: dict) -> None:
+        """Schedule a background refresh, only one refresh per entry runs at a time."""
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                with self.locks.try_hold(key) if self.single_flight else nullcontext(True) as free:
+                    if not free:  # refreshed or computed by another process
+                        return
+                    self.stats.add(refreshes=1)
+                    self._compute(key, memory_key, args, kwargs)
+            except Exception as e:
+                logger.warning(f"Background refresh of '{self.func_id}' failed, keep stale entry: {e}")
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        _refresh_executor.submit(refresh)
+
+
+class AsyncCachedFunction:
+    """Async function cached like a [`CachedFunction`][hut_services.core.cache.CachedFunction].
+
+    Created by [`file_cache`][hut_services.core.cache.file_cache] for `async def` functions or by
+    [`CachedFunction.register_async()`][hut_services.core.cache.CachedFunction.register_async]
+    and awaited like the wrapped function. It uses the cache, the settings and the statistics of `cached`,
+    other attributes (e.g. `invalidate()`) are the ones of `cached` as well.
+
+    The backend is accessed in a worker thread, the event loop is not blocked by disk access.
+    Concurrent calls with the same arguments within an event loop wait for one computation (single flight),
+    there is no locking across processes.
+
+    Attributes:
+        func: Wrapped async function.
+        cached: Cached function whose cache is used.
+    """
+
+    def __init__(self, func: Callable, cached: CachedFunction) -> None:
+        self.func = func
+        self.cached = cached
+        self._running: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+        self._refresh_tasks: set[asyncio.Task] = set()
+        functools.update_wrapper(self, func)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "cached":
+            raise AttributeError(name)
+        return getattr(self.cached, name)
+
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        cached = self.cached
+        value, key, memory_key = cached._lookup(args, kwargs)
+        if value is not MISSING:
+            return value
+        value, age = await asyncio.to_thread(cached._load, key)
+        if value is MISSING:
+            return await self._miss(key, memory_key, args, kwargs)
+        if cached._loaded(value, age, memory_key):
+            self._refresh(key, memory_key, args, kwargs)
+        return value
+
+    async def _miss(self, key: str, memory_key: Hashable, args: tuple, kwargs: dict) -> Any:
+        """Compute a missing value, concurrent callers of the same key wait for one computation."""
+        cached = self.cached
+        loop = asyncio.get_running_loop()
+        running = self._running.get((loop, key)) if cached.single_flight else None
+        if running is not None:
+            value = await asyncio.shield(running)  # raises the exception of the computation
+            cached.stats.add(coalesced=1)
+            return value
+        future = loop.create_future()
+        if cached.single_flight:
+            self._running[loop, key] = future
+        cached.stats.add(misses=1)
+        try:
+            value = await self._compute(key, memory_key, args, kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            if isinstance(e, cached.negative_exceptions):
+                cached._failed(memory_key, e)
+            future.set_exception(e)
+            future.exception()  # retrieved, even if nobody waits for it
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            if self._running.get((loop, key)) is future:
+                del self._running[loop, key]
+
+    async def _compute(self, key: str, memory_key: Hashable, args: tuple, kwargs: dict) -> Any:
+        start = time.time()
+        value = await self.func(*args, **kwargs)
+        await asyncio.to_thread(self.cached._store, key, memory_key, args, kwargs, value, start)
+        return value
+
+    def _refresh(self, key: str, memory_key: Hashable, args: tuple, kwargs: dict) -> None:
+        """Schedule a background refresh task, only one refresh per entry runs at a time."""
+        cached = self.cached
+        with cached._refreshing_lock:
+            if key in cached._refreshing:
+                return
+            cached._refreshing.add(key)
+
+        async def refresh() -> None:
+            try:
+                cached.stats.add(refreshes=1)
+                await self._compute(key, memory_key, args, kwargs)
+            except Exception as e:
+                logger.warning(f"Background refresh of '{cached.func_id}' failed, keep stale entry: {e}")
+            finally:
+                with cached._refreshing_lock:
+                    cached._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks.add(task)  # keep a reference until it is done
+        task.add_done_callback(self._refresh_tasks.discard)
+
+
+def file_cache(
+    func: Callable | None = None,
+    ignore: Sequence = [],
+    expire_in_seconds: int = default_seconds,
+    forever: bool = False,
+    stale_ttl: int = default_stale_seconds,
+    refresh_ahead: int = 0,
+    memory_entries: int = default_entries,
+    memory_bytes: int = default_bytes,
+    memory_ttl: float = default_ttl,
+    backend: CacheBackend | None = None,
+    priority: int | None = None,
+    codec: Codec | None = None,
+    namespace: str | None = None,
+    negative_ttl: float = default_negative_seconds,
+    negative_exceptions: tuple[type[BaseException], ...] = (Exception,),
+    single_flight: bool = True,
+    key: KeyFunction | None = None,
+) -> Any:
+    """Chaches function, if 'forever' is True, cache will never expire (and 'expire_in_seconds' will be ignored).
+
+    Async functions (`async def`) are cached as well, see
+    [`AsyncCachedFunction`][hut_services.core.cache.AsyncCachedFunction].
+
+    Results are additionaly kept in a bounded in-process memory tier (LRU) in front of the disk cache.
+    The disk cache is limited to `HUT_SERVICE_CACHE_MAX_BYTES` (default 2 GiB), least recently used entries
+    with the lowest `priority` are evicted first by a background compaction.
+
+    Args:
+        func: Function to cache.
+        ignore: Arguments which are not used for the cache key.
+        expire_in_seconds: Seconds until a disk cache entry expires.
+        forever: Never expire the disk cache entry.
+        stale_ttl: Seconds an expired entry is still returned while it is refreshed in the background.
+        refresh_ahead: Refresh entries in the background if they are accessed within
+            this many seconds before they expire, `0` disables it.
+        memory_entries: Maximal number of entries in the memory tier, `0` disables it.
+        memory_bytes: Maximal (estimated) size of the memory tier in bytes.
+        memory_ttl: Seconds until a memory tier entry expires (never longer than the disk entry).
+        backend: Storage backend for this function, the global backend
+            (see [`set_cache_backend()`][hut_services.core.cache.set_cache_backend]) is used if not set.
+        priority: Eviction priority, defaults to `CachePriority.high` for `forever` entries
+            and `CachePriority.normal` otherwise.
+        codec: Serialization of the values, defaults to pickle with zlib compression
+            (`HUT_SERVICE_CACHE_CODEC` and `HUT_SERVICE_CACHE_COMPRESSION`).
+        namespace: Dotted namespace used by [`invalidate_cache()`][hut_services.core.cache.invalidate_cache],
+            defaults to the module of the function (e.g. `hut_services.osm.service`).
+        negative_ttl: Seconds a failed call is remembered and its exception raised again
+            without calling the function (`HUT_SERVICE_NEGATIVE_SECONDS`, default 30), `0` disables it.
+            Exceptions are never cached on disk, functions should raise on failures
+            (e.g. `response.raise_for_status()`) instead of returning empty results.
+        negative_exceptions: Exceptions which are remembered by the negative cache.
+        single_flight: Concurrent calls with the same arguments which miss the cache wait for one
+            computation and share its result, across processes as well (lock files in `HUT_SERVICE_CACHE_DIR`).
+        key: Computes the cache key from the arguments (dictionary with the argument names as keys,
+            defaults applied and ignored arguments removed) instead of hashing all arguments with joblib.
+            The returned value must have a stable `repr()`,
+            e.g. [`canonical_key`][hut_services.core.cache.canonical_key] or
+            `lambda args: (args["name"], round(args["lat"], 5))`.
+    """
+    if priority is None:
+        priority = CachePriority.high if forever else CachePriority.normal
+    if forever:
+        expire_in_seconds = forever_seconds
+    if func is None:
+        return functools.partial(
+            file_cache,
+            ignore=ignore,
+            expire_in_seconds=expire_in_seconds,
+            stale_ttl=stale_ttl,
+            refresh_ahead=refresh_ahead,
+            memory_entries=memory_entries,
+            memory_bytes=memory_bytes,
+            memory_ttl=memory_ttl,
+            backend=backend,
+            priority=priority,
+            codec=codec,
+            namespace=namespace,
+            negative_ttl=negative_ttl,
+            negative_exceptions=negative_exceptions,
+            single_flight=single_flight,
+            key=key,
+        )
+    memory = (
+        MemoryTier(
+            max_entries=memory_entries, max_bytes=memory_bytes, ttl=min(memory_ttl, expire_in_seconds), copies=True
+        )
+        if memory_entries > 0
+        else None
+    )
+    cached = CachedFunction(
+        func,
+        ignore=ignore,
+        expire_in_seconds=expire_in_seconds,
+        memory=memory,
+        stale_ttl=stale_ttl,
+        refresh_ahead=refresh_ahead,
+        backend=backend,
+        priority=priority,
+        codec=codec,
+        namespace=namespace,
+        negative_ttl=negative_ttl,
+        negative_exceptions=negative_exceptions,
+        single_flight=single_flight,
+        key_func=key,
+    )
+    return AsyncCachedFunction(func, cached) if inspect.iscoroutinefunction(func) else cached
+
+
+def clear_file_cache() -> None:
+    """Cleares cache."""
+    backends = {id(get_cache_backend()): get_cache_backend()}
+    for cached_function in _cached_functions:
+        if cached_function.memory is not None:
+            cached_function.memory.clear()
+        if cached_function.negative is not None:
+            cached_function.negative.clear()
+        backends[id(cached_function.backend)] = cached_function.backend
+    for backend in backends.values():
+        backend.clear()
+
+
+def invalidate_cache(
+    target: CachedFunction | AsyncCachedFunction | str, where: ArgumentsPredicate | None = None
+) -> int:
+    """Removes the entries of a cached function or of all cached functions in a namespace.
+
+    Examples:
+        ```python
+        from hut_services.core.cache import invalidate_cache
+        from hut_services.core.schema.geo import bbox_intersects
+
+        # all refuges.info entries
+        invalidate_cache("hut_services.refuges_info")
+        # only OSM requests which overlap with the area
+        invalidate_cache(
+            _get_huts_from_source,
+            where=lambda args: args["bbox"] is None or bbox_intersects(args["bbox"], (7.0, 46.0, 8.0, 47.0)),
+        )
+        ```
+
+    Args:
+        target: Cached function or dotted namespace (e.g. `hut_services.osm`), only functions
+            which are already imported are considered.
+        where: Only remove entries whose arguments match, see
+            [`CachedFunction.invalidate()`][hut_services.core.cache.CachedFunction.invalidate].
+
+    Returns:
+        Number of removed entries.
+    """
+    if isinstance(target, AsyncCachedFunction):
+        target = target.cached
+    if isinstance(target, CachedFunction):
+        return target.invalidate(where)
+    return sum(f.invalidate(where) for f in _cached_functions if f.in_namespace(target))
+
+
+def cache_stats(func: CachedFunction | None = None) -> dict[str, CacheStats]:
+    """Statistics of all cached functions (or only `func`).
+
+    Examples:
+        ```python
+        from hut_services import cache_stats
+
+        for func_id, stats in cache_stats().items():
+            print(f"{func_id}: {stats.hits} hits, {stats.misses} misses, {stats.compute_seconds:.1f}s computing")
+        ```
+
+    Args:
+        func: Only return the statistics of this function.
+
+    Returns:
+        Copy of the statistics with the function id as key.
+    """
+    funcs = _cached_functions if func is None else [func]
+    return {f.func_id: f.stats.snapshot() for f in funcs}
+
+
+def reset_cache_stats(func: CachedFunction | None = None) -> None:
+    """Resets the statistics of all cached functions (or only `func`)."""
+    for f in _cached_functions if func is None else [func]:
+        f.stats.reset()
@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+import time
+import typing as t
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover # windows, only in-process locks
+    fcntl = None  # type: ignore[assignment]
+
+from ._backends import cachedir
+
+__all__ = ["FileLock", "KeyLocks", "get_key_locks"]
+
+logger = logging.getLogger(__name__)
+
+default_lock_seconds = float(os.environ.get("HUT_SERVICE_LOCK_SECONDS", 60 * 5))
+lock_stripes = 1024  # number of lock files, keys are distributed over them
+
+
+class FileLock:
+    """Advisory inter-process lock (`flock`) on a file, a no-op where `fcntl` is not available.
+
+    On Linux `flock` works on NFS as well (emulated with byte range locks by the NFS client).
+
+    Args:
+        path: Lock file, created if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: int | None = None
+
+    def acquire(self, timeout: float = default_lock_seconds) -> bool:
+        """Acquire the lock, waits at most `timeout` seconds (`0` does not wait).
+
+        Returns:
+            `True` if the lock was acquired."""
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 0.2)
+            else:
+                self._fd = fd
+                return True
+
+    def release(self) -> None:
+        """Release the lock if it is held."""
+        if self._fd is not None and fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
+
+
+class KeyLocks:
+    """Per key locks, held by one thread of one process at a time.
+
+    Within a process a `threading.Lock` is used per key, across processes
+    sharing the same directory a [`FileLock`][hut_services.core.cache.FileLock].
+    Keys are spread over a fixed number of lock files to not leave a file per key behind.
+    The lock file of a stripe is shared by all keys of a process (`flock` is not reentrant),
+    nested calls or other keys of the same stripe therefore never wait for their own process.
+
+    Args:
+        directory: Directory of the lock files, `None` for in-process locks only.
+        timeout: Maximal seconds to wait for a lock, the caller continues without the lock afterwards.
+    """
+
+    def __init__(self, directory: str | None = os.path.join(cachedir, "locks"), timeout: float = default_lock_seconds):
+        self.directory = directory
+        self.timeout = timeout
+        self._locks: dict[str, tuple[threading.Lock, int]] = {}
+        self._lock = threading.Lock()
+        self._stripes: dict[int, tuple[FileLock, int]] = {}  # held file locks and their users in this process
+        self._stripes_lock = threading.Lock()
+
+    def _stripe(self, key: str) -> int | None:
+        if self.directory is None:
+            return None
+        try:
+            return int(key[:8], 16) % lock_stripes
+        except ValueError:
+            return hash(key) % lock_stripes
+
+    def _acquire_stripe(self, stripe: int, timeout: float) -> bool:
+        """Acquire the file lock of a stripe or join it if this process holds it already."""
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        while True:
+            with self._stripes_lock:
+                if stripe in self._stripes:
+                    file_lock, users = self._stripes[stripe]
+                    self._stripes[stripe] = (file_lock, users + 1)
+                    return True
+                file_lock = FileLock(os.path.join(t.cast(str, self.directory), f"{stripe}.lock"))
+                if file_lock.acquire(timeout=0):
+                    self._stripes[stripe] = (file_lock, 1)
+                    return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+    def _release_stripe(self, stripe: int) -> None:
+        with self._stripes_lock:
+            file_lock, users = self._stripes[stripe]
+            if users <= 1:
+                del self._stripes[stripe]
+                file_lock.release()
+            else:
+                self._stripes[stripe] = (file_lock, users - 1)
+
+    @contextmanager
+    def hold(self, key: str, timeout: float | None = None) -> Iterator[bool]:
+        """Hold the lock of `key`.
+
+        Args:
+            key: Key to lock.
+            timeout: Maximal seconds to wait, defaults to `timeout` of the instance.
+
+        Yields:
+            `True` if the lock was held by someone else and had to be waited for
+            (the result of that caller might be available now).
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            lock, users = self._locks.get(key, (threading.Lock(), 0))
+            self._locks[key] = (lock, users + 1)
+        waited = not lock.acquire(blocking=False)
+        locked = not waited or lock.acquire(timeout=timeout)
+        stripe = self._stripe(key) if locked else None
+        if stripe is not None and not self._acquire_stripe(stripe, timeout=0):
+            waited = True
+            if not self._acquire_stripe(stripe, timeout=timeout):
+                stripe = None
+                logger.warning(f"Waited {timeout}s for the file lock of '{key}', continue without it.")
+        if not locked:
+            logger.warning(f"Waited {timeout}s for the lock of '{key}', continue without it.")
+        try:
+            yield waited
+        finally:
+            if stripe is not None:
+                self._release_stripe(stripe)
+            if locked:
+                lock.release()
+            with self._lock:
+                lock, users = self._locks[key]
+                if users <= 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, users - 1)
+
+    @contextmanager
+    def try_hold(self, key: str) -> Iterator[bool]:
+        """Hold the inter-process lock of `key` if it is free, does not wait.
+
+        Yields:
+            `False` if the lock is held by another process.
+        """
+        stripe = self._stripe(key)
+        if stripe is not None and not self._acquire_stripe(stripe, timeout=0):
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if stripe is not None:
+                self._release_stripe(stripe)
+
+
+_key_locks: dict[str | None, KeyLocks] = {}
+_key_locks_lock = threading.Lock()
+
+
+def get_key_locks(directory: str | None) -> KeyLocks:
+    """Shared [`KeyLocks`][hut_services.core.cache.KeyLocks] for a lock directory (e.g. of a backend)."""
+    with _key_locks_lock:
+        if directory not in _key_locks:
+            _key_locks[directory] = KeyLocks(directory)
+        return _key_locks[directory]
@@ -0,0 +1,121 @@
+import os
+import pickle
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+__all__ = ["MISSING", "MemoryTier"]
+
+default_entries = int(os.environ.get("HUT_SERVICE_MEMORY_CACHE_ENTRIES", 256))
+default_bytes = int(os.environ.get("HUT_SERVICE_MEMORY_CACHE_BYTES", 1024 * 1024 * 32))  # 32 MiB
+default_ttl = float(os.environ.get("HUT_SERVICE_MEMORY_CACHE_SECONDS", 60 * 10))  # 10 minutes
+
+MISSING: t.Any = object()
+"""Returned by [`MemoryTier.get()`][hut_services.core.cache.MemoryTier.get] if a key is not cached."""
+
+
+class MemoryTier:
+    """Bounded in-process LRU cache used in front of the disk cache.
+
+    Entries are evicted least recently used first as soon as either `max_entries`
+    or `max_bytes` is exceeded. The size of an entry is estimated by its pickled size.
+
+    Note:
+        Without `copies` cached objects are shared between callers and must not be mutated.
+
+    Args:
+        max_entries: Maximal number of entries.
+        max_bytes: Maximal (estimated) size of all entries in bytes.
+        ttl: Time to live of an entry in seconds.
+        copies: Keep the values pickled and return a new copy on every hit, callers may mutate them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = default_entries,
+        max_bytes: int = default_bytes,
+        ttl: float = default_ttl,
+        copies: bool = False,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.copies = copies
+        self._entries: OrderedDict[t.Hashable, tuple[float, int, t.Any]] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated size of all entries in bytes."""
+        return self._nbytes
+
+    def get(self, key: t.Hashable) -> t.Any:
+        """Get a cached value.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            Cached value or `MISSING` if the key is not cached or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires, size, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self._nbytes -= size
+                return MISSING
+            self._entries.move_to_end(key)
+        return pickle.loads(value) if self.copies else value  # noqa: S301 # pickled by `set()`
+
+    def set(self, key: t.Hashable, value: t.Any, size: int | None = None, ttl: float | None = None) -> None:
+        """Add a value, values bigger than `max_bytes` or which cannot be pickled are not cached.
+
+        Args:
+            key: Cache key.
+            value: Value to cache.
+            size: Size of the value in bytes, estimated if not set (the pickled size with `copies`).
+            ttl: Time to live in seconds, limited to the `ttl` of the tier.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        if size is None or self.copies:
+            try:
+                payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                return
+            size = len(payload)
+            value = payload if self.copies else value
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._nbytes += size
+            while len(self._entries) > self.max_entries or self._nbytes > self.max_bytes:
+                _, (_, old_size, _) = self._entries.popitem(last=False)
+                self._nbytes -= old_size
+
+    def delete(self, key: t.Hashable) -> None:
+        """Remove a key if cached."""
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _pop(self, key: t.Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._nbytes -= entry[1]
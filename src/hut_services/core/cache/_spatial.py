@@ -0,0 +1,161 @@
+import itertools
+import logging
+import math
+import typing as t
+from collections.abc import Callable
+
+from hut_services.core.schema.geo import BBox
+from hut_services.core.schema.geo.bbox import _bbox_2d
+
+from ._file_cache import AsyncCachedFunction, CachedFunction
+from ._memory import MISSING
+
+__all__ = ["SpatialCache"]
+
+logger = logging.getLogger(__name__)
+
+T = t.TypeVar("T")
+
+
+def _lon_lat(item: t.Any) -> tuple[float, float]:
+    return item.location.lon, item.location.lat
+
+
+def _source_id(item: t.Any) -> t.Hashable:
+    return t.cast(t.Hashable, item.source_id)
+
+
+class SpatialCache(t.Generic[T]):
+    """Answers boundary box queries from huts cached per tile of a fixed grid.
+
+    The huts of a fetched region are stored per tile (with the cached `tile_func`).
+    A later query which is covered by cached tiles is answered by filtering the huts on their location,
+    for partial overlaps only the missing tiles are fetched (adjacent tiles of a row with one request).
+
+    Examples:
+        ```python
+        @file_cache(ignore=["client"])
+        def _tile_huts(bbox: BBox, client: httpx.Client) -> list[MyHutSource]:
+            return fetch_huts(bbox, client)
+
+        spatial = SpatialCache(_tile_huts, tile_size=0.5)
+        huts = spatial.query(bbox, fetch=lambda b: fetch_huts(b, client), client=client)
+        ```
+
+    Args:
+        tile_func: Cached function returning all huts of one tile, called with the tile as `bbox` argument
+            and the keyword arguments of the query.
+        tile_size: Edge length of the tiles in degrees.
+        limit: Maximal number of huts returned by a fetch, a result with `limit` huts might be truncated
+            and is not cached.
+        point: Coordinates of a hut in the axis order of the boundary boxes, `(lon, lat)` if not set.
+        ident: Identifier of a hut, huts on tile borders are returned once (`source_id` if not set).
+    """
+
+    def __init__(
+        self,
+        tile_func: CachedFunction | AsyncCachedFunction,
+        tile_size: float = 0.5,
+        limit: int | None = None,
+        point: Callable[[T], tuple[float, float]] = _lon_lat,
+        ident: Callable[[T], t.Hashable] = _source_id,
+    ):
+        self.tile_func = tile_func.cached if isinstance(tile_func, AsyncCachedFunction) else tile_func
+        self.tile_size = tile_size
+        self.limit = limit
+        self.point = point
+        self.ident = ident
+
+    def _index(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.tile_size), math.floor(y / self.tile_size)
+
+    def _tile(self, i: int, j: int) -> BBox:
+        size = self.tile_size
+        return (round(i * size, 6), round(j * size, 6), round((i + 1) * size, 6), round((j + 1) * size, 6))
+
+    def tiles(self, bbox: BBox, inside: bool = False) -> list[tuple[int, int]]:
+        """Indices `(column, row)` of the tiles which overlap with a boundary box.
+
+        Args:
+            bbox: Boundary box.
+            inside: Only the tiles which are completely inside the boundary box.
+        """
+        x0, y0, x1, y1 = _bbox_2d(bbox)
+        size = self.tile_size
+        if inside:
+            columns = range(math.ceil(x0 / size), math.floor(x1 / size))
+            rows = range(math.ceil(y0 / size), math.floor(y1 / size))
+        else:
+            columns = range(math.floor(x0 / size), max(math.ceil(x1 / size), math.floor(x0 / size) + 1))
+            rows = range(math.floor(y0 / size), max(math.ceil(y1 / size), math.floor(y0 / size) + 1))
+        return [(i, j) for j in rows for i in columns]
+
+    def _split(self, items: t.Iterable[T], tiles: list[tuple[int, int]]) -> dict[tuple[int, int], list[T]]:
+        """Huts per tile (empty tiles included), huts outside of `tiles` are dropped."""
+        per_tile: dict[tuple[int, int], list[T]] = {tile: [] for tile in tiles}
+        for item in items:
+            tile = self._index(*self.point(item))
+            if tile in per_tile:
+                per_tile[tile].append(item)
+        return per_tile
+
+    def _complete(self, items: list[T]) -> bool:
+        if self.limit is not None and len(items) >= self.limit:
+            logger.warning(f"Result with {len(items)} huts might be truncated, it is not cached per tile.")
+            return False
+        return True
+
+    def populate(self, bbox: BBox, items: list[T], **kwargs: t.Any) -> int:
+        """Stores the huts of a complete fetch of a boundary box for the tiles which are completely inside of it.
+
+        Args:
+            bbox: Fetched boundary box.
+            items: All huts of the boundary box.
+            kwargs: Further arguments of `tile_func`.
+
+        Returns:
+            Number of stored tiles.
+        """
+        if not self._complete(items):
+            return 0
+        per_tile = self._split(items, self.tiles(bbox, inside=True))
+        for (i, j), tile_items in per_tile.items():
+            self.tile_func.put(tile_items, bbox=self._tile(i, j), **kwargs)
+        return len(per_tile)
+
+    def query(self, bbox: BBox, fetch: Callable[[BBox], list[T]], **kwargs: t.Any) -> list[T] | None:
+        """Huts within a boundary box, answered from the cached tiles.
+
+        Args:
+            bbox: Boundary box of the query.
+            fetch: Returns all huts of a boundary box, called for the missing tiles.
+            kwargs: Further arguments of `tile_func`.
+
+        Returns:
+            Huts within `bbox` ordered by tile, `None` if no tile is cached yet.
+        """
+        tiles = self.tiles(bbox)
+        cached = {tile: self.tile_func.peek(bbox=self._tile(*tile), **kwargs) for tile in tiles}
+        missing = [tile for tile, items in cached.items() if items is MISSING]
+        if len(missing) == len(tiles):
+            return None
+        if missing:
+            logger.info(f"fetch {len(missing)} of {len(tiles)} tiles, the others are cached")
+        for _, row in itertools.groupby(missing, key=lambda tile: tile[1]):
+            for _, run in itertools.groupby(enumerate(row), key=lambda n_tile: n_tile[1][0] - n_tile[0]):
+                strip = [tile for _, tile in run]
+                first, last = self._tile(*strip[0]), self._tile(*strip[-1])
+                items = fetch((first[0], first[1], last[2], last[3]))
+                per_tile = self._split(items, strip)
+                if self._complete(items):
+                    for tile, tile_items in per_tile.items():
+                        self.tile_func.put(tile_items, bbox=self._tile(*tile), **kwargs)
+                cached.update(per_tile)
+        x0, y0, x1, y1 = _bbox_2d(bbox)
+        result: dict[t.Hashable, T] = {}
+        for tile in tiles:
+            for item in cached[tile]:
+                x, y = self.point(item)
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    result.setdefault(self.ident(item), item)
+        return list(result.values())
@@ -0,0 +1,73 @@
+import threading
+
+from pydantic import BaseModel, PrivateAttr, computed_field
+
+__all__ = ["CacheStats"]
+
+
+class CacheStats(BaseModel):
+    """Statistics of a function cached with [`file_cache`][hut_services.core.cache.file_cache].
+
+    Attributes:
+        memory_hits: Calls served from the memory tier.
+        disk_hits: Calls served from the disk cache (fresh entries).
+        stale_hits: Calls served with an expired entry while it is refreshed.
+        misses: Calls without a usable entry, the function was called.
+        negative_hits: Calls which raised a remembered exception without calling the function.
+        coalesced: Calls which waited for the same call of another thread or process and used its result.
+        errors: Calls where the function raised an exception (not cached).
+        expirations: Expired entries found (stale or too old).
+        refreshes: Background refreshes (stale or refresh ahead).
+        bytes_read: Bytes read from the disk cache.
+        bytes_written: Bytes written to the disk cache.
+        key_seconds: Time spent computing cache keys.
+        load_seconds: Time spent loading entries from disk.
+        compute_seconds: Time spent in the wrapped function.
+    """
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    negative_hits: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    expirations: int = 0
+    refreshes: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    key_seconds: float = 0.0
+    load_seconds: float = 0.0
+    compute_seconds: float = 0.0
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hits(self) -> int:
+        """All calls served from the cache."""
+        return self.memory_hits + self.disk_hits + self.stale_hits + self.coalesced
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hit_ratio(self) -> float:
+        """Ratio of calls served from the cache."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def add(self, **counters: float) -> None:
+        """Thread safe increment of counters (e.g. `stats.add(misses=1, compute_seconds=0.2)`)."""
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def reset(self) -> None:
+        """Set all counters to zero."""
+        with self._lock:
+            for name, field in type(self).model_fields.items():
+                setattr(self, name, field.default)
+
+    def snapshot(self) -> "CacheStats":
+        """Consistent copy of the current counters."""
+        with self._lock:
+            return CacheStats(**self.model_dump(exclude={"hits", "hit_ratio"}))
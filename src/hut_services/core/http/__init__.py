@@ -0,0 +1,22 @@
+from ._client import HttpConfig, configure_http, get_async_http_client, get_http_client, get_rate_limiter
+from ._ratelimit import AsyncRateLimitTransport, RateLimit, RateLimiter, RateLimitTransport, TokenBucket
+from ._retry import AsyncRetryTransport, RetryPolicy, RetryTransport
+from ._transport import AsyncCachingTransport, CachingTransport
+
+__all__ = [
+    "AsyncCachingTransport",
+    "AsyncRateLimitTransport",
+    "AsyncRetryTransport",
+    "CachingTransport",
+    "HttpConfig",
+    "RateLimit",
+    "RateLimitTransport",
+    "RateLimiter",
+    "RetryPolicy",
+    "RetryTransport",
+    "TokenBucket",
+    "configure_http",
+    "get_async_http_client",
+    "get_http_client",
+    "get_rate_limiter",
+]
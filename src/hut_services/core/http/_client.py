@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from importlib.metadata import PackageNotFoundError, version
+
+import httpx
+from pydantic import BaseModel, Field
+
+from ._ratelimit import AsyncRateLimitTransport, RateLimit, RateLimiter, RateLimitTransport, default_rate_limits
+from ._retry import AsyncRetryTransport, RetryPolicy, RetryTransport
+from ._transport import AsyncCachingTransport, CachingTransport
+
+__all__ = ["HttpConfig", "configure_http", "get_async_http_client", "get_http_client", "get_rate_limiter"]
+
+logger = logging.getLogger(__name__)
+
+
+def _default_user_agent() -> str:
+    try:
+        return f"hut-services/{version('hut-services')} (+https://github.com/wodore/hut-services)"
+    except PackageNotFoundError:
+        return "hut-services (+https://github.com/wodore/hut-services)"
+
+
+class HttpConfig(BaseModel):
+    """Configuration of the HTTP client shared by all services.
+
+    The defaults can be set with environment variables (e.g. `HUT_SERVICE_HTTP_MAX_CONNECTIONS`).
+
+    Attributes:
+        max_connections: Maximal number of connections (all hosts).
+        max_keepalive_connections: Maximal number of idle connections kept open.
+        keepalive_expiry: Seconds an idle connection is kept open.
+        http2: Use HTTP/2 if the server supports it (requires `pip install httpx[http2]`).
+        timeout: Timeout in seconds for reading, writing and getting a connection from the pool.
+        connect_timeout: Timeout in seconds to establish a connection.
+        user_agent: `User-Agent` header, some APIs (e.g. Nominatim) require an identifying agent.
+        cache: Cache responses with a [`CachingTransport`][hut_services.core.http.CachingTransport].
+        rate_limits: Request rate per host or path (`HUT_SERVICE_HTTP_RATE_LIMITS`), shared by all clients
+            created with the same limiter, see [`RateLimiter`][hut_services.core.http.RateLimiter].
+        retry: Retries of failed requests, see [`RetryPolicy`][hut_services.core.http.RetryPolicy].
+    """
+
+    max_connections: int = int(os.environ.get("HUT_SERVICE_HTTP_MAX_CONNECTIONS", 20))
+    max_keepalive_connections: int = int(os.environ.get("HUT_SERVICE_HTTP_MAX_KEEPALIVE", 10))
+    keepalive_expiry: float = float(os.environ.get("HUT_SERVICE_HTTP_KEEPALIVE_SECONDS", 30))
+    http2: bool = os.environ.get("HUT_SERVICE_HTTP2", "false").lower() in ("1", "true", "yes")
+    timeout: float = float(os.environ.get("HUT_SERVICE_HTTP_TIMEOUT", 30))
+    connect_timeout: float = float(os.environ.get("HUT_SERVICE_HTTP_CONNECT_TIMEOUT", 10))
+    user_agent: str = os.environ.get("HUT_SERVICE_HTTP_USER_AGENT", _default_user_agent())
+    cache: bool = True
+    rate_limits: dict[str, RateLimit] = Field(default_factory=default_rate_limits)
+    retry: RetryPolicy = Field(default_factory=RetryPolicy)
+
+    def _limits(self) -> httpx.Limits:
+        if self.http2:
+            try:
+                import h2  # type: ignore[import-not-found] # noqa: F401
+            except ImportError as e:
+                err_msg = "HTTP/2 requires the 'h2' package, install it with 'pip install httpx[http2]'."
+                raise ImportError(err_msg) from e
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def create_client(self, limiter: RateLimiter | None = None) -> httpx.Client:
+        """New client with this configuration.
+
+        Args:
+            limiter: Rate limiter shared with other clients, a new one with `rate_limits` if not set.
+        """
+        limiter = limiter if limiter is not None else RateLimiter(self.rate_limits)
+        transport: httpx.BaseTransport = httpx.HTTPTransport(limits=self._limits(), http2=self.http2)
+        transport = RetryTransport(RateLimitTransport(transport, limiter), self.retry)
+        if self.cache:
+            transport = CachingTransport(transport)
+        return httpx.Client(
+            transport=transport,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            headers={"User-Agent": self.user_agent},
+        )
+
+    def create_async_client(self, limiter: RateLimiter | None = None) -> httpx.AsyncClient:
+        """New async client with this configuration.
+
+        Args:
+            limiter: Rate limiter shared with other clients, a new one with `rate_limits` if not set.
+        """
+        limiter = limiter if limiter is not None else RateLimiter(self.rate_limits)
+        transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(limits=self._limits(), http2=self.http2)
+        transport = AsyncRetryTransport(AsyncRateLimitTransport(transport, limiter), self.retry)
+        if self.cache:
+            transport = AsyncCachingTransport(transport)
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            headers={"User-Agent": self.user_agent},
+        )
+
+
+_config = HttpConfig()
+_limiter = RateLimiter(_config.rate_limits)  # shared by the sync and all async clients
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+# connections of an async client are bound to the event loop which opened them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def configure_http(config: HttpConfig | None = None, **options: object) -> HttpConfig:
+    """Changes the configuration of the shared HTTP client, the current client is closed.
+
+    Examples:
+        ```python
+        from hut_services.core.http import RateLimit, configure_http
+
+        configure_http(max_connections=50, http2=True, user_agent="my-app/1.0 (me@example.com)")
+        configure_http(rate_limits={"www.refuges.info/point/": RateLimit(rate=2, burst=4)})
+        ```
+
+    Args:
+        config: New configuration, the current configuration is used if not set.
+        options: Options to change (see [`HttpConfig`][hut_services.core.http.HttpConfig]).
+
+    Returns:
+        The new configuration.
+    """
+    global _config, _client, _limiter
+    with _client_lock:
+        _config = (config or _config).model_copy(update=options)
+        _limiter = RateLimiter(_config.rate_limits)
+        if _client is not None:
+            _client.close()
+            _client = None
+        _async_clients.clear()  # dropped, they can only be closed within their event loop
+        return _config
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Rate limiter of the shared clients, e.g. to throttle requests sent with other libraries."""
+    return _limiter
+
+
+def get_http_client() -> httpx.Client:
+    """HTTP client shared by all services (connection pool and response cache),
+    see [`configure_http()`][hut_services.core.http.configure_http]."""
+    global _client
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = _config.create_client(_limiter)
+        return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Async HTTP client shared by all services within the running event loop,
+    see [`configure_http()`][hut_services.core.http.configure_http].
+
+    Each event loop gets its own client (connection pool), the response cache is shared."""
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _async_clients[loop] = _config.create_async_client(_limiter)
+        return client
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import threading
+import time
+import typing as t
+
+import httpx
+from pydantic import BaseModel
+
+__all__ = ["AsyncRateLimitTransport", "RateLimit", "RateLimitTransport", "RateLimiter", "TokenBucket"]
+
+
+class RateLimit(BaseModel):
+    """Allowed request rate of a host (or of the paths of a host with a given prefix).
+
+    Attributes:
+        rate: Requests per second.
+        burst: Number of requests which can be sent at once after a pause.
+    """
+
+    rate: float
+    burst: int = 1
+
+
+def default_rate_limits() -> dict[str, RateLimit]:
+    """Default limits, changed with `HUT_SERVICE_HTTP_RATE_LIMITS`
+    (e.g. `www.refuges.info/point/=0.5:2,example.com=10`)."""
+    limits = {
+        "nominatim.openstreetmap.org": RateLimit(rate=1),  # usage policy: max. one request per second
+        "www.refuges.info/point/": RateLimit(rate=1 / 1.5),  # scraped photo pages, the api is not throttled
+    }
+    for item in os.environ.get("HUT_SERVICE_HTTP_RATE_LIMITS", "").split(","):
+        host, _, value = item.strip().partition("=")
+        if host and value:
+            rate, _, burst = value.partition(":")
+            limits[host] = RateLimit(rate=float(rate), burst=int(burst or 1))
+    return limits
+
+
+class TokenBucket:
+    """Token bucket which refills with `rate` tokens per second up to `burst` tokens.
+
+    Each request takes one token, if none is left the caller waits until it is refilled.
+    Tokens are reserved in order, concurrent callers (threads and tasks) are spaced
+    exactly `1 / rate` seconds apart.
+
+    Args:
+        rate: Tokens per second.
+        burst: Maximal number of tokens.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0 or burst < 1:
+            err_msg = f"Invalid rate limit: rate={rate}, burst={burst}."
+            raise ValueError(err_msg)
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token.
+
+        Returns:
+            Seconds to wait until the token may be used."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, 0)
+
+    def acquire(self) -> None:
+        """Waits for a token."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Waits for a token without blocking the event loop."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class RateLimiter:
+    """Token buckets per host, shared by threads and event loops.
+
+    A limit of `example.com` applies to its subdomains as well (e.g. `api.example.com`),
+    each host has its own bucket. A limit with a path (e.g. `example.com/photos/`) only applies
+    to the requests whose path starts with it and has a bucket of its own, the longest matching path wins.
+    Hosts and paths without a limit are not throttled.
+
+    Examples:
+        ```python
+        limiter = RateLimiter({"www.refuges.info/point/": RateLimit(rate=0.5, burst=2)})
+        limiter.acquire("www.refuges.info", "/point/123")
+        ```
+
+    Args:
+        limits: Limits with the host (and an optional path prefix) as key.
+    """
+
+    def __init__(self, limits: t.Mapping[str, RateLimit] | None = None):
+        self.limits = dict(limits or {})
+        self._buckets: dict[tuple[str, str | None], TokenBucket | None] = {}
+        self._lock = threading.Lock()
+
+    def set_limit(self, host: str, rate: float, burst: int = 1) -> None:
+        """Sets or changes the limit of a host."""
+        with self._lock:
+            self.limits[host] = RateLimit(rate=rate, burst=burst)
+            self._buckets.clear()
+
+    def bucket(self, host: str, path: str = "/") -> TokenBucket | None:
+        """Bucket of a host (and path), `None` if it is not limited."""
+        with self._lock:
+            key = (host, self._limit_key(host, path))
+            if key not in self._buckets:
+                limit = self.limits[key[1]] if key[1] is not None else None
+                self._buckets[key] = TokenBucket(limit.rate, limit.burst) if limit is not None else None
+            return self._buckets[key]
+
+    def _limit_key(self, host: str, path: str) -> str | None:
+        """Limit of the most specific host, a limit with the longest matching path before the host limit."""
+        for h in self._hosts(host):
+            paths = [k for k in self.limits if k.startswith(f"{h}/") and path.startswith(k[len(h) :])]
+            if paths:
+                return max(paths, key=len)
+            if h in self.limits:
+                return h
+        return None
+
+    @staticmethod
+    def _hosts(host: str) -> list[str]:
+        parts = host.split(".")
+        return [".".join(parts[i:]) for i in range(len(parts))]
+
+    def acquire(self, host: str, path: str = "/") -> None:
+        """Waits until a request to `host` (and `path`) is allowed."""
+        bucket = self.bucket(host, path)
+        if bucket is not None:
+            bucket.acquire()
+
+    async def acquire_async(self, host: str, path: str = "/") -> None:
+        """Waits until a request to `host` (and `path`) is allowed, without blocking the event loop."""
+        bucket = self.bucket(host, path)
+        if bucket is not None:
+            await bucket.acquire_async()
+
+
+class RateLimitTransport(httpx.BaseTransport):
+    """HTTP transport which waits for the [rate limit][hut_services.core.http.RateLimiter] of the host.
+
+    Placed below the [`CachingTransport`][hut_services.core.http.CachingTransport],
+    only requests sent to the network are throttled.
+
+    Args:
+        transport: Transport used for the requests.
+        limiter: Limits per host.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, limiter: RateLimiter):
+        self.transport = transport
+        self.limiter = limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.limiter.acquire(request.url.host, request.url.path)
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncRateLimitTransport(httpx.AsyncBaseTransport):
+    """Async version of [`RateLimitTransport`][hut_services.core.http.RateLimitTransport]."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter):
+        self.transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.limiter.acquire_async(request.url.host, request.url.path)
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
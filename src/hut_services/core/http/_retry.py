@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import random
+import time
+
+import httpx
+from pydantic import BaseModel
+
+from ._transport import _http_date
+
+__all__ = ["AsyncRetryTransport", "RetryPolicy", "RetryTransport"]
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy(BaseModel):
+    """When and how often failed requests are sent again.
+
+    Retries wait `backoff * 2 ** retry` seconds (at most `max_backoff`) with full jitter,
+    or as long as the server asks for with `Retry-After`.
+
+    Attributes:
+        attempts: Maximal number of attempts per request (`HUT_SERVICE_HTTP_RETRIES`), `1` disables retries.
+        backoff: Seconds to wait before the first retry.
+        max_backoff: Maximal seconds to wait between two attempts.
+        budget: Maximal seconds spent on one request including all retries and waits
+            (`HUT_SERVICE_HTTP_RETRY_BUDGET`), no retry is started after it is used up.
+        status_codes: Response status codes which are retried.
+        methods: Request methods which are retried (all upstream APIs are read only, Overpass queries use `POST`).
+        respect_retry_after: Wait as long as the `Retry-After` header asks for.
+    """
+
+    attempts: int = int(os.environ.get("HUT_SERVICE_HTTP_RETRIES", 4))
+    backoff: float = 0.5
+    max_backoff: float = 30
+    budget: float = float(os.environ.get("HUT_SERVICE_HTTP_RETRY_BUDGET", 120))
+    status_codes: frozenset[int] = frozenset({408, 425, 429, 500, 502, 503, 504})
+    methods: frozenset[str] = frozenset({"GET", "HEAD", "OPTIONS", "POST"})
+    respect_retry_after: bool = True
+
+    def delay(self, retry: int, response: httpx.Response | None = None) -> float:
+        """Seconds to wait before the retry (starting with `0`)."""
+        if response is not None and self.respect_retry_after:
+            retry_after = _retry_after(response)
+            if retry_after is not None:
+                return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**retry))  # noqa: S311 # jitter only
+
+    def retry(self, request: httpx.Request, retry: int, start: float, delay: float) -> bool:
+        """Whether the request is sent again after waiting `delay` seconds."""
+        return (
+            request.method in self.methods
+            and retry + 1 < self.attempts
+            and time.monotonic() - start + delay <= self.budget
+        )
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        date = _http_date(value)
+        return max(date - time.time(), 0) if date is not None else None
+
+
+class RetryTransport(httpx.BaseTransport):
+    """HTTP transport which sends failed requests again, see [`RetryPolicy`][hut_services.core.http.RetryPolicy].
+
+    Requests are retried on transport errors (e.g. timeouts or refused connections)
+    and on the status codes of the policy. The last response or error is returned after all attempts.
+
+    Args:
+        transport: Transport used for the requests.
+        policy: Retry policy, the default policy if not set.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, policy: RetryPolicy | None = None):
+        self.transport = transport
+        self.policy = policy if policy is not None else RetryPolicy()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        retry = 0
+        while True:
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                delay = self.policy.delay(retry)
+                if not self.policy.retry(request, retry, start, delay):
+                    raise
+                logger.info(f"Request to '{request.url}' failed ({e!r}), retry in {delay:.1f}s.")
+            else:
+                if response.status_code not in self.policy.status_codes:
+                    return response
+                delay = self.policy.delay(retry, response)
+                if not self.policy.retry(request, retry, start, delay):
+                    return response
+                response.close()
+                logger.info(f"Request to '{request.url}' failed ({response.status_code}), retry in {delay:.1f}s.")
+            time.sleep(delay)
+            retry += 1
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Async version of [`RetryTransport`][hut_services.core.http.RetryTransport]."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: RetryPolicy | None = None):
+        self.transport = transport
+        self.policy = policy if policy is not None else RetryPolicy()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        retry = 0
+        while True:
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                delay = self.policy.delay(retry)
+                if not self.policy.retry(request, retry, start, delay):
+                    raise
+                logger.info(f"Request to '{request.url}' failed ({e!r}), retry in {delay:.1f}s.")
+            else:
+                if response.status_code not in self.policy.status_codes:
+                    return response
+                delay = self.policy.delay(retry, response)
+                if not self.policy.retry(request, retry, start, delay):
+                    return response
+                await response.aclose()
+                logger.info(f"Request to '{request.url}' failed ({response.status_code}), retry in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+            retry += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
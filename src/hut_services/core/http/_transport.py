@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import logging
+import os
+import pickle
+import time
+import typing as t
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from hut_services.core.cache import CacheBackend, CacheEntry, get_cache_backend
+
+__all__ = ["AsyncCachingTransport", "CachingTransport"]
+
+logger = logging.getLogger(__name__)
+
+default_ttl = float(os.environ.get("HUT_SERVICE_HTTP_TTL_SECONDS", 0))
+default_keep_seconds = float(os.environ.get("HUT_SERVICE_HTTP_KEEP_SECONDS", 3600 * 24 * 30))  # 30 days
+cacheable_status_codes = {200, 203, 300, 301, 308, 404, 410}
+
+
+def _cache_control(headers: httpx.Headers) -> dict[str, str | None]:
+    """Parses the `Cache-Control` header into a dictionary (directives without value are `None`)."""
+    directives: dict[str, str | None] = {}
+    for directive in headers.get("cache-control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') if value else None
+    return directives
+
+
+def _http_date(value: str | None) -> float | None:
+    """Parses a HTTP date into a unix timestamp, `None` if invalid."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _freshness(headers: httpx.Headers, default: float) -> float | None:
+    """Seconds a response is fresh, `None` if it must not be stored."""
+    directives = _cache_control(headers)
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    if directives.get("max-age") is not None:
+        try:
+            return max(float(directives["max-age"]), 0)  # type: ignore[arg-type]
+        except ValueError:
+            return 0
+    expires = _http_date(headers.get("expires"))
+    if expires is not None:
+        date = _http_date(headers.get("date")) or time.time()
+        return max(expires - date, 0)
+    return default
+
+
+class _CachedResponse(t.NamedTuple):
+    status_code: int
+    headers: list[tuple[bytes, bytes]]
+    content: bytes
+    vary: dict[str, str | None]
+    fresh_seconds: float
+
+
+class _HttpCache:
+    """Caching logic shared by the sync and async transport, only the requests differ."""
+
+    def __init__(self, backend: CacheBackend | None, ttl: float, keep_seconds: float):
+        self._backend = backend
+        self.ttl = ttl
+        self.keep_seconds = keep_seconds
+
+    @property
+    def backend(self) -> CacheBackend:
+        """Backend of this transport, the global backend if not set explicitly."""
+        return self._backend if self._backend is not None else get_cache_backend()
+
+    @staticmethod
+    def _bypass(request: httpx.Request) -> bool:
+        return request.method != "GET" or "no-store" in _cache_control(request.headers)
+
+    @staticmethod
+    def _key(request: httpx.Request) -> tuple[str, str]:
+        namespace = f"http/{request.url.host}"
+        return namespace, hashlib.sha256(str(request.url).encode()).hexdigest()
+
+    def _lookup(self, request: httpx.Request) -> tuple[_CachedResponse | None, httpx.Response | None]:
+        """Cached response and the response to return if it is still fresh,
+        adds the validators to the request otherwise."""
+        cached, created = self._load(*self._key(request), request)
+        if cached is None:
+            return None, None
+        age = time.time() - created
+        if age < cached.fresh_seconds and "no-cache" not in _cache_control(request.headers):
+            return cached, self._response(request, cached, "hit")
+        headers = httpx.Headers(cached.headers)
+        if "etag" in headers:
+            request.headers["If-None-Match"] = headers["etag"]
+        if "last-modified" in headers:
+            request.headers["If-Modified-Since"] = headers["last-modified"]
+        return cached, None
+
+    def _revalidated(self, request: httpx.Request, response: httpx.Response, cached: _CachedResponse) -> httpx.Response:
+        """Updates the cached response with the headers of a `304 Not Modified` response."""
+        headers = httpx.Headers(cached.headers)
+        for name, value in response.headers.items():
+            if name not in ("content-length", "content-encoding", "transfer-encoding"):
+                headers[name] = value
+        fresh_seconds = _freshness(headers, self.ttl)
+        cached = cached._replace(headers=headers.raw, fresh_seconds=fresh_seconds or 0)
+        self._store(*self._key(request), cached)
+        return self._response(request, cached, "revalidated")
+
+    def _storable(self, response: httpx.Response) -> float | None:
+        """Seconds the response is fresh, `None` if it is not stored (marked as `miss`)."""
+        fresh_seconds = _freshness(response.headers, self.ttl)
+        revalidatable = "etag" in response.headers or "last-modified" in response.headers
+        if (
+            response.status_code not in cacheable_status_codes
+            or fresh_seconds is None
+            or (fresh_seconds <= 0 and not revalidatable)  # could never be used
+            or "*" in response.headers.get("vary", "")
+        ):
+            response.extensions = {**response.extensions, "hut_cache": "miss"}
+            return None
+        return fresh_seconds
+
+    def _stored(
+        self, request: httpx.Request, response: httpx.Response, content: bytes, fresh_seconds: float
+    ) -> httpx.Response:
+        vary = [v.strip().lower() for v in response.headers.get("vary", "").split(",") if v.strip()]
+        cached = _CachedResponse(
+            status_code=response.status_code,
+            headers=response.headers.raw,
+            content=content,
+            vary={name: request.headers.get(name) for name in vary},
+            fresh_seconds=fresh_seconds,
+        )
+        self._store(*self._key(request), cached)
+        return self._response(request, cached, "miss")
+
+    def _load(self, namespace: str, key: str, request: httpx.Request) -> tuple[_CachedResponse | None, float]:
+        entry = self.backend.get(namespace, key)
+        if entry is None:
+            return None, 0
+        try:
+            cached = _CachedResponse(*pickle.loads(entry.payload))  # noqa: S301 # local cache data
+        except Exception as e:
+            logger.debug(f"Could not load cached response for '{request.url}': {e}")
+            return None, 0
+        if any(request.headers.get(name) != value for name, value in cached.vary.items()):
+            return None, 0
+        return cached, entry.created
+
+    def _store(self, namespace: str, key: str, cached: _CachedResponse) -> None:
+        now = time.time()
+        payload = pickle.dumps(tuple(cached), protocol=pickle.HIGHEST_PROTOCOL)
+        expires = now + max(cached.fresh_seconds, self.keep_seconds)
+        try:
+            self.backend.set(namespace, key, CacheEntry(payload, created=now, expires=expires))
+        except Exception as e:
+            logger.warning(f"Could not store response in the cache: {e}")
+
+    @staticmethod
+    def _response(request: httpx.Request, cached: _CachedResponse, status: str) -> httpx.Response:
+        return httpx.Response(
+            cached.status_code,
+            headers=cached.headers,
+            stream=httpx.ByteStream(cached.content),
+            request=request,
+            extensions={"hut_cache": status},
+        )
+
+
+class CachingTransport(_HttpCache, httpx.BaseTransport):
+    """HTTP transport which caches responses in a [cache backend][hut_services.core.cache.CacheBackend].
+
+    Responses are stored with their validators (`ETag` and `Last-Modified`).
+    As long as a response is fresh (`Cache-Control: max-age`, `Expires` or `ttl`)
+    it is returned without a request, afterwards it is revalidated with a conditional
+    request (`If-None-Match`, `If-Modified-Since`) and only downloaded again if it changed.
+    Responses with `Cache-Control: no-store` are not stored, requests with
+    `Cache-Control: no-cache` are always revalidated.
+
+    How the response was served is set as `response.extensions["hut_cache"]`:
+    `hit`, `revalidated` or `miss`.
+
+    Examples:
+        ```python
+        client = httpx.Client(transport=CachingTransport())
+        response = client.get("https://www.refuges.info/api/massif", params={"massif": "12"})
+        print(response.extensions["hut_cache"])
+        ```
+
+    Args:
+        transport: Transport used for the requests, defaults to `httpx.HTTPTransport()`.
+        backend: Cache backend, the global backend if not set.
+        ttl: Seconds a response without caching headers is fresh (`HUT_SERVICE_HTTP_TTL_SECONDS`),
+            `0` revalidates it with every request.
+        keep_seconds: Seconds a response is kept for revalidation (`HUT_SERVICE_HTTP_KEEP_SECONDS`).
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport | None = None,
+        backend: CacheBackend | None = None,
+        ttl: float = default_ttl,
+        keep_seconds: float = default_keep_seconds,
+    ):
+        super().__init__(backend=backend, ttl=ttl, keep_seconds=keep_seconds)
+        self.transport = transport if transport is not None else httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self._bypass(request):
+            return self.transport.handle_request(request)
+        cached, hit = self._lookup(request)
+        if hit is not None:
+            return hit
+        response = self.transport.handle_request(request)
+        if cached is not None and response.status_code == 304:
+            response.close()
+            return self._revalidated(request, response, cached)
+        fresh_seconds = self._storable(response)
+        if fresh_seconds is None:
+            return response
+        try:
+            content = b"".join(t.cast(t.Iterable[bytes], response.stream))  # still encoded (e.g. gzip)
+        finally:
+            response.close()
+        return self._stored(request, response, content, fresh_seconds)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncCachingTransport(_HttpCache, httpx.AsyncBaseTransport):
+    """Async version of [`CachingTransport`][hut_services.core.http.CachingTransport] sharing the same cache.
+
+    The cache backend is accessed in a worker thread, the event loop is not blocked by disk access.
+
+    Args:
+        transport: Transport used for the requests, defaults to `httpx.AsyncHTTPTransport()`.
+        backend: Cache backend, the global backend if not set.
+        ttl: Seconds a response without caching headers is fresh (`HUT_SERVICE_HTTP_TTL_SECONDS`).
+        keep_seconds: Seconds a response is kept for revalidation (`HUT_SERVICE_HTTP_KEEP_SECONDS`).
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport | None = None,
+        backend: CacheBackend | None = None,
+        ttl: float = default_ttl,
+        keep_seconds: float = default_keep_seconds,
+    ):
+        super().__init__(backend=backend, ttl=ttl, keep_seconds=keep_seconds)
+        self.transport = transport if transport is not None else httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._bypass(request):
+            return await self.transport.handle_async_request(request)
+        cached, hit = await asyncio.to_thread(self._lookup, request)
+        if hit is not None:
+            return hit
+        response = await self.transport.handle_async_request(request)
+        if cached is not None and response.status_code == 304:
+            await response.aclose()
+            return await asyncio.to_thread(self._revalidated, request, response, cached)
+        fresh_seconds = self._storable(response)
+        if fresh_seconds is None:
+            return response
+        try:
+            content = b"".join([chunk async for chunk in t.cast(t.AsyncIterable[bytes], response.stream)])
+        finally:
+            await response.aclose()
+        return await asyncio.to_thread(self._stored, request, response, content, fresh_seconds)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -1,3 +1,4 @@
+from .bbox import bbox_grid, bbox_intersects, bbox_split
 from .geo import BBox, LocationEleSchema, LocationSchema
 
-__all__ = ["BBox", "LocationEleSchema", "LocationSchema"]
+__all__ = ["BBox", "LocationEleSchema", "LocationSchema", "bbox_grid", "bbox_intersects", "bbox_split"]
@@ -6,3 +6,59 @@
 # CH: BBox = (_ch_lon[0], _ch_lat[0], _ch_lon[1], _ch_lat[1])
 
 # https://gist.github.com/graydon/11198540
+
+import itertools
+import math
+
+from geojson_pydantic.types import BBox
+
+
+def _bbox_2d(bbox: BBox) -> tuple[float, float, float, float]:
+    """Drops the elevation of a 3D boundary box."""
+    if len(bbox) == 6:
+        return bbox[0], bbox[1], bbox[3], bbox[4]
+    return bbox[0], bbox[1], bbox[2], bbox[3]
+
+
+def bbox_intersects(bbox: BBox, other: BBox) -> bool:
+    """Checks if two boundary boxes `(min_x, min_y, max_x, max_y)` overlap (touching counts as overlap).
+
+    Only the first two dimensions are compared for 3D boundary boxes.
+
+    Args:
+        bbox: Boundary box.
+        other: Other boundary box.
+
+    Returns:
+        `True` if the boxes overlap."""
+    ax0, ay0, ax1, ay1 = _bbox_2d(bbox)
+    bx0, by0, bx1, by1 = _bbox_2d(other)
+    return ax0 <= bx1 and bx0 <= ax1 and ay0 <= by1 and by0 <= ay1
+
+
+def bbox_split(bbox: BBox) -> list[BBox]:
+    """Splits a boundary box into its four quadrants (only the first two dimensions are used).
+
+    Args:
+        bbox: Boundary box.
+
+    Returns:
+        Quadrants `(south west, south east, north west, north east)`."""
+    x0, y0, x1, y1 = _bbox_2d(bbox)
+    xm, ym = (x0 + x1) / 2, (y0 + y1) / 2
+    return [(x0, y0, xm, ym), (xm, y0, x1, ym), (x0, ym, xm, y1), (xm, ym, x1, y1)]
+
+
+def bbox_grid(bbox: BBox, size: float) -> list[BBox]:
+    """Covers a boundary box with tiles of `size` (the tiles at the north and east edges are smaller).
+
+    Args:
+        bbox: Boundary box.
+        size: Edge length of a tile (e.g. in degrees).
+
+    Returns:
+        Tiles from south west to north east."""
+    x0, y0, x1, y1 = _bbox_2d(bbox)
+    xs = [x0 + i * size for i in range(max(math.ceil((x1 - x0) / size), 1))] + [x1]
+    ys = [y0 + i * size for i in range(max(math.ceil((y1 - y0) / size), 1))] + [y1]
+    return [(xa, ya, xb, yb) for ya, yb in itertools.pairwise(ys) for xa, xb in itertools.pairwise(xs)]
@@ -1,3 +1,4 @@
+from ._pagination import HutPage
 from ._service_base import BaseService
 
-__all__ = ["BaseService"]
+__all__ = ["BaseService", "HutPage"]
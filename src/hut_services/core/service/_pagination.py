@@ -0,0 +1,111 @@
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+import typing as t
+import uuid
+
+from pydantic import BaseModel, Field
+
+from hut_services.core.cache import MISSING, CacheEntry, MemoryTier, canonical, get_cache_backend
+
+__all__ = ["HutPage", "HutSnapshot"]
+
+logger = logging.getLogger(__name__)
+
+snapshot_seconds = float(os.environ.get("HUT_SERVICE_SNAPSHOT_SECONDS", 60 * 60))  # 1 hour
+snapshot_bytes = int(os.environ.get("HUT_SERVICE_SNAPSHOT_BYTES", 1024 * 1024 * 256))  # 256 MiB
+
+THut = t.TypeVar("THut")
+
+
+class HutSnapshot(t.Generic[THut]):
+    """All huts of a request in a stable order, pages are sliced from it.
+
+    Args:
+        huts: Ordered huts.
+        version: Identifies this snapshot, a new snapshot of the same request gets a new version.
+    """
+
+    def __init__(self, huts: list[THut], version: str | None = None):
+        self.huts = huts
+        self.version = version if version is not None else uuid.uuid4().hex[:12]
+
+
+class HutPage(BaseModel, t.Generic[THut]):
+    """One page of huts from a snapshot.
+
+    Attributes:
+        huts: Huts of this page.
+        offset: Position of the first hut in the snapshot.
+        total: Number of huts in the snapshot.
+        next_cursor: Cursor of the next page, `None` on the last page.
+    """
+
+    huts: list[THut] = Field(..., description="Huts of this page.")
+    offset: int = Field(..., description="Position of the first hut in the snapshot.")
+    total: int = Field(..., description="Number of huts in the snapshot.")
+    next_cursor: str | None = Field(None, description="Cursor of the next page, `None` on the last page.")
+
+
+# snapshots of all services, evicted least recently used first or after `snapshot_seconds`
+snapshots = MemoryTier(max_entries=64, max_bytes=snapshot_bytes, ttl=snapshot_seconds)
+snapshot_namespace = "snapshots"  # shared with other processes through the cache backend
+
+
+def store_snapshot(key: str, snapshot: HutSnapshot[t.Any]) -> None:
+    """Keeps a snapshot in memory and in the cache backend for `snapshot_seconds`."""
+    payload = pickle.dumps((snapshot.version, snapshot.huts), protocol=pickle.HIGHEST_PROTOCOL)
+    snapshots.set(key, snapshot, size=len(payload))
+    now = time.time()
+    try:
+        get_cache_backend().set(
+            snapshot_namespace, key, CacheEntry(payload, created=now, expires=now + snapshot_seconds)
+        )
+    except Exception as e:
+        logger.warning(f"Could not store snapshot in the cache: {e}")
+
+
+def load_snapshot(key: str, version: str | None = None) -> HutSnapshot[t.Any] | t.Any:
+    """Snapshot of a key (with `version` if set), from memory or from the cache backend
+    (e.g. written by another process), `MISSING` if it is not available."""
+    snapshot = snapshots.get(key)
+    if snapshot is not MISSING and (version is None or snapshot.version == version):
+        return snapshot
+    entry = get_cache_backend().get(snapshot_namespace, key)
+    if entry is None or entry.expires <= time.time():
+        return MISSING
+    try:
+        stored_version, huts = pickle.loads(entry.payload)  # noqa: S301 # local cache data
+    except Exception as e:
+        logger.debug(f"Could not load snapshot '{key}': {e}")
+        return MISSING
+    if version is not None and stored_version != version:
+        return MISSING
+    snapshot = HutSnapshot(huts, stored_version)
+    snapshots.set(key, snapshot, size=len(entry.payload), ttl=entry.expires - time.time())
+    return snapshot
+
+
+def snapshot_key(scope: t.Hashable, bbox: t.Any, kwargs: dict[str, t.Any]) -> str:
+    """Short digest of a request, the same for semantically equal requests."""
+    return hashlib.sha1(repr(canonical((scope, bbox, kwargs))).encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def encode_cursor(key: str, version: str, offset: int) -> str:
+    data = json.dumps([key, version, offset], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str, int]:
+    """Snapshot key, version and offset of a cursor, raises `ValueError` for invalid cursors."""
+    try:
+        key, version, offset = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(key), str(version), int(offset)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        err_msg = f"Invalid cursor '{cursor}'."
+        raise ValueError(err_msg) from e
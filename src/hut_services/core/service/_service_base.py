@@ -1,9 +1,22 @@
+import asyncio
+import collections
+import contextlib
+import copy
 import datetime
+import logging
 import typing as t
 
+import httpx
+
 from hut_services import HutSourceSchema, clear_file_cache
+from hut_services.core.cache import MISSING, invalidate_cache
+from hut_services.core.http import get_async_http_client, get_http_client
 from hut_services.core.schema import HutBookingsSchema, HutSchema
-from hut_services.core.schema.geo import BBox
+from hut_services.core.schema.geo import BBox, bbox_intersects
+
+from ._pagination import HutPage, HutSnapshot, decode_cursor, encode_cursor, load_snapshot, snapshot_key, store_snapshot
+
+logger = logging.getLogger(__name__)
 
 THutSourceSchema = t.TypeVar("THutSourceSchema", bound=HutSourceSchema, covariant=True)
 
@@ -22,6 +35,17 @@ class BaseService(t.Generic[THutSourceSchema]):
         support_limit: Support for `limit` as parameter.
         support_offset: Support for `offset` as parameter.
         support_convert: Support for `convert` as parameter.
+        cache_namespace: Namespace of the cached functions used by this service,
+            defaults to the package of the service (e.g. `hut_services.osm`).
+        convert_concurrency: Maximal number of huts converted at the same time by `get_huts_async()`.
+        snapshot_limit: Maximal number of huts of a snapshot used by `get_huts_page()`.
+        bbox_lat_first: The `bbox` of this service is in the Overpass axis order `(south, west, north, east)`
+            instead of `(west, south, east, north)`.
+        http_client: HTTP client of the service (connection pool), the shared client if not set.
+        async_http_client: Async HTTP client of the service, the shared client of the event loop if not set.
+
+    Each method has an async counterpart (e.g. `get_huts_async()`). Services implement them natively
+    with the async HTTP client, by default the sync method is run in a worker thread.
 
     Examples:
         Custom service base in `BaseService`.
@@ -59,6 +83,10 @@ class BaseService(t.Generic[THutSourceSchema]):
     support_offset: bool = False
     support_convert: bool = False
     support_booking: bool = False
+    cache_namespace: t.ClassVar[str | None] = None
+    convert_concurrency: t.ClassVar[int] = 8
+    snapshot_limit: t.ClassVar[int] = 10000
+    bbox_lat_first: t.ClassVar[bool] = False
 
     def __init__(
         self,
@@ -67,18 +95,64 @@ class BaseService(t.Generic[THutSourceSchema]):
         support_offset: bool = False,
         support_convert: bool = False,
         support_booking: bool = False,
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
     ) -> None:
         self.support_bbox = support_bbox
         self.support_limit = support_limit
         self.support_offset = support_offset
         self.support_convert = support_convert
         self.support_booking = support_booking
+        self._http_client = http_client
+        self._async_http_client = async_http_client
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """HTTP client used by the service, the shared client
+        (see [`configure_http()`][hut_services.core.http.configure_http]) if not set."""
+        return self._http_client if self._http_client is not None else get_http_client()
+
+    @property
+    def async_http_client(self) -> httpx.AsyncClient:
+        """Async HTTP client used by the service, the shared client of the running event loop if not set."""
+        return self._async_http_client if self._async_http_client is not None else get_async_http_client()
 
     @classmethod
     def clear_all_cache(cls) -> None:
         """Clears the cache of all services!"""
         clear_file_cache()
 
+    @classmethod
+    def get_cache_namespace(cls) -> str:
+        """Namespace of the cached functions of this service."""
+        if cls.cache_namespace is not None:
+            return cls.cache_namespace
+        package = cls.__module__.rpartition(".")[0]
+        return package if package else cls.__module__
+
+    @classmethod
+    def clear_cache(cls, bbox: BBox | None = None, where: t.Callable[[dict[str, t.Any]], bool] | None = None) -> int:
+        """Clears the cache of this service only (other services are not affected).
+
+        Args:
+            bbox: Only remove entries of requests with a `bbox` argument which
+                overlaps with this boundary box (or with no boundary box).
+            where: Only remove entries whose arguments match, see
+                [`invalidate_cache()`][hut_services.core.cache.invalidate_cache].
+
+        Returns:
+            Number of removed entries.
+        """
+        if bbox is None:
+            return invalidate_cache(cls.get_cache_namespace(), where=where)
+
+        def in_bbox(args: dict[str, t.Any]) -> bool:
+            if "bbox" not in args or (args["bbox"] is not None and not bbox_intersects(args["bbox"], bbox)):
+                return False
+            return where is None or where(args)
+
+        return invalidate_cache(cls.get_cache_namespace(), where=in_bbox)
+
     def get_huts_from_source(
         self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
     ) -> list[THutSourceSchema]:
@@ -88,12 +162,57 @@ class BaseService(t.Generic[THutSourceSchema]):
             bbox: Boundary box.
             limit: Limit (how many entries to retrieve).
             offset: Offset of the request.
+            kwargs: Service specific arguments, e.g. `lean=True` to fetch only the minimal source data
+                (see [`get_hut_from_source()`][hut_services.BaseService.get_hut_from_source]).
 
         Returns:
             Huts from source.
         """
         raise self.MethodNotImplementedError(self, "get_huts_from_source")
 
+    async def get_huts_from_source_async(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
+    ) -> list[THutSourceSchema]:
+        """Async version of [`get_huts_from_source()`][hut_services.BaseService.get_huts_from_source]."""
+        return await asyncio.to_thread(self.get_huts_from_source, bbox=bbox, limit=limit, offset=offset, **kwargs)
+
+    def iter_huts_from_source(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
+    ) -> t.Iterator[THutSourceSchema]:
+        """Streaming version of [`get_huts_from_source()`][hut_services.BaseService.get_huts_from_source].
+
+        Services yield each hut as soon as it is parsed (without building the list), by default the huts
+        of `get_huts_from_source()` are yielded. Cached huts are served from the caches, how a stream itself
+        is cached depends on the service. Errors are raised, also after the first huts were yielded, a
+        stream is never silently cut short.
+
+        Yields:
+            Huts from source.
+        """
+        yield from self.get_huts_from_source(bbox=bbox, limit=limit, offset=offset, **kwargs)
+
+    async def aiter_huts_from_source(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
+    ) -> t.AsyncIterator[THutSourceSchema]:
+        """Async version of [`iter_huts_from_source()`][hut_services.BaseService.iter_huts_from_source]."""
+        for hut in await self.get_huts_from_source_async(bbox=bbox, limit=limit, offset=offset, **kwargs):
+            yield hut
+
+    def get_hut_from_source(self, src: t.Mapping | t.Any) -> THutSourceSchema:
+        """Get the full source record of one hut, e.g. of a hut fetched with `lean=True`.
+
+        Args:
+            src: Source schema of the hut.
+
+        Returns:
+            Hut from source with all source data.
+        """
+        raise self.MethodNotImplementedError(self, "get_hut_from_source")
+
+    async def get_hut_from_source_async(self, src: t.Mapping | t.Any) -> THutSourceSchema:
+        """Async version of [`get_hut_from_source()`][hut_services.BaseService.get_hut_from_source]."""
+        return await asyncio.to_thread(self.get_hut_from_source, src)
+
     def convert(self, src: t.Mapping | t.Any, include_photos: bool = True) -> HutSchema:
         """Convert one hut from source to [`HutSchema`][hut_services.HutSchema].
 
@@ -108,6 +227,10 @@ class BaseService(t.Generic[THutSourceSchema]):
         # hut_src = OsmHutSource(**src) if isinstance(src, t.Mapping) else OsmHutSource.model_validate(src)
         raise self.MethodNotImplementedError(self, "convert")
 
+    async def convert_async(self, src: t.Mapping | t.Any, include_photos: bool = True) -> HutSchema:
+        """Async version of [`convert()`][hut_services.BaseService.convert]."""
+        return await asyncio.to_thread(self.convert, src, include_photos=include_photos)
+
     def get_huts(
         self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, include_photos: bool = True, **kwargs: t.Any
     ) -> list[HutSchema]:
@@ -122,6 +245,150 @@ class BaseService(t.Generic[THutSourceSchema]):
         huts = [self.convert(h, include_photos=include_photos) for h in src_huts]
         return huts
 
+    async def get_huts_async(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, include_photos: bool = True, **kwargs: t.Any
+    ) -> list[HutSchema]:
+        """Async version of [`get_huts()`][hut_services.BaseService.get_huts], the huts are converted concurrently.
+
+        Returns:
+            Converted huts from source."""
+        src_huts = await self.get_huts_from_source_async(bbox=bbox, limit=limit, offset=offset, **kwargs)
+        semaphore = asyncio.Semaphore(self.convert_concurrency)
+
+        async def convert(src: t.Any) -> HutSchema:
+            async with semaphore:
+                return await self.convert_async(src, include_photos=include_photos)
+
+        return list(await asyncio.gather(*[convert(h) for h in src_huts]))
+
+    def iter_huts(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, include_photos: bool = True, **kwargs: t.Any
+    ) -> t.Iterator[HutSchema]:
+        """Streaming version of [`get_huts()`][hut_services.BaseService.get_huts], each hut is yielded
+        as soon as it is converted (huts from [`iter_huts_from_source()`][hut_services.BaseService.iter_huts_from_source]).
+
+        Yields:
+            Converted huts from source."""
+        for src in self.iter_huts_from_source(bbox=bbox, limit=limit, offset=offset, **kwargs):
+            yield self.convert(src, include_photos=include_photos)
+
+    async def aiter_huts(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, include_photos: bool = True, **kwargs: t.Any
+    ) -> t.AsyncIterator[HutSchema]:
+        """Async version of [`iter_huts()`][hut_services.BaseService.iter_huts], up to `convert_concurrency`
+        huts are converted at the same time and yielded in order.
+
+        Yields:
+            Converted huts from source."""
+        pending: collections.deque[asyncio.Task[HutSchema]] = collections.deque()
+        src_huts = t.cast(
+            t.AsyncGenerator[t.Any, None],
+            self.aiter_huts_from_source(bbox=bbox, limit=limit, offset=offset, **kwargs),
+        )
+        try:
+            async with contextlib.aclosing(src_huts):
+                async for src in src_huts:
+                    if len(pending) >= self.convert_concurrency:
+                        yield await pending.popleft()
+                    pending.append(asyncio.ensure_future(self.convert_async(src, include_photos=include_photos)))
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:  # stopped early or failed
+                task.cancel()
+
+    def get_huts_page(
+        self,
+        bbox: BBox | None = None,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: str | None = None,
+        refresh: bool = False,
+        **kwargs: t.Any,
+    ) -> HutPage[THutSourceSchema]:
+        """Get one page of huts from a snapshot of the request.
+
+        The first page fetches all huts of the request at once (up to `snapshot_limit` with
+        [`get_huts_from_source()`][hut_services.BaseService.get_huts_from_source]) into a snapshot
+        ordered by `source_id`. The following pages are sliced from this snapshot without further requests,
+        they do not overlap even if the source changes in the meantime. Snapshots are kept for one hour
+        (`HUT_SERVICE_SNAPSHOT_SECONDS`) in memory and in the cache backend, cursors work in all processes
+        sharing the backend. A failed fetch is raised and an empty one is not kept, neither replaces a snapshot.
+
+        Args:
+            bbox: Boundary box.
+            limit: Number of huts of the page.
+            offset: Position of the first hut in the snapshot.
+            cursor: `next_cursor` of the previous page, `bbox`, `offset` and `kwargs` are taken from it.
+            refresh: Replace the snapshot with a new one (ignored with `cursor`).
+            kwargs: Further arguments of `get_huts_from_source()`.
+
+        Returns:
+            Huts of the page and the cursor of the next page.
+
+        Raises:
+            BaseService.SnapshotExpiredError: The snapshot of the cursor is not available anymore.
+        """
+        if cursor is not None:
+            key, snapshot, offset = self._cursor_snapshot(cursor)
+            return self._page(key, snapshot, offset, limit)
+        key = snapshot_key(self._snapshot_scope(), bbox, kwargs)
+        snapshot = MISSING if refresh else load_snapshot(key)
+        if snapshot is MISSING:
+            src_huts = self.get_huts_from_source(bbox=bbox, limit=self.snapshot_limit, offset=0, **kwargs)
+            snapshot = self._new_snapshot(key, src_huts)
+        return self._page(key, snapshot, offset, limit)
+
+    async def get_huts_page_async(
+        self,
+        bbox: BBox | None = None,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: str | None = None,
+        refresh: bool = False,
+        **kwargs: t.Any,
+    ) -> HutPage[THutSourceSchema]:
+        """Async version of [`get_huts_page()`][hut_services.BaseService.get_huts_page]."""
+        if cursor is not None:
+            key, snapshot, offset = await asyncio.to_thread(self._cursor_snapshot, cursor)
+            return self._page(key, snapshot, offset, limit)
+        key = snapshot_key(self._snapshot_scope(), bbox, kwargs)
+        snapshot = MISSING if refresh else await asyncio.to_thread(load_snapshot, key)
+        if snapshot is MISSING:
+            src_huts = await self.get_huts_from_source_async(bbox=bbox, limit=self.snapshot_limit, offset=0, **kwargs)
+            snapshot = await asyncio.to_thread(self._new_snapshot, key, src_huts)
+        return self._page(key, snapshot, offset, limit)
+
+    def _snapshot_scope(self) -> t.Hashable:
+        """Snapshots are shared by services of the same class and url."""
+        return (type(self).__module__, type(self).__qualname__, getattr(self, "request_url", None))
+
+    def _new_snapshot(self, key: str, src_huts: t.Sequence[HutSourceSchema]) -> HutSnapshot[t.Any]:
+        """Snapshot of the huts of a successful fetch, an empty one is not kept (nothing to page through)."""
+        if len(src_huts) >= self.snapshot_limit:
+            logger.warning(f"Snapshot is truncated to {self.snapshot_limit} huts.")
+        ordered = sorted(src_huts, key=lambda h: (len(h.source_id), h.source_id, h.name))  # numeric ids in order
+        snapshot = HutSnapshot(ordered)
+        if ordered:
+            store_snapshot(key, snapshot)
+        return snapshot
+
+    def _cursor_snapshot(self, cursor: str) -> tuple[str, HutSnapshot[THutSourceSchema], int]:
+        key, version, offset = decode_cursor(cursor)
+        snapshot = load_snapshot(key, version)
+        if snapshot is MISSING:
+            raise self.SnapshotExpiredError(cursor)
+        return key, snapshot, offset
+
+    @staticmethod
+    def _page(key: str, snapshot: HutSnapshot[THutSourceSchema], offset: int, limit: int) -> HutPage[THutSourceSchema]:
+        total = len(snapshot.huts)
+        offset = max(offset, 0)
+        end = offset + limit
+        next_cursor = encode_cursor(key, snapshot.version, end) if end < total else None
+        huts = copy.deepcopy(snapshot.huts[offset:end])  # the snapshot is shared, callers may change their huts
+        return HutPage(huts=huts, offset=offset, total=total, next_cursor=next_cursor)
+
     def get_bookings(
         self,
         date: datetime.datetime | datetime.date | t.Literal["now"] | None = None,
@@ -144,6 +411,34 @@ class BaseService(t.Generic[THutSourceSchema]):
         """
         raise self.MethodNotImplementedError(self, "get_bookings")
 
+    async def get_bookings_async(
+        self,
+        date: datetime.datetime | datetime.date | t.Literal["now"] | None = None,
+        days: int | None = None,
+        source_ids: list[int | str] | None = None,
+        lang: str = "de",
+        request_interval: float | None = None,
+    ) -> dict[int | str, HutBookingsSchema]:
+        """Async version of [`get_bookings()`][hut_services.BaseService.get_bookings]."""
+        return await asyncio.to_thread(
+            self.get_bookings,
+            date=date,
+            days=days,
+            source_ids=source_ids,
+            lang=lang,
+            request_interval=request_interval,
+        )
+
+    class SnapshotExpiredError(LookupError):
+        """The snapshot of a cursor is not available anymore (expired or replaced), start again without cursor.
+
+        Args:
+            cursor: Cursor of the page.
+        """
+
+        def __init__(self, cursor: str):
+            super().__init__(f"Snapshot of cursor '{cursor}' expired, get the first page again.")
+
     class MethodNotImplementedError(NotImplementedError):
         """Method is not implemented exception.
 
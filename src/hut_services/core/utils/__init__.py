@@ -1 +1,4 @@
 from ._gps_converter import GPSConverter
+from ._json_stream import JsonArrayParser, aiter_json_array, iter_json_array
+
+__all__ = ["GPSConverter", "JsonArrayParser", "aiter_json_array", "iter_json_array"]
@@ -0,0 +1,169 @@
+import codecs
+import json
+import typing as t
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+__all__ = ["JsonArrayParser", "aiter_json_array", "iter_json_array"]
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+
+
+class JsonArrayParser:
+    """Incremental parser for the items of an array in a JSON object (e.g. `features` of a GeoJSON collection).
+
+    Chunks of the document are fed as they arrive, items are returned as soon as they are complete.
+    Only the current item is kept in memory, never the whole document.
+    The other values of the object (e.g. `generator`) are collected in `fields`.
+
+    Examples:
+        ```python
+        parser = JsonArrayParser("features")
+        for chunk in response.iter_bytes():
+            for feature in parser.feed(chunk):
+                print(feature["id"])
+        parser.close()
+        ```
+
+    Args:
+        key: Key of the array in the top level object.
+
+    Attributes:
+        fields: Other values of the top level object read so far.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._current_key: str | None = None
+        self._found = False
+        self.fields: dict[str, t.Any] = {}
+
+    def feed(self, chunk: bytes | str) -> list[t.Any]:
+        """Adds a chunk of the document.
+
+        Returns:
+            Items completed by this chunk."""
+        self._buffer = self._buffer[self._pos :] + (
+            chunk if isinstance(chunk, str) else self._text_decoder.decode(chunk)
+        )
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> list[t.Any]:
+        """Ends the document.
+
+        Returns:
+            Remaining items.
+
+        Raises:
+            ValueError: The document is incomplete or the array is missing.
+        """
+        self._buffer = self._buffer[self._pos :] + self._text_decoder.decode(b"", final=True)
+        self._pos = 0
+        items = self._parse(final=True)
+        if self._state != "done":
+            err_msg = f"JSON document with the '{self.key}' array ended too early."
+            raise ValueError(err_msg)
+        return items
+
+    def _skip(self) -> str | None:
+        """Next non whitespace character (not consumed), `None` if more data is needed."""
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+            self._pos += 1
+        return self._buffer[self._pos] if self._pos < len(self._buffer) else None
+
+    def _value(self, final: bool) -> tuple[bool, t.Any]:
+        """Decodes the next value, `(False, None)` if more data is needed."""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False, None
+        if not final and (end >= len(self._buffer) or self._buffer[end] not in _DELIMITERS):
+            return False, None  # e.g. a number which continues in the next chunk
+        self._pos = end
+        return True, value
+
+    def _expect(self, char: str, expected: str) -> None:
+        if char not in expected:
+            err_msg = f"Invalid JSON document, expected {expected!r} but got {char!r} at position {self._pos}."
+            raise ValueError(err_msg)
+        self._pos += 1
+
+    def _parse(self, final: bool) -> list[t.Any]:
+        items = []
+        while self._state != "done":
+            char = self._skip()
+            if char is None:
+                break
+            if self._state == "start":
+                self._expect(char, "{")
+                self._state = "first_key"
+            elif self._state == "first_key" and char == "}":
+                err_msg = f"JSON object has no '{self.key}' array."
+                raise ValueError(err_msg)
+            elif self._state == "first_key":
+                self._state = "key"
+            elif self._state == "key":
+                complete, self._current_key = self._value(final)
+                if not complete:
+                    break
+                self._state = "colon"
+            elif self._state == "colon":
+                self._expect(char, ":")
+                self._state = "array" if self._current_key == self.key else "field"
+            elif self._state == "field":  # other values of the object
+                complete, value = self._value(final)
+                if not complete:
+                    break
+                self.fields[t.cast(str, self._current_key)] = value
+                self._state = "next_key"
+            elif self._state == "next_key":
+                self._expect(char, ",}")
+                self._state = "key" if self._buffer[self._pos - 1] == "," else "done"
+                if self._state == "done" and not self._found:
+                    err_msg = f"JSON object has no '{self.key}' array."
+                    raise ValueError(err_msg)
+            elif self._state == "array":
+                self._expect(char, "[")
+                self._found = True
+                self._state = "first_item"
+            elif self._state in ("first_item", "item"):
+                if char == "]" and self._state == "first_item":
+                    self._pos += 1
+                    self._state = "next_key"
+                    continue
+                complete, item = self._value(final)
+                if not complete:
+                    break
+                items.append(item)
+                self._state = "next_item"
+            elif self._state == "next_item":
+                self._expect(char, ",]")
+                self._state = "item" if self._buffer[self._pos - 1] == "," else "next_key"
+        return items
+
+
+def iter_json_array(chunks: Iterable[bytes | str], key: str) -> Iterator[t.Any]:
+    """Yields the items of the array `key` of a JSON object while the chunks are read,
+    see [`JsonArrayParser`][hut_services.core.utils.JsonArrayParser]."""
+    parser = JsonArrayParser(key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_json_array(chunks: AsyncIterable[bytes | str], key: str) -> AsyncIterator[t.Any]:
+    """Async version of [`iter_json_array()`][hut_services.core.utils.iter_json_array]."""
+    parser = JsonArrayParser(key)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
@@ -7,6 +7,7 @@ import httpx
 
 # from typing import Any, Literal, Mapping
 from hut_services import BaseService, file_cache
+from hut_services.core.http import get_async_http_client, get_http_client
 from hut_services.core.schema import HutSchema
 from hut_services.core.schema.geo.geo import LocationEleSchema, LocationSchema
 from hut_services.geocode.schema import GeocodeHut0Convert, GeocodeHutSchema, GeocodeHutSource
@@ -24,7 +25,16 @@ if __name__ == "__main__":  # only for testing
 logger = logging.getLogger(__name__)
 
 
-@file_cache(ignore=["client"], expire_in_seconds=60 * 24 * 7 * 4)  # one month
+def _location_by_name_key(args: dict[str, t.Any]) -> t.Hashable:
+    return (args["name"].strip().lower(), args["request_url"], tuple(args["countries"]), tuple(args["languages"] or ()))
+
+
+def _elevations_key(args: dict[str, t.Any]) -> t.Hashable:
+    # rounded to about 1m, the elevation does not change within this distance
+    return tuple((round(loc.lat, 5), round(loc.lon, 5)) for loc in args["locations"]), args["request_url"]
+
+
+@file_cache(ignore=["client"], expire_in_seconds=60 * 24 * 7 * 4, key=_location_by_name_key)  # one month
 def _get_location_by_name(
     name: str,
     request_url: str,
@@ -34,7 +44,33 @@ def _get_location_by_name(
 ) -> t.Any:
     logger.debug(f"Get location for {name} from '{request_url}'.")
     if client is None:
-        client = httpx.Client()
+        client = get_http_client()
+    country_codes = ",".join(countries)
+    accept_lang = ",".join(languages) if languages else country_codes
+    params: dict[str, str | int | bool] = {
+        "q": name,
+        "format": "jsonv2",
+        "limit": 1,
+        "extratags": True,
+        "countrycodes": country_codes,
+        "accept-language": accept_lang,
+    }
+    response = client.get(url=request_url, params=params)
+    response.raise_for_status()  # error pages are not cached
+    return response.json()
+
+
+@_get_location_by_name.register_async
+async def _get_location_by_name_async(
+    name: str,
+    request_url: str,
+    client: httpx.AsyncClient | None = None,
+    countries: t.Sequence[str] = ["ch", "de", "fr", "it", "at"],
+    languages: t.Sequence[str] | None = None,
+) -> t.Any:
+    logger.debug(f"Get location for {name} from '{request_url}'.")
+    if client is None:
+        client = get_async_http_client()
     country_codes = ",".join(countries)
     accept_lang = ",".join(languages) if languages else country_codes
     params: dict[str, str | int | bool] = {
@@ -45,10 +81,12 @@ def _get_location_by_name(
         "countrycodes": country_codes,
         "accept-language": accept_lang,
     }
-    return client.get(url=request_url, params=params).json()
+    response = await client.get(url=request_url, params=params)
+    response.raise_for_status()
+    return response.json()
 
 
-@file_cache(ignore=["client"], expire_in_seconds=60 * 24 * 7 * 4 * 12)  # 12 months
+@file_cache(ignore=["client"], expire_in_seconds=60 * 24 * 7 * 4 * 12, key=_elevations_key)  # 12 months
 def _get_elevations(
     locations: t.Sequence[LocationSchema | LocationEleSchema],
     request_url: str,
@@ -56,7 +94,7 @@ def _get_elevations(
 ) -> t.Any:
     logger.debug(f"Get elevation for {locations} from '{request_url}'.")
     if client is None:
-        client = httpx.Client()
+        client = get_http_client()
     params: dict[str, str | int | bool] = {
         "locations": "|".join([f"{location.lat},{location.lon}" for location in locations])
     }
@@ -65,6 +103,25 @@ def _get_elevations(
     # res = client.post(url=request_url, data=data, headers=headers)
     headers = {"Content-Type": "application/json"}
     res = client.get(url=request_url, params=params, headers=headers)
+    res.raise_for_status()  # error pages are not cached
+    return res.json().get("results", [])
+
+
+@_get_elevations.register_async
+async def _get_elevations_async(
+    locations: t.Sequence[LocationSchema | LocationEleSchema],
+    request_url: str,
+    client: httpx.AsyncClient | None = None,
+) -> t.Any:
+    logger.debug(f"Get elevation for {locations} from '{request_url}'.")
+    if client is None:
+        client = get_async_http_client()
+    params: dict[str, str | int | bool] = {
+        "locations": "|".join([f"{location.lat},{location.lon}" for location in locations])
+    }
+    headers = {"Content-Type": "application/json"}
+    res = await client.get(url=request_url, params=params, headers=headers)
+    res.raise_for_status()
     return res.json().get("results", [])
 
 
@@ -76,26 +133,51 @@ class GeocodeService(BaseService[GeocodeHutSource]):
         This is not used to get huts, rather to get additional info (like location) from huts.
     """
 
-    def __init__(self) -> None:
-        super().__init__(support_bbox=True, support_limit=True, support_offset=True, support_convert=True)
+    def __init__(self, http_client: httpx.Client | None = None) -> None:
+        super().__init__(
+            support_bbox=True, support_limit=True, support_offset=True, support_convert=True, http_client=http_client
+        )
         self.loc_request_url = "https://nominatim.openstreetmap.org/search"
         self.ele_request_url = "https://api.open-elevation.com/api/v1/lookup"
-        self.httpx_client = httpx.Client()
 
     def get_location_by_name(self, name: str, client: httpx.Client | None = None) -> LocationEleSchema | None:
         """Get location (coordinates) from a name (uses 'https://nominatim.openstreetmap.org)."""
-        client = client if client is not None else self.httpx_client
+        client = client if client is not None else self.http_client
         res = _get_location_by_name(name=name, request_url=self.loc_request_url, client=client)
         if res:
             return GeocodeHutSchema(**res[0]).get_location()
         return None
 
+    async def get_location_by_name_async(
+        self, name: str, client: httpx.AsyncClient | None = None
+    ) -> LocationEleSchema | None:
+        """Async version of `get_location_by_name()`."""
+        client = client if client is not None else self.async_http_client
+        res = await _get_location_by_name_async(name=name, request_url=self.loc_request_url, client=client)
+        if res:
+            return GeocodeHutSchema(**res[0]).get_location()
+        return None
+
     def get_elevations(
         self, locations: t.Sequence[LocationSchema | LocationEleSchema], client: httpx.Client | None = None
     ) -> list[LocationEleSchema]:
         """Get elevations from a list of locations (coordinates) (uses 'https://open-elevation.com)."""
-        client = client if client is not None else self.httpx_client
+        client = client if client is not None else self.http_client
         res = _get_elevations(locations=locations, request_url=self.ele_request_url, client=client)
+        return self._with_elevations(locations, res)
+
+    async def get_elevations_async(
+        self, locations: t.Sequence[LocationSchema | LocationEleSchema], client: httpx.AsyncClient | None = None
+    ) -> list[LocationEleSchema]:
+        """Async version of `get_elevations()`."""
+        client = client if client is not None else self.async_http_client
+        res = await _get_elevations_async(locations=locations, request_url=self.ele_request_url, client=client)
+        return self._with_elevations(locations, res)
+
+    @staticmethod
+    def _with_elevations(
+        locations: t.Sequence[LocationSchema | LocationEleSchema], res: t.Any
+    ) -> list[LocationEleSchema]:
         locs: list[LocationEleSchema] = []
         for i, loc in enumerate(locations):
             ele = res[i].get("elevation")
@@ -106,9 +188,15 @@ class GeocodeService(BaseService[GeocodeHutSource]):
         self, location: LocationSchema | LocationEleSchema, client: httpx.Client | None = None
     ) -> LocationEleSchema:
         """Get elevation from a location (coordinates) (uses 'https://open-elevation.com)."""
-        client = client if client is not None else self.httpx_client
+        client = client if client is not None else self.http_client
         return self.get_elevations(locations=[location], client=client)[0]
 
+    async def get_elevation_async(
+        self, location: LocationSchema | LocationEleSchema, client: httpx.AsyncClient | None = None
+    ) -> LocationEleSchema:
+        """Async version of `get_elevation()`."""
+        return (await self.get_elevations_async(locations=[location], client=client))[0]
+
     # NOT IMPLEMENTED:
     # def get_huts_from_source(
     #    self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: dict
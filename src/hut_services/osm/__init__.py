@@ -1,3 +1,4 @@
 from .service import OsmService
+from .tiling import OverpassTiling
 
-__all__ = ["OsmService"]
+__all__ = ["OsmService", "OverpassTiling"]
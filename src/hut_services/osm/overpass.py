@@ -0,0 +1,155 @@
+import asyncio
+import time
+import typing as t
+
+import httpx
+import overpy  # type: ignore[import-untyped]
+from overpy import exception
+
+from hut_services.core.http import get_async_http_client, get_http_client
+from hut_services.core.utils import JsonArrayParser
+
+__all__ = ["Overpass"]
+
+stream_chunk_size = 64 * 1024
+
+
+class Overpass(overpy.Overpass):  # type: ignore[no-any-unimported]
+    """Overpass API (`overpy`) which sends its requests with a httpx client (connection pool) instead of urllib.
+
+    Queries can be awaited with `query_async()`, the elements of large results can be streamed
+    with `iter_elements()` (or `aiter_elements()`) instead of building the whole result.
+
+    Args:
+        url: Overpass API url.
+        client: HTTP client, the shared client (see [`get_http_client()`][hut_services.core.http.get_http_client])
+            if not set.
+        async_client: Async HTTP client used by `query_async()`, the shared client of the event loop if not set.
+        timeout: Seconds to wait for the response (queries can take long).
+        kwargs: Further arguments of `overpy.Overpass` (e.g. `max_retry_count`).
+    """
+
+    _headers: t.ClassVar[dict[str, str]] = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    def __init__(
+        self,
+        url: str | None = None,
+        client: httpx.Client | None = None,
+        async_client: httpx.AsyncClient | None = None,
+        timeout: float = 180,
+        **kwargs: t.Any,
+    ):
+        super().__init__(url=url, **kwargs)
+        self.client = client
+        self.async_client = async_client
+        self.timeout = timeout
+
+    def query(self, query: bytes | str) -> t.Any:
+        """Query the Overpass API, the same as `overpy.Overpass.query()`."""
+        query = query if isinstance(query, bytes) else query.encode("utf-8")
+        client = self.client if self.client is not None else get_http_client()
+        retry_exceptions: list[t.Any] = []
+        for retry_num in range(self.max_retry_count + 1):
+            if retry_num > 0:
+                time.sleep(self.retry_timeout)
+            response = client.post(self.url, content=query, headers=self._headers, timeout=self.timeout)
+            result, current_exception = self._result(query, response)
+            if current_exception is None:
+                return result
+            if self.max_retry_count <= 0:
+                raise current_exception
+            retry_exceptions.append(current_exception)
+        raise exception.MaxRetriesReached(retry_count=self.max_retry_count + 1, exceptions=retry_exceptions)
+
+    async def query_async(self, query: bytes | str) -> t.Any:
+        """Async version of `query()`."""
+        query = query if isinstance(query, bytes) else query.encode("utf-8")
+        client = self.async_client if self.async_client is not None else get_async_http_client()
+        retry_exceptions: list[t.Any] = []
+        for retry_num in range(self.max_retry_count + 1):
+            if retry_num > 0:
+                await asyncio.sleep(self.retry_timeout)
+            response = await client.post(self.url, content=query, headers=self._headers, timeout=self.timeout)
+            result, current_exception = self._result(query, response)
+            if current_exception is None:
+                return result
+            if self.max_retry_count <= 0:
+                raise current_exception
+            retry_exceptions.append(current_exception)
+        raise exception.MaxRetriesReached(retry_count=self.max_retry_count + 1, exceptions=retry_exceptions)
+
+    def iter_elements(self, query: bytes | str) -> t.Iterator[dict[str, t.Any]]:
+        """Streams the elements of a JSON query (`[out:json]`), each one is yielded as soon as it is downloaded.
+
+        Raises the same exceptions as `query()`, failed requests are not retried by `max_retry_count`.
+
+        Yields:
+            Raw JSON elements (e.g. `{"type": "node", "id": 1, "lat": 46.5, ...}`).
+        """
+        query = query if isinstance(query, bytes) else query.encode("utf-8")
+        client = self.client if self.client is not None else get_http_client()
+        with client.stream("POST", self.url, content=query, headers=self._headers, timeout=self.timeout) as response:
+            if not self._is_json(response):
+                response.read()
+                raise self._stream_error(query, response)
+            parser = JsonArrayParser("elements")
+            for chunk in response.iter_bytes(stream_chunk_size):
+                yield from parser.feed(chunk)
+            yield from parser.close()
+        self._check_remark(parser)
+
+    async def aiter_elements(self, query: bytes | str) -> t.AsyncIterator[dict[str, t.Any]]:
+        """Async version of `iter_elements()`."""
+        query = query if isinstance(query, bytes) else query.encode("utf-8")
+        client = self.async_client if self.async_client is not None else get_async_http_client()
+        async with client.stream(
+            "POST", self.url, content=query, headers=self._headers, timeout=self.timeout
+        ) as response:
+            if not self._is_json(response):
+                await response.aread()
+                raise self._stream_error(query, response)
+            parser = JsonArrayParser("elements")
+            async for chunk in response.aiter_bytes(stream_chunk_size):
+                for element in parser.feed(chunk):
+                    yield element
+            for element in parser.close():
+                yield element
+        self._check_remark(parser)
+
+    @staticmethod
+    def _is_json(response: httpx.Response) -> bool:
+        content_type = response.headers.get("content-type", "").split(";")[0].strip()
+        return response.status_code == 200 and content_type == "application/json"
+
+    def _stream_error(self, query: bytes, response: httpx.Response) -> t.Any:
+        _, current_exception = self._result(query, response)
+        if current_exception is None:  # e.g. XML instead of JSON
+            content_type = response.headers.get("content-type", "").split(";")[0].strip()
+            current_exception = exception.OverpassUnknownContentType(content_type)
+        return current_exception
+
+    def _check_remark(self, parser: JsonArrayParser) -> None:
+        """Raises runtime errors reported after the elements (e.g. a timeout of the query)."""
+        if "remark" in parser.fields:
+            self._handle_remark_msg(msg=parser.fields["remark"])
+
+    def _result(self, query: bytes, response: httpx.Response) -> tuple[t.Any, t.Any]:
+        """Parsed result of a response or the exception to raise (`overpy.exception`)."""
+        if response.status_code == 200:
+            content_type = response.headers.get("content-type", "").split(";")[0].strip()
+            if content_type == "application/json":
+                return self.parse_json(response.content), None
+            if content_type == "application/osm3s+xml":
+                return self.parse_xml(response.content), None
+            return None, exception.OverpassUnknownContentType(content_type)
+        if response.status_code == 400:
+            msgs = [
+                self._regex_remove_tag.sub(b"", msg.group("msg")).decode("utf-8", errors="replace")
+                for msg in self._regex_extract_error_msg.finditer(response.content)
+            ]
+            return None, exception.OverpassBadRequest(query, msgs=msgs)
+        if response.status_code == 429:
+            return None, exception.OverpassTooManyRequests()
+        if response.status_code == 504:
+            return None, exception.OverpassGatewayTimeout()
+        return None, exception.OverpassUnknownHTTPStatusCode(response.status_code)
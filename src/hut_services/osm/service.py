@@ -1,16 +1,22 @@
 #!/usr/bin/env python
 # from functools import lru_cache
+import asyncio
+import itertools
 import logging
 import textwrap
 import typing as t
 
+import httpx
 import overpy  # type: ignore[import-untyped]
+from pydantic import TypeAdapter
 
-from hut_services.core.cache import file_cache
+from hut_services.core.cache import MISSING, Codec, SpatialCache, file_cache
 from hut_services.core.schema import HutSchema
-from hut_services.core.schema.geo import BBox
+from hut_services.core.schema.geo import BBox, LocationEleSchema
 from hut_services.core.service import BaseService
+from hut_services.osm.overpass import Overpass
 from hut_services.osm.schema import OsmHut0Convert, OsmHutSchema, OsmHutSource, OsmProperties
+from hut_services.osm.tiling import SWITZERLAND, OverpassTiling, aharvest_tiles, harvest_tiles
 
 if __name__ == "__main__":  # only for testing
     from rich import print as rprint  # noqa: F401, RUF100
@@ -22,10 +28,12 @@ if __name__ == "__main__":  # only for testing
 logger = logging.getLogger(__name__)
 
 
-@file_cache(ignore=["api"])
-def _get_huts_from_source(
-    api: t.Any, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: dict
-) -> list[OsmHutSource]:
+lean_tags = ("name", "tourism", "ele", "operator", "capacity", "wikidata")  # tags returned by lean queries
+
+
+def _huts_query(
+    api: t.Any, bbox: BBox | None, limit: int, offset: int, timeout: int | None = None, lean: bool = False
+) -> str:
     if bbox is None:
         # fetch all ways and nodes
         # SWISS
@@ -43,40 +51,201 @@ def _get_huts_from_source(
         bbox = (lon_start, lat_start, lon_start + lon_range, lat_start + lat_range)
     area = ",".join([str(b) for b in bbox])  # f"{lon_start},{lat_start},{lon_start+lon_range},{lat_start+lat_range}"
     logger.info(f"get osm data from {api.url} with bbox: ({area})")
+    settings = "[out:json]" if timeout is None else f"[out:json][timeout:{timeout}]"
+    output = f"out qt center {limit};"
+    if lean:  # tag projection, one derived element with the center and a few tags per hut
+        tags = ", ".join(f'{tag} = t["{tag}"]' for tag in lean_tags)
+        output = f"convert hut ::id = id(), ::geom = center(geom()), osm_type = type(), {tags}; out geom {limit};"
     query = f"""
-            [out:json];
+            {settings};
             (
             nw["tourism"="alpine_hut"]["name"]({area});
             nw["tourism"="wilderness_hut"]["name"]({area});
             );
-            out qt center {limit};
+            {output}
         """
     logger.debug(f"query:\n{'-' * 20}\n{textwrap.dedent(query).strip()}\n{'-' * 20}")
-    try:
-        result = api.query(query)
-    except overpy.exception.OverpassGatewayTimeout as e:
-        logger.warning("overpy execution failed")
-        logger.debug(str(e))
-        return []
-    huts = []
-    for _osm_type, res in {"node": result.nodes, "way": result.ways}.items():
-        osm_type: t.Literal["node", "way", "area"] = _osm_type  # type: ignore  # noqa: PGH003 # ignore pyright and mypy str to literal assigment
-        for h in res:
-            osm_hut = OsmHutSchema.model_validate(h, from_attributes=True)
-            osm_hut.osm_type = osm_type
-            hut = OsmHutSource(
-                name=osm_hut.get_name(),
-                source_id=osm_hut.get_id(),
-                location=osm_hut.get_location(),
-                source_data=osm_hut,
-                source_properties=OsmProperties(osm_type=osm_type),
-            )
-            huts.append(hut)
-            # huts.append(h)
+    return query
+
+
+batch_size = 256  # raw elements validated at once by the fast path
+
+_osm_huts_adapter: TypeAdapter[list[OsmHutSchema]] = TypeAdapter(list[OsmHutSchema])
+
+
+def _hut_source(osm_hut: OsmHutSchema) -> OsmHutSource:
+    return OsmHutSource(
+        name=osm_hut.get_name(),
+        source_id=osm_hut.get_id(),
+        location=osm_hut.get_location(),
+        source_data=osm_hut,
+        source_properties=OsmProperties(osm_type=t.cast(t.Literal["node", "way", "area"], osm_hut.osm_type)),
+    )
+
+
+def _hut_from_element(element: dict[str, t.Any]) -> OsmHutSource | None:
+    """Hut from a raw JSON element through the `overpy` objects, `None` for other element types."""
+    if element.get("type") == "hut":  # lean query, no overpy type
+        return _hut_source(OsmHutSchema.model_validate(_raw_hut(element)))
+    if element.get("type") == "node":
+        h = overpy.Node.from_json(element)
+    elif element.get("type") == "way":
+        h = overpy.Way.from_json(element)
+    else:
+        return None
+    osm_hut = OsmHutSchema.model_validate(h, from_attributes=True)
+    osm_hut.osm_type = element["type"]
+    return _hut_source(osm_hut)
+
+
+def _raw_hut(element: dict[str, t.Any]) -> dict[str, t.Any]:
+    """Fields of `OsmHutSchema` from a raw node or way (ways have a `center` with `out center`),
+    or from a derived `hut` element of a lean query."""
+    if element["type"] == "hut":
+        tags = {key: value for key, value in element.get("tags", {}).items() if value != ""}  # missing tags
+        lon, lat = (element.get("geometry") or {}).get("coordinates") or (None, None)
+        return {"osm_type": tags.pop("osm_type", None), "id": element["id"], "lat": lat, "lon": lon, "tags": tags}
+    center = element.get("center") or {}
+    return {
+        "osm_type": element["type"],
+        "id": element["id"],
+        "lat": element.get("lat"),
+        "lon": element.get("lon"),
+        "center_lat": center.get("lat"),
+        "center_lon": center.get("lon"),
+        "tags": element.get("tags", {}),
+    }
+
+
+def _huts_from_batch(elements: list[dict[str, t.Any]]) -> list[OsmHutSource]:
+    """Validates raw JSON elements at once, without creating `overpy` objects (other element types are skipped)."""
+    raw = [_raw_hut(e) for e in elements if e.get("type") in ("node", "way", "hut")]
+    return [_hut_source(osm_hut) for osm_hut in _osm_huts_adapter.validate_python(raw)]
+
+
+def iter_huts_from_elements(elements: t.Iterable[dict[str, t.Any]], fast: bool = True) -> t.Iterator[OsmHutSource]:
+    """Converts raw JSON elements (e.g. from `Overpass.iter_elements()`) into huts while they are downloaded.
+
+    Args:
+        elements: Raw JSON elements.
+        fast: Validate the elements in batches of `batch_size` straight into `OsmHutSchema`,
+            otherwise each element is converted through the `overpy` objects first.
+    """
+    if not fast:
+        for element in elements:
+            hut = _hut_from_element(element)
+            if hut is not None:
+                yield hut
+        return
+    iterator = iter(elements)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield from _huts_from_batch(batch)
+
+
+async def aiter_huts_from_elements(
+    elements: t.AsyncIterable[dict[str, t.Any]], fast: bool = True
+) -> t.AsyncIterator[OsmHutSource]:
+    """Async version of [`iter_huts_from_elements()`][hut_services.osm.service.iter_huts_from_elements]
+    (e.g. for `Overpass.aiter_elements()`)."""
+    batch: list[dict[str, t.Any]] = []
+    async for element in elements:
+        batch.append(element)
+        if len(batch) >= (batch_size if fast else 1):
+            for hut in iter_huts_from_elements(batch, fast=fast):
+                yield hut
+            batch = []
+    for hut in iter_huts_from_elements(batch, fast=fast):
+        yield hut
+
+
+def _huts_from_elements(elements: t.Iterable[dict[str, t.Any]], fast: bool = True) -> list[OsmHutSource]:
+    huts = list(iter_huts_from_elements(elements, fast=fast))
     logger.info(f"succesfully got {len(huts)} huts")
     return huts
 
 
+@file_cache(
+    ignore=["api", "fast"],
+    stale_ttl=3600 * 24 * 7,  # serve up to one week old data while refreshing
+    codec=Codec("json", type_=list[OsmHutSource]),
+)
+def _get_huts_from_source(
+    api: t.Any,
+    bbox: BBox | None = None,
+    limit: int = 1,
+    offset: int = 0,
+    fast: bool = True,
+    timeout: int | None = None,
+    lean: bool = False,
+    **kwargs: dict,
+) -> list[OsmHutSource]:
+    # elements are converted while they are downloaded, raises on failures (not cached)
+    query = _huts_query(api, bbox=bbox, limit=limit, offset=offset, timeout=timeout, lean=lean)
+    return _huts_from_elements(api.iter_elements(query), fast=fast)
+
+
+@_get_huts_from_source.register_async
+async def _get_huts_from_source_async(
+    api: t.Any,
+    bbox: BBox | None = None,
+    limit: int = 1,
+    offset: int = 0,
+    fast: bool = True,
+    timeout: int | None = None,
+    lean: bool = False,
+    **kwargs: dict,
+) -> list[OsmHutSource]:
+    query = _huts_query(api, bbox, limit, offset, timeout, lean=lean)
+    elements = [element async for element in api.aiter_elements(query)]
+    return _huts_from_elements(elements, fast=fast)
+
+
+def _hut_query(osm_type: str, osm_id: int) -> str:
+    return f"[out:json];\n{osm_type}({osm_id});\nout center;"
+
+
+@file_cache(
+    ignore=["api", "fast"],
+    stale_ttl=3600 * 24 * 7,
+    codec=Codec("json", type_=list[OsmHutSource]),
+)
+def _get_hut_from_source(api: t.Any, osm_type: str, osm_id: int, fast: bool = True) -> list[OsmHutSource]:
+    """Full record of one hut (all tags), empty if it does not exist anymore."""
+    return list(iter_huts_from_elements(api.iter_elements(_hut_query(osm_type, osm_id)), fast=fast))
+
+
+@_get_hut_from_source.register_async
+async def _get_hut_from_source_async(api: t.Any, osm_type: str, osm_id: int, fast: bool = True) -> list[OsmHutSource]:
+    elements = [element async for element in api.aiter_elements(_hut_query(osm_type, osm_id))]
+    return list(iter_huts_from_elements(elements, fast=fast))
+
+
+@file_cache(
+    ignore=["api", "fast"],
+    stale_ttl=3600 * 24 * 7,
+    codec=Codec("json", type_=list[OsmHutSource]),
+)
+def _get_tile_huts(api: t.Any, bbox: BBox, fast: bool = True, lean: bool = False) -> list[OsmHutSource]:
+    """All huts of a tile of the spatial cache."""
+    return t.cast(
+        list[OsmHutSource], _get_huts_from_source.func(api, bbox=bbox, limit=spatial_limit, fast=fast, lean=lean)
+    )
+
+
+spatial_limit = 10000  # maximal number of huts fetched for missing tiles
+
+
+def _lat_lon(hut: OsmHutSource) -> tuple[float, float]:
+    """Coordinates in the axis order of Overpass boundary boxes (south, west, north, east)."""
+    location = t.cast(LocationEleSchema, hut.location)
+    return location.lat, location.lon
+
+
+spatial_cache: SpatialCache[OsmHutSource] = SpatialCache(
+    _get_tile_huts, tile_size=0.5, limit=spatial_limit, point=_lat_lon
+)
+
+
 class OsmService(BaseService[OsmHutSource]):
     """Service to get huts from
     [Open Street Map](https://www.openstreetmap.org/)
@@ -84,20 +253,237 @@ class OsmService(BaseService[OsmHutSource]):
 
     Note:
         The methods are descriebed in [`BaseService`][hut_services.BaseService].
+
+    Args:
+        request_url: Overpass API url.
+        http_client: HTTP client, the shared client if not set.
+        fast: Validate the raw JSON elements straight into `OsmHutSchema` instead of creating `overpy` objects.
+        tiling: Fetch large regions tile by tile (Switzerland if no `bbox` is given), see
+            [`OverpassTiling`][hut_services.osm.tiling.OverpassTiling], `limit` and `offset` are applied
+            to the merged huts.
+
+    Failed Overpass requests (e.g. `overpy.exception.OverpassGatewayTimeout`) are raised and not cached.
+
+    With `lean=True` (`get_huts_from_source()`) only the location and a few tags (`lean_tags`) of each hut
+    are fetched (Overpass tag projection), the full record of a hut is loaded with `get_hut_from_source()`.
     """
 
-    def __init__(self, request_url: str = "https://overpass.osm.ch/api/"):
-        super().__init__(support_bbox=True, support_limit=True, support_offset=True, support_convert=True)
+    bbox_lat_first: t.ClassVar[bool] = True  # Overpass order (south, west, north, east)
+
+    def __init__(
+        self,
+        request_url: str = "https://overpass.osm.ch/api/",
+        http_client: httpx.Client | None = None,
+        fast: bool = True,
+        tiling: OverpassTiling | None = None,
+        spatial_cache: SpatialCache[OsmHutSource] | None = spatial_cache,
+    ):
+        super().__init__(
+            support_bbox=True, support_limit=True, support_offset=True, support_convert=True, http_client=http_client
+        )
         self.request_url = request_url
+        self.fast = fast
+        self.tiling = tiling
+        self.spatial_cache = spatial_cache
 
     def get_huts_from_source(
-        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: dict
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
     ) -> list[OsmHutSource]:
-        api = overpy.Overpass(url=self.request_url)
-        huts = _get_huts_from_source(api=api, bbox=bbox, limit=limit, offset=offset, **kwargs)
+        lean: bool = kwargs.pop("lean", False)
+        api = Overpass(url=self.request_url, client=self.http_client)
+        if self.spatial_cache is not None and bbox is not None:
+            cached = self._cached_huts(api, bbox, limit=limit, offset=offset, lean=lean, **kwargs)
+            if cached is not None:
+                return cached
+        if self.tiling is not None:
+            huts = self._harvest(api, bbox or SWITZERLAND, lean=lean)
+            self._populate(api, bbox or SWITZERLAND, huts, lean=lean)
+            return huts[offset : offset + limit]
+        # failures (e.g. `OverpassGatewayTimeout`) are raised the same as by the spatial cache and tiling
+        huts = _get_huts_from_source(
+            api=api, bbox=bbox, limit=limit, offset=offset, fast=self.fast, lean=lean, **kwargs
+        )
         assert all(isinstance(p, OsmHutSource) for p in huts), "Wrong type, not a list of 'PhotoSchema'"  # noqa: S101
+        if bbox is not None and offset == 0 and len(huts) < limit:  # all huts of the bbox
+            self._populate(api, bbox, huts, lean=lean)
+        return t.cast(list[OsmHutSource], huts)
+
+    async def get_huts_from_source_async(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
+    ) -> list[OsmHutSource]:
+        lean: bool = kwargs.pop("lean", False)
+        if self.spatial_cache is not None and bbox is not None:
+            sync_api = Overpass(url=self.request_url, client=self.http_client)
+            cached = await asyncio.to_thread(
+                self._cached_huts, sync_api, bbox, limit=limit, offset=offset, lean=lean, **kwargs
+            )
+            if cached is not None:
+                return cached
+        api = Overpass(url=self.request_url, async_client=self.async_http_client)
+        if self.tiling is not None:
+            tiling = self.tiling
+
+            async def fetch(tile: BBox) -> list[OsmHutSource]:
+                return await _get_huts_from_source_async(  # type: ignore[no-any-return]
+                    api=api, bbox=tile, limit=tiling.max_elements, fast=self.fast, timeout=tiling.timeout, lean=lean
+                )
+
+            huts = await aharvest_tiles(fetch, bbox or SWITZERLAND, tiling)
+            await asyncio.to_thread(self._populate, api, bbox or SWITZERLAND, huts, lean=lean)
+            return huts[offset : offset + limit]
+        huts = await _get_huts_from_source_async(
+            api=api, bbox=bbox, limit=limit, offset=offset, fast=self.fast, lean=lean, **kwargs
+        )
+        if bbox is not None and offset == 0 and len(huts) < limit:
+            await asyncio.to_thread(self._populate, api, bbox, huts, lean=lean)
         return t.cast(list[OsmHutSource], huts)
 
+    def iter_huts_from_source(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
+    ) -> t.Iterator[OsmHutSource]:
+        """Huts which are not cached yet are streamed from Overpass, with `tiling` all tiles are fetched first.
+
+        A stream is only cached (the same as `get_huts_from_source()`) once it is complete, failed requests
+        (e.g. `overpy.exception.OverpassGatewayTimeout`) are raised, also after the first huts were yielded."""
+        if self.tiling is not None:
+            yield from self.get_huts_from_source(bbox=bbox, limit=limit, offset=offset, **kwargs)
+            return
+        lean: bool = kwargs.pop("lean", False)
+        api = Overpass(url=self.request_url, client=self.http_client)
+        cached = self._peek(api, bbox, limit, offset, lean, **kwargs)
+        if cached is not None:
+            yield from cached
+            return
+        query = _huts_query(api, bbox, limit, offset, lean=lean)
+        huts: list[OsmHutSource] = []
+        for hut in iter_huts_from_elements(api.iter_elements(query), fast=self.fast):
+            huts.append(hut)
+            yield hut
+        self._streamed(api, bbox, limit, offset, lean, huts, **kwargs)
+
+    async def aiter_huts_from_source(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
+    ) -> t.AsyncIterator[OsmHutSource]:
+        if self.tiling is not None:
+            for hut in await self.get_huts_from_source_async(bbox=bbox, limit=limit, offset=offset, **kwargs):
+                yield hut
+            return
+        lean: bool = kwargs.pop("lean", False)
+        sync_api = Overpass(url=self.request_url, client=self.http_client)
+        cached = await asyncio.to_thread(self._peek, sync_api, bbox, limit, offset, lean, **kwargs)
+        if cached is not None:
+            for hut in cached:
+                yield hut
+            return
+        api = Overpass(url=self.request_url, async_client=self.async_http_client)
+        query = _huts_query(api, bbox, limit, offset, lean=lean)
+        huts: list[OsmHutSource] = []
+        async for hut in aiter_huts_from_elements(api.aiter_elements(query), fast=self.fast):
+            huts.append(hut)
+            yield hut
+        await asyncio.to_thread(self._streamed, sync_api, bbox, limit, offset, lean, huts, **kwargs)
+
+    def _streamed(
+        self,
+        api: Overpass,
+        bbox: BBox | None,
+        limit: int,
+        offset: int,
+        lean: bool,
+        huts: list[OsmHutSource],
+        **kwargs: t.Any,
+    ) -> None:
+        """Caches the huts of a complete stream the same as `get_huts_from_source()`."""
+        _get_huts_from_source.put(
+            huts, api=api, bbox=bbox, limit=limit, offset=offset, fast=self.fast, lean=lean, **kwargs
+        )
+        if bbox is not None and offset == 0 and len(huts) < limit:  # all huts of the bbox
+            self._populate(api, bbox, huts, lean=lean)
+
+    def _peek(
+        self, api: Overpass, bbox: BBox | None, limit: int, offset: int, lean: bool, **kwargs: t.Any
+    ) -> list[OsmHutSource] | None:
+        """Cached huts of a request (including the spatial cache), `None` if they have to be fetched."""
+        if self.spatial_cache is not None and bbox is not None:
+            return self._cached_huts(api, bbox, limit=limit, offset=offset, lean=lean, **kwargs)
+        huts = _get_huts_from_source.peek(
+            api=api, bbox=bbox, limit=limit, offset=offset, fast=self.fast, lean=lean, **kwargs
+        )
+        return None if huts is MISSING else t.cast(list[OsmHutSource], huts)
+
+    def get_hut_from_source(self, src: t.Mapping | t.Any) -> OsmHutSource:
+        osm_type, osm_id = self._osm_ident(src)
+        api = Overpass(url=self.request_url, client=self.http_client)
+        huts = _get_hut_from_source(api=api, osm_type=osm_type, osm_id=osm_id, fast=self.fast)
+        return self._found(huts, osm_type, osm_id)
+
+    async def get_hut_from_source_async(self, src: t.Mapping | t.Any) -> OsmHutSource:
+        osm_type, osm_id = self._osm_ident(src)
+        api = Overpass(url=self.request_url, async_client=self.async_http_client)
+        huts = await _get_hut_from_source_async(api=api, osm_type=osm_type, osm_id=osm_id, fast=self.fast)
+        return self._found(huts, osm_type, osm_id)
+
+    @staticmethod
+    def _osm_ident(src: t.Mapping | t.Any) -> tuple[str, int]:
+        hut_src = (
+            OsmHutSource(**src)
+            if isinstance(src, t.Mapping)
+            else OsmHutSource.model_validate(src, from_attributes=True)
+        )
+        if hut_src.source_properties is not None:
+            osm_type: str = hut_src.source_properties.osm_type
+        else:
+            osm_type = str(t.cast(OsmHutSchema, hut_src.source_data).osm_type)
+        return osm_type, int(hut_src.source_id)
+
+    @staticmethod
+    def _found(huts: list[OsmHutSource], osm_type: str, osm_id: int) -> OsmHutSource:
+        if not huts:
+            err_msg = f"OSM {osm_type} {osm_id} does not exist (anymore)."
+            raise LookupError(err_msg)
+        return huts[0]
+
+    def _harvest(self, api: Overpass, bbox: BBox, lean: bool = False) -> list[OsmHutSource]:
+        tiling = t.cast(OverpassTiling, self.tiling)
+
+        def fetch(tile: BBox) -> list[OsmHutSource]:
+            return _get_huts_from_source(  # type: ignore[no-any-return]
+                api=api, bbox=tile, limit=tiling.max_elements, fast=self.fast, timeout=tiling.timeout, lean=lean
+            )
+
+        return harvest_tiles(fetch, bbox, tiling)
+
+    def _fetch(self, api: Overpass, bbox: BBox, lean: bool = False) -> list[OsmHutSource]:
+        """All huts of a boundary box (not cached), used for the missing tiles of the spatial cache."""
+        if self.tiling is not None:
+            return self._harvest(api, bbox, lean=lean)
+        return t.cast(
+            list[OsmHutSource],
+            _get_huts_from_source.func(api, bbox=bbox, limit=spatial_limit, fast=self.fast, lean=lean),
+        )
+
+    def _cached_huts(
+        self, api: Overpass, bbox: BBox, limit: int, offset: int, lean: bool = False, **kwargs: t.Any
+    ) -> list[OsmHutSource] | None:
+        """Huts of the same request or of cached tiles, `None` if nothing is cached for this area."""
+        huts = _get_huts_from_source.peek(
+            api=api, bbox=bbox, limit=limit, offset=offset, fast=self.fast, lean=lean, **kwargs
+        )
+        if huts is not MISSING:
+            return t.cast(list[OsmHutSource], huts)
+        spatial = t.cast(SpatialCache[OsmHutSource], self.spatial_cache)
+        huts = spatial.query(
+            bbox, fetch=lambda strip: self._fetch(api, strip, lean=lean), api=api, fast=self.fast, lean=lean
+        )
+        return None if huts is None else huts[offset : offset + limit]
+
+    def _populate(self, api: Overpass, bbox: BBox, huts: list[OsmHutSource], lean: bool = False) -> None:
+        if self.spatial_cache is not None:
+            self.spatial_cache.populate(bbox, huts, api=api, fast=self.fast, lean=lean)
+
+    async def convert_async(self, src: t.Mapping | t.Any, include_photos: bool = True) -> HutSchema:
+        return self.convert(src, include_photos=include_photos)  # no requests needed
+
     def convert(self, src: t.Mapping | t.Any, include_photos: bool = True) -> HutSchema:
         hut_src = (
             OsmHutSource(**src)
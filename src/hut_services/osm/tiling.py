@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import typing as t
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import httpx
+from overpy import exception  # type: ignore[import-untyped]
+from pydantic import BaseModel
+
+from hut_services.core.schema.geo import BBox, bbox_grid, bbox_split
+from hut_services.osm.schema import OsmHutSchema, OsmHutSource
+
+__all__ = ["SWITZERLAND", "OverpassTiling", "aharvest_tiles", "harvest_tiles"]
+
+logger = logging.getLogger(__name__)
+
+SWITZERLAND: BBox = (45.7553, 5.7127, 47.6203, 10.5796)  # Overpass order (south, west, north, east)
+
+# a tile which fails with one of these is split into its quadrants
+_TIMEOUTS = (exception.OverpassGatewayTimeout, exception.OverpassRuntimeError, httpx.TimeoutException)
+
+
+class OverpassTiling(BaseModel):
+    """Tiled harvesting of large regions with Overpass.
+
+    The region is covered with tiles of `size` which are fetched concurrently. A tile which times out,
+    or returns `max_elements` (it might be truncated), is split into its four quadrants (adaptive quadtree).
+
+    Attributes:
+        size: Edge length of the initial tiles in degrees.
+        slots: Number of tiles fetched at the same time, Overpass servers only allow a few slots per client.
+        max_depth: How often a tile is split at most, the error is raised if the smallest tile still times out.
+        max_elements: Maximal number of elements of a tile query.
+        timeout: Server side timeout of a tile query in seconds.
+    """
+
+    size: float = 1.0
+    slots: int = 2
+    max_depth: int = 4
+    max_elements: int = 2000
+    timeout: int = 90
+
+
+def _merge(huts: dict[tuple[str, int], OsmHutSource], tile_huts: list[OsmHutSource]) -> None:
+    """Adds the huts of a tile, ways crossing a tile border are returned by each tile."""
+    for hut in tile_huts:
+        osm_hut = t.cast(OsmHutSchema, hut.source_data)
+        huts[(str(osm_hut.osm_type), osm_hut.osm_id)] = hut
+
+
+def _subtiles(
+    tile: BBox, depth: int, tile_huts: list[OsmHutSource] | None, error: Exception | None, tiling: OverpassTiling
+) -> list[BBox]:
+    """Quadrants of a tile which has to be fetched again, raises `error` if it cannot be split anymore."""
+    if error is not None:
+        if depth >= tiling.max_depth:
+            raise error
+        logger.info(f"overpass tile {tile} timed out, split it ({type(error).__name__})")
+        return bbox_split(tile)
+    if tile_huts is not None and len(tile_huts) >= tiling.max_elements:
+        if depth >= tiling.max_depth:
+            logger.warning(f"overpass tile {tile} is truncated to {tiling.max_elements} elements")
+            return []
+        logger.info(f"overpass tile {tile} is full, split it")
+        return bbox_split(tile)
+    return []
+
+
+def _sorted(huts: dict[tuple[str, int], OsmHutSource]) -> list[OsmHutSource]:
+    logger.info(f"succesfully got {len(huts)} huts from tiles")
+    return [huts[key] for key in sorted(huts)]
+
+
+def harvest_tiles(
+    fetch: t.Callable[[BBox], list[OsmHutSource]], bbox: BBox, tiling: OverpassTiling
+) -> list[OsmHutSource]:
+    """Fetches a large region tile by tile with `tiling.slots` threads.
+
+    Args:
+        fetch: Returns the huts of a tile, raises on timeouts (e.g. `OverpassGatewayTimeout`).
+        bbox: Region to fetch.
+        tiling: Tiling options.
+
+    Returns:
+        Huts of all tiles without duplicates, ordered by osm type and id.
+    """
+    huts: dict[tuple[str, int], OsmHutSource] = {}
+    with ThreadPoolExecutor(max_workers=tiling.slots, thread_name_prefix="overpass-tile") as executor:
+        pending: dict[Future[list[OsmHutSource]], tuple[BBox, int]] = {
+            executor.submit(fetch, tile): (tile, 0) for tile in bbox_grid(bbox, tiling.size)
+        }
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tile, depth = pending.pop(future)
+                    tile_huts, error = None, None
+                    try:
+                        tile_huts = future.result()
+                    except _TIMEOUTS as e:
+                        error = e
+                    subtiles = _subtiles(tile, depth, tile_huts, error, tiling)
+                    _merge(huts, tile_huts or [])
+                    pending.update({executor.submit(fetch, sub): (sub, depth + 1) for sub in subtiles})
+        except BaseException:
+            for future in pending:  # do not wait for the queued tiles
+                future.cancel()
+            raise
+    return _sorted(huts)
+
+
+async def aharvest_tiles(
+    fetch: t.Callable[[BBox], t.Awaitable[list[OsmHutSource]]], bbox: BBox, tiling: OverpassTiling
+) -> list[OsmHutSource]:
+    """Async version of [`harvest_tiles()`][hut_services.osm.tiling.harvest_tiles],
+    `tiling.slots` tiles are fetched at the same time."""
+    huts: dict[tuple[str, int], OsmHutSource] = {}
+    semaphore = asyncio.Semaphore(tiling.slots)
+
+    async def harvest(tile: BBox, depth: int) -> None:
+        tile_huts, error = None, None
+        try:
+            async with semaphore:
+                tile_huts = await fetch(tile)
+        except _TIMEOUTS as e:
+            error = e
+        subtiles = _subtiles(tile, depth, tile_huts, error, tiling)
+        _merge(huts, tile_huts or [])
+        await asyncio.gather(*[harvest(sub, depth + 1) for sub in subtiles])
+
+    await asyncio.gather(*[harvest(tile, 0) for tile in bbox_grid(bbox, tiling.size)])
+    return _sorted(huts)
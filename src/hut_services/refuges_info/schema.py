@@ -2,6 +2,7 @@ import logging
 from enum import Enum
 from typing import Literal, cast
 
+import httpx
 from geojson_pydantic import Feature, FeatureCollection, Point
 from pydantic import BaseModel, Field, computed_field
 
@@ -170,6 +171,47 @@ class RefugesInfoFeature(Feature, SourceDataSchema):
         )
 
 
+class _LeanCoord(BaseModel):
+    alt: float | None = None
+
+
+class _LeanType(BaseModel):
+    ident: int = Field(..., alias="id")
+
+
+class _RefugesInfoLeanProperties(BaseModel):
+    ident: int = Field(..., alias="id")
+    nom: str
+    lien: str | None = None
+    coord: _LeanCoord | None = None
+    hut_type: _LeanType | None = Field(None, alias="type")
+
+
+class RefugesInfoLeanFeature(Feature):
+    """RefugesInfo Feature with the few properties of `detail=simple`, only used for lean requests."""
+
+    geometry: Point
+    properties: _RefugesInfoLeanProperties
+
+    def get_id(self) -> str:
+        return str(self.properties.ident)
+
+    def get_name(self) -> str:
+        return str(self.properties.nom).strip().strip('"').strip()
+
+    def get_location(self) -> LocationEleSchema:
+        lon, lat = self.geometry.coordinates[0], self.geometry.coordinates[1]
+        lat, lon = CORRECTIONS.get(self.properties.ident, (lat, lon))
+        return LocationEleSchema(lat=lat, lon=lon, ele=self.properties.coord.alt if self.properties.coord else None)
+
+    def get_properties(self) -> RefugesInfoProperties:
+        slug = self.properties.lien.split("/")[-2] if self.properties.lien else self.get_id()
+        type_id = self.properties.hut_type.ident if self.properties.hut_type else None
+        return RefugesInfoProperties(
+            hut_type=REFUGES_HUT_TYPES.get(type_id or 0, HutTypeRefugesEnum.missing), slug=slug
+        )
+
+
 class RefugesInfoFeatureCollection(FeatureCollection):
     """Used to get FeatureCollection, not returned by the service."""
 
@@ -257,7 +299,11 @@ class RefugesInfoHut0Convert(BaseHutConverterSchema[RefugesInfoFeature]):
     def photos(self) -> list[PhotoSchema]:
         if self.include_photos is False:
             return []
-        return cast(list[PhotoSchema], get_original_images(self.source_data.get_id()))
+        try:
+            return cast(list[PhotoSchema], get_original_images(self.source_data.get_id()))
+        except httpx.HTTPError as e:  # not cached, tried again next time
+            logger.warning(f"Could not get photos for refuges.info hut {self.source_data.get_id()}: {e}")
+            return []
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -1,23 +1,32 @@
 #!/usr/bin/env python
 # from functools import lru_cache
-import json
+import asyncio
+import collections
+import contextlib
+import itertools
 import logging
 import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import httpx
 import xmltodict
 from easydict import EasyDict  # type: ignore[import-untyped]
 
-from hut_services.core.cache import file_cache
+from hut_services.core.cache import MISSING, Codec, SpatialCache, canonical, file_cache
+from hut_services.core.http import get_async_http_client, get_http_client
 from hut_services.core.schema import HutSchema
 from hut_services.core.schema.geo import BBox
 from hut_services.core.service import BaseService
+from hut_services.core.utils import JsonArrayParser, aiter_json_array, iter_json_array
 from hut_services.refuges_info.massif import MASSIF_ALPES
 from hut_services.refuges_info.schema import (
+    RefugesInfoFeature,
     RefugesInfoFeatureCollection,
     RefugesInfoHut0Convert,
     RefugesInfoHutSource,
+    RefugesInfoLeanFeature,
 )
+from hut_services.refuges_info.utils import get_original_images_async
 
 if __name__ == "__main__":  # only for testing
     from rich import print as rprint  # noqa: F401, RUF100
@@ -28,19 +37,26 @@ if __name__ == "__main__":  # only for testing
 
 logger = logging.getLogger(__name__)
 
+stream_chunk_size = 64 * 1024
 
-@file_cache()
-def refuges_info_request(
+
+def _refuges_info_request_key(args: dict[str, t.Any]) -> t.Hashable:
+    # the order of the ids does not matter, bbox is rounded
+    ids = {"massif": tuple(sorted(args["massif"] or ())), "type_points": tuple(sorted(args["type_points"]))}
+    return canonical({**args, **ids})
+
+
+def _request_params(
     url: str,
-    limit: str | int = "all",
-    type_points: t.Sequence[int] = [7, 10, 9, 28],
-    massif: t.Sequence[int] | None = MASSIF_ALPES,
-    bbox: BBox | None = None,
-    text_format: t.Literal["texte", "markdown", "html"] = "markdown",
-    output_format: t.Literal["geojson", "xml", "csv"] = "geojson",
-    detail: bool = True,
-    **params: t.Any,
-) -> RefugesInfoFeatureCollection | t.Any | bytes:
+    limit: str | int,
+    type_points: t.Sequence[int],
+    massif: t.Sequence[int] | None,
+    bbox: BBox | None,
+    text_format: str,
+    output_format: str,
+    detail: bool,
+    params: dict[str, t.Any],
+) -> tuple[str, dict[str, t.Any]]:
     # https://www.refuges.info/api/massif?nb_points=all&format=xml&type_points=7,10,9,28&massif=12,339,407,45,342,20,29,343,412,8,344,408,432,406,52,9
     params["nb_points"] = limit
     params["type_points"] = ",".join([str(t) for t in type_points])
@@ -57,16 +73,261 @@ def refuges_info_request(
         url = url + "/bbox"
     else:
         raise NotImplementedError("Either 'massif', or 'bbox' required.")
-    r = httpx.get(url, params=params, timeout=10)
+    return url, params
+
+
+def _feature_collection(chunks: t.Iterable[bytes]) -> RefugesInfoFeatureCollection:
+    """Validates the features one at a time while the JSON is parsed, the JSON tree is never built as a whole."""
+    parser = JsonArrayParser("features")
+    features = [RefugesInfoFeature.model_validate(f) for chunk in chunks for f in parser.feed(chunk)]
+    features.extend(RefugesInfoFeature.model_validate(f) for f in parser.close())
+    return RefugesInfoFeatureCollection(**parser.fields, features=features)
+
+
+def _parse_response(r: httpx.Response, output_format: str) -> RefugesInfoFeatureCollection | t.Any | bytes:
     logger.debug(f"request url: {r.url}")
+    r.raise_for_status()  # error pages are not cached
     if output_format == "geojson":
-        data = json.loads(r.content)
-        return RefugesInfoFeatureCollection(**data)
+        return _feature_collection(r.iter_bytes(stream_chunk_size))
     if output_format == "xml":
         return EasyDict(xmltodict.parse(r.content))
     return r.content
 
 
+def _iter_raw_features(
+    url: str, params: dict[str, t.Any], client: httpx.Client | None = None
+) -> t.Iterator[dict[str, t.Any]]:
+    """Raw features of a GeoJSON response, streamed past the HTTP cache (which would buffer the whole body)."""
+    client = client if client is not None else get_http_client()
+    with client.stream("GET", url, params=params, timeout=10, headers={"Cache-Control": "no-store"}) as r:
+        logger.debug(f"request url: {r.url}")
+        r.raise_for_status()
+        yield from iter_json_array(r.iter_bytes(stream_chunk_size), "features")
+
+
+async def _aiter_raw_features(
+    url: str, params: dict[str, t.Any], client: httpx.AsyncClient | None = None
+) -> t.AsyncIterator[dict[str, t.Any]]:
+    client = client if client is not None else get_async_http_client()
+    async with client.stream("GET", url, params=params, timeout=10, headers={"Cache-Control": "no-store"}) as r:
+        logger.debug(f"request url: {r.url}")
+        r.raise_for_status()
+        async for feature in aiter_json_array(r.aiter_bytes(stream_chunk_size), "features"):
+            yield feature
+
+
+def iter_refuges_info_features(
+    url: str,
+    limit: str | int = "all",
+    type_points: t.Sequence[int] = [7, 10, 9, 28],
+    massif: t.Sequence[int] | None = MASSIF_ALPES,
+    bbox: BBox | None = None,
+    text_format: t.Literal["texte", "markdown", "html"] = "markdown",
+    detail: bool = True,
+    client: httpx.Client | None = None,
+    **params: t.Any,
+) -> t.Iterator[RefugesInfoFeature]:
+    """Streams the features of a refuges.info request, each feature is yielded as soon as it is downloaded.
+
+    Memory use does not grow with the size of the response. Nothing is cached (the HTTP cache of the client
+    is bypassed as well), use [`refuges_info_request()`][hut_services.refuges_info.service.refuges_info_request]
+    for cached requests.
+
+    Args: See `refuges_info_request()` (the output format is always GeoJSON).
+
+    Yields:
+        Validated features.
+    """
+    url, params = _request_params(url, limit, type_points, massif, bbox, text_format, "geojson", detail, params)
+    for feature in _iter_raw_features(url, params, client):
+        yield RefugesInfoFeature.model_validate(feature)
+
+
+async def aiter_refuges_info_features(
+    url: str,
+    limit: str | int = "all",
+    type_points: t.Sequence[int] = [7, 10, 9, 28],
+    massif: t.Sequence[int] | None = MASSIF_ALPES,
+    bbox: BBox | None = None,
+    text_format: t.Literal["texte", "markdown", "html"] = "markdown",
+    detail: bool = True,
+    client: httpx.AsyncClient | None = None,
+    **params: t.Any,
+) -> t.AsyncIterator[RefugesInfoFeature]:
+    """Async version of [`iter_refuges_info_features()`][hut_services.refuges_info.service.iter_refuges_info_features]."""
+    url, params = _request_params(url, limit, type_points, massif, bbox, text_format, "geojson", detail, params)
+    async for feature in _aiter_raw_features(url, params, client):
+        yield RefugesInfoFeature.model_validate(feature)
+
+
+@file_cache(
+    ignore=["client"],
+    key=_refuges_info_request_key,
+    stale_ttl=3600 * 24 * 7,  # serve up to one week old data while refreshing
+    codec=Codec("json", type_=RefugesInfoFeatureCollection),  # xml (EasyDict) falls back to pickle
+)
+def refuges_info_request(
+    url: str,
+    limit: str | int = "all",
+    type_points: t.Sequence[int] = [7, 10, 9, 28],
+    massif: t.Sequence[int] | None = MASSIF_ALPES,
+    bbox: BBox | None = None,
+    text_format: t.Literal["texte", "markdown", "html"] = "markdown",
+    output_format: t.Literal["geojson", "xml", "csv"] = "geojson",
+    detail: bool = True,
+    client: httpx.Client | None = None,
+    **params: t.Any,
+) -> RefugesInfoFeatureCollection | t.Any | bytes:
+    url, params = _request_params(url, limit, type_points, massif, bbox, text_format, output_format, detail, params)
+    client = client if client is not None else get_http_client()
+    r = client.get(url, params=params, timeout=10)  # revalidated with ETag/Last-Modified
+    return _parse_response(r, output_format)
+
+
+@refuges_info_request.register_async
+async def refuges_info_request_async(
+    url: str,
+    limit: str | int = "all",
+    type_points: t.Sequence[int] = [7, 10, 9, 28],
+    massif: t.Sequence[int] | None = MASSIF_ALPES,
+    bbox: BBox | None = None,
+    text_format: t.Literal["texte", "markdown", "html"] = "markdown",
+    output_format: t.Literal["geojson", "xml", "csv"] = "geojson",
+    detail: bool = True,
+    client: httpx.AsyncClient | None = None,
+    **params: t.Any,
+) -> RefugesInfoFeatureCollection | t.Any | bytes:
+    url, params = _request_params(url, limit, type_points, massif, bbox, text_format, output_format, detail, params)
+    client = client if client is not None else get_async_http_client()
+    r = await client.get(url, params=params, timeout=10)
+    return _parse_response(r, output_format)
+
+
+def _hut_from_feature(feature: RefugesInfoFeature) -> RefugesInfoHutSource:
+    return RefugesInfoHutSource(
+        name=feature.get_name(),
+        source_data=feature,
+        source_id=feature.get_id(),
+        location=feature.get_location(),
+        source_properties=feature.get_properties(),
+    )
+
+
+def _fetch_huts(
+    url: str,
+    type_points: t.Sequence[int],
+    bbox: BBox | None = None,
+    massif: t.Sequence[int] | None = None,
+    client: httpx.Client | None = None,
+) -> list[RefugesInfoHutSource]:
+    """All huts of a boundary box or of massifs (not cached)."""
+    features = iter_refuges_info_features(url, bbox=bbox, massif=massif, type_points=type_points, client=client)
+    return [_hut_from_feature(feature) for feature in features]
+
+
+@file_cache(
+    ignore=["client"],
+    stale_ttl=3600 * 24 * 7,  # serve up to one week old data while refreshing
+    codec=Codec("json", type_=list[RefugesInfoHutSource]),
+)
+def _get_massif_huts(
+    url: str, massif: int, type_points: t.Sequence[int] = (7, 10, 9, 28), client: httpx.Client | None = None
+) -> list[RefugesInfoHutSource]:
+    """All huts of one massif, each massif is cached (and refreshed) on its own."""
+    return _fetch_huts(url, type_points=type_points, massif=[massif], client=client)
+
+
+@_get_massif_huts.register_async
+async def _get_massif_huts_async(
+    url: str, massif: int, type_points: t.Sequence[int] = (7, 10, 9, 28), client: httpx.AsyncClient | None = None
+) -> list[RefugesInfoHutSource]:
+    features = aiter_refuges_info_features(url, massif=[massif], type_points=type_points, client=client)
+    return [_hut_from_feature(feature) async for feature in features]
+
+
+@file_cache(
+    ignore=["client"],
+    stale_ttl=3600 * 24 * 7,
+    codec=Codec("json", type_=list[RefugesInfoHutSource]),
+)
+def _get_tile_huts(
+    url: str, bbox: BBox, type_points: t.Sequence[int] = (7, 10, 9, 28), client: httpx.Client | None = None
+) -> list[RefugesInfoHutSource]:
+    """All huts of a tile of the spatial cache."""
+    return _fetch_huts(url, type_points=type_points, bbox=bbox, client=client)
+
+
+spatial_cache: SpatialCache[RefugesInfoHutSource] = SpatialCache(_get_tile_huts, tile_size=0.5)
+
+
+def _lean_hut_from_feature(feature: dict[str, t.Any]) -> RefugesInfoHutSource:
+    """Hut without `source_data` from a `detail=simple` feature."""
+    lean = RefugesInfoLeanFeature.model_validate(feature)
+    return RefugesInfoHutSource(
+        name=lean.get_name(),
+        source_id=lean.get_id(),
+        location=lean.get_location(),
+        source_properties=lean.get_properties(),
+    )
+
+
+@file_cache(
+    ignore=["client"],
+    key=_refuges_info_request_key,
+    stale_ttl=3600 * 24 * 7,
+    codec=Codec("json", type_=list[RefugesInfoHutSource]),
+)
+def _get_lean_huts(
+    url: str,
+    limit: str | int = "all",
+    type_points: t.Sequence[int] = (7, 10, 9, 28),
+    massif: t.Sequence[int] | None = None,
+    bbox: BBox | None = None,
+    client: httpx.Client | None = None,
+    **params: t.Any,
+) -> list[RefugesInfoHutSource]:
+    """Huts with the minimal data of `detail=simple` (id, name, location, type and link)."""
+    url, params = _request_params(url, limit, type_points, massif, bbox, "texte", "geojson", False, params)
+    return [_lean_hut_from_feature(feature) for feature in _iter_raw_features(url, params, client)]
+
+
+@_get_lean_huts.register_async
+async def _get_lean_huts_async(
+    url: str,
+    limit: str | int = "all",
+    type_points: t.Sequence[int] = (7, 10, 9, 28),
+    massif: t.Sequence[int] | None = None,
+    bbox: BBox | None = None,
+    client: httpx.AsyncClient | None = None,
+    **params: t.Any,
+) -> list[RefugesInfoHutSource]:
+    url, params = _request_params(url, limit, type_points, massif, bbox, "texte", "geojson", False, params)
+    return [_lean_hut_from_feature(feature) async for feature in _aiter_raw_features(url, params, client)]
+
+
+def _point_params(ident: int) -> dict[str, t.Any]:
+    return {"id": ident, "format": "geojson", "format_texte": "markdown", "detail": "complet"}
+
+
+@file_cache(
+    ignore=["client"],
+    stale_ttl=3600 * 24 * 7,
+    codec=Codec("json", type_=list[RefugesInfoHutSource]),
+)
+def _get_point_huts(url: str, ident: int, client: httpx.Client | None = None) -> list[RefugesInfoHutSource]:
+    """Full record of one hut (`/point` endpoint), empty if it does not exist anymore."""
+    features = _iter_raw_features(url + "/point", _point_params(ident), client)
+    return [_hut_from_feature(RefugesInfoFeature.model_validate(feature)) for feature in features]
+
+
+@_get_point_huts.register_async
+async def _get_point_huts_async(
+    url: str, ident: int, client: httpx.AsyncClient | None = None
+) -> list[RefugesInfoHutSource]:
+    features = _aiter_raw_features(url + "/point", _point_params(ident), client)
+    return [_hut_from_feature(RefugesInfoFeature.model_validate(feature)) async for feature in features]
+
+
 class RefugesInfoService(BaseService[RefugesInfoHutSource]):
     """Service to get huts from
     [refuges.info](https://www.refuges.info)
@@ -75,11 +336,31 @@ class RefugesInfoService(BaseService[RefugesInfoHutSource]):
     Note:
         The methods are descriebed in [`BaseService`][hut_services.BaseService].
 
+    Huts of massifs (e.g. the default `MASSIF_ALPES`) are fetched concurrently and cached per massif,
+    fetching stops as soon as `limit` huts are found. If a massif cannot be fetched the error is raised
+    (instead of returning the huts of the other massifs only), the massifs fetched so far stay cached.
+
+    With `lean=True` (`get_huts_from_source()`) only id, name, location and type of the huts are fetched
+    (`detail=simple`, one request without the spatial or per massif cache) and `source_data` is not set,
+    the full record of a hut is loaded with `get_hut_from_source()`.
+
+    Attributes:
+        massif_concurrency: Maximal number of massifs fetched at the same time.
     """
 
-    def __init__(self, request_url: str = "https://www.refuges.info/api"):
-        super().__init__(support_bbox=True, support_limit=True, support_offset=False, support_convert=True)
+    massif_concurrency: t.ClassVar[int] = 4
+
+    def __init__(
+        self,
+        request_url: str = "https://www.refuges.info/api",
+        http_client: httpx.Client | None = None,
+        spatial_cache: SpatialCache[RefugesInfoHutSource] | None = spatial_cache,
+    ):
+        super().__init__(
+            support_bbox=True, support_limit=True, support_offset=False, support_convert=True, http_client=http_client
+        )
         self.request_url = request_url
+        self.spatial_cache = spatial_cache
 
     def get_huts_from_source(
         self,
@@ -90,28 +371,325 @@ class RefugesInfoService(BaseService[RefugesInfoHutSource]):
         # massif: Sequence[int] = [12, 339, 407, 45, 342, 20, 29, 343, 412, 8, 344, 408, 432, 406, 52, 9],
         **kwargs: t.Any,
     ) -> list[RefugesInfoHutSource]:
-        type_points: t.Sequence[int] = kwargs.get("type_points", [7, 10, 9, 28])
-        massif: t.Sequence[int] | None = kwargs.get("massif", MASSIF_ALPES if not bbox else None)
+        type_points: t.Sequence[int] = kwargs.pop("type_points", [7, 10, 9, 28])
+        massif: t.Sequence[int] | None = kwargs.pop("massif", MASSIF_ALPES if not bbox else None)
         # "massif", [12, 339, 407, 45, 342, 20, 29, 343, 412, 8, 344, 408, 432, 406, 52, 9] if not bbox else None
+        if kwargs.pop("lean", False):
+            return t.cast(
+                list[RefugesInfoHutSource],
+                _get_lean_huts(self.request_url, limit, type_points, massif, bbox, client=self.http_client, **kwargs),
+            )
+        spatial = self.spatial_cache is not None and bbox is not None and not massif and not kwargs
+        if spatial:
+            cached = self._cached_huts(t.cast(BBox, bbox), limit, type_points)
+            if cached is not None:
+                return cached
+        if massif and not bbox and not kwargs:
+            return self._massif_huts(massif, type_points, limit)
 
         logger.info(f"get refuges.info data from {self.request_url}")
         fc: RefugesInfoFeatureCollection = refuges_info_request(
-            url=self.request_url, bbox=bbox, limit=limit, type_points=type_points, massif=massif, detail=True, **kwargs
+            url=self.request_url,
+            bbox=bbox,
+            limit=limit,
+            type_points=type_points,
+            massif=massif,
+            detail=True,
+            client=self.http_client,
+            **kwargs,
+        )
+        huts = self._huts_from_features(fc)
+        if spatial and len(huts) < limit:  # all huts of the bbox
+            self._populate(t.cast(BBox, bbox), huts, type_points)
+        return huts
+
+    async def get_huts_from_source_async(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
+    ) -> list[RefugesInfoHutSource]:
+        type_points: t.Sequence[int] = kwargs.pop("type_points", [7, 10, 9, 28])
+        massif: t.Sequence[int] | None = kwargs.pop("massif", MASSIF_ALPES if not bbox else None)
+        if kwargs.pop("lean", False):
+            return t.cast(
+                list[RefugesInfoHutSource],
+                await _get_lean_huts_async(
+                    self.request_url, limit, type_points, massif, bbox, client=self.async_http_client, **kwargs
+                ),
+            )
+        spatial = self.spatial_cache is not None and bbox is not None and not massif and not kwargs
+        if spatial:
+            cached = await asyncio.to_thread(self._cached_huts, t.cast(BBox, bbox), limit, type_points)
+            if cached is not None:
+                return cached
+        if massif and not bbox and not kwargs:
+            return await self._massif_huts_async(massif, type_points, limit)
+        logger.info(f"get refuges.info data from {self.request_url}")
+        fc: RefugesInfoFeatureCollection = await refuges_info_request_async(
+            url=self.request_url,
+            bbox=bbox,
+            limit=limit,
+            type_points=type_points,
+            massif=massif,
+            detail=True,
+            client=self.async_http_client,
+            **kwargs,
+        )
+        huts = self._huts_from_features(fc)
+        if spatial and len(huts) < limit:
+            await asyncio.to_thread(self._populate, t.cast(BBox, bbox), huts, type_points)
+        return huts
+
+    def iter_huts_from_source(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
+    ) -> t.Iterator[RefugesInfoHutSource]:
+        """Huts which are not cached yet are streamed from refuges.info, massifs are fetched concurrently
+        and yielded one after the other.
+
+        Massifs are cached per massif, other streamed responses are not cached
+        (see [`iter_refuges_info_features()`][hut_services.refuges_info.service.iter_refuges_info_features]).
+        Errors are raised, also after the first huts were yielded."""
+        type_points: t.Sequence[int] = kwargs.pop("type_points", [7, 10, 9, 28])
+        massif: t.Sequence[int] | None = kwargs.pop("massif", MASSIF_ALPES if not bbox else None)
+        if kwargs.pop("lean", False):
+            yield from self.get_huts_from_source(
+                bbox, limit, offset, type_points=type_points, massif=massif, lean=True, **kwargs
+            )
+            return
+        if massif and not bbox and not kwargs:
+            yield from itertools.islice(self._iter_massif_huts(massif, type_points), limit)
+            return
+        cached = self._peek(bbox, limit, type_points, massif, **kwargs)
+        if cached is not None:
+            yield from cached
+            return
+        features = iter_refuges_info_features(
+            self.request_url, limit, type_points, massif, bbox, detail=True, client=self.http_client, **kwargs
+        )
+        for feature in features:
+            yield _hut_from_feature(feature)
+
+    async def aiter_huts_from_source(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: t.Any
+    ) -> t.AsyncIterator[RefugesInfoHutSource]:
+        type_points: t.Sequence[int] = kwargs.pop("type_points", [7, 10, 9, 28])
+        massif: t.Sequence[int] | None = kwargs.pop("massif", MASSIF_ALPES if not bbox else None)
+        if kwargs.pop("lean", False):
+            huts = await self.get_huts_from_source_async(
+                bbox, limit, offset, type_points=type_points, massif=massif, lean=True, **kwargs
+            )
+            for hut in huts:
+                yield hut
+            return
+        if massif and not bbox and not kwargs:
+            async with contextlib.aclosing(self._aiter_massif_huts(massif, type_points, limit)) as massif_huts:
+                async for hut in massif_huts:
+                    yield hut
+            return
+        cached = await asyncio.to_thread(self._peek, bbox, limit, type_points, massif, **kwargs)
+        if cached is not None:
+            for hut in cached:
+                yield hut
+            return
+        features = aiter_refuges_info_features(
+            self.request_url, limit, type_points, massif, bbox, detail=True, client=self.async_http_client, **kwargs
         )
-        huts = []
-        for feature in fc.features:
-            # rprint(fc)
-            refuges_hut = RefugesInfoHutSource(
-                name=feature.get_name(),
-                source_data=feature,
-                source_id=feature.get_id(),
-                location=feature.get_location(),
-                source_properties=feature.get_properties(),
+        async for feature in features:
+            yield _hut_from_feature(feature)
+
+    def _peek(
+        self,
+        bbox: BBox | None,
+        limit: int,
+        type_points: t.Sequence[int],
+        massif: t.Sequence[int] | None,
+        **kwargs: t.Any,
+    ) -> list[RefugesInfoHutSource] | None:
+        """Cached huts of a request (including the spatial cache), `None` if they have to be fetched."""
+        if self.spatial_cache is not None and bbox is not None and not massif and not kwargs:
+            return self._cached_huts(bbox, limit, type_points)
+        fc = refuges_info_request.peek(
+            url=self.request_url,
+            bbox=bbox,
+            limit=limit,
+            type_points=type_points,
+            massif=massif,
+            detail=True,
+            client=self.http_client,
+            **kwargs,
+        )
+        return None if fc is MISSING else self._huts_from_features(fc)
+
+    def get_hut_from_source(self, src: t.Mapping | t.Any) -> RefugesInfoHutSource:
+        ident = self._ident(src)
+        return self._found(_get_point_huts(self.request_url, ident, client=self.http_client), ident)
+
+    async def get_hut_from_source_async(self, src: t.Mapping | t.Any) -> RefugesInfoHutSource:
+        ident = self._ident(src)
+        return self._found(await _get_point_huts_async(self.request_url, ident, client=self.async_http_client), ident)
+
+    @staticmethod
+    def _ident(src: t.Mapping | t.Any) -> int:
+        hut_src = (
+            RefugesInfoHutSource(**src)
+            if isinstance(src, t.Mapping)
+            else RefugesInfoHutSource.model_validate(src, from_attributes=True)
+        )
+        return int(hut_src.source_id)
+
+    @staticmethod
+    def _found(huts: list[RefugesInfoHutSource], ident: int) -> RefugesInfoHutSource:
+        if not huts:
+            err_msg = f"refuges.info hut {ident} does not exist (anymore)."
+            raise LookupError(err_msg)
+        return huts[0]
+
+    def _massif_huts(
+        self, massif: t.Sequence[int], type_points: t.Sequence[int], limit: int
+    ) -> list[RefugesInfoHutSource]:
+        """First `limit` huts of the massifs, fetched concurrently and cached per massif."""
+        huts = list(itertools.islice(self._iter_massif_huts(massif, type_points), limit))
+        logger.info(f"succesfully got {len(huts)} huts")
+        return huts
+
+    async def _massif_huts_async(
+        self, massif: t.Sequence[int], type_points: t.Sequence[int], limit: int
+    ) -> list[RefugesInfoHutSource]:
+        async with contextlib.aclosing(self._aiter_massif_huts(massif, type_points, limit)) as massif_huts:
+            huts = [hut async for hut in massif_huts]
+        logger.info(f"succesfully got {len(huts)} huts")
+        return huts
+
+    def _iter_massif_huts(
+        self, massif: t.Sequence[int], type_points: t.Sequence[int]
+    ) -> t.Iterator[RefugesInfoHutSource]:
+        """Huts of all massifs in the order of the massifs, each massif is yielded as soon as it is fetched.
+
+        The error of a massif which cannot be fetched is raised, the remaining massifs are cancelled.
+        """
+        logger.info(f"get refuges.info data of {len(massif)} massifs from {self.request_url}")
+        massifs = iter(dict.fromkeys(massif))
+        pending: collections.deque[Future[list[RefugesInfoHutSource]]] = collections.deque()
+        executor = ThreadPoolExecutor(max_workers=self.massif_concurrency, thread_name_prefix="refuges-massif")
+
+        def submit() -> None:
+            m = next(massifs, None)
+            if m is not None:
+                pending.append(
+                    executor.submit(_get_massif_huts, self.request_url, m, type_points, client=self.http_client)
+                )
+
+        def results() -> t.Iterator[list[RefugesInfoHutSource]]:
+            for _ in range(self.massif_concurrency):
+                submit()
+            while pending:
+                huts = pending.popleft().result()
+                submit()  # at most `massif_concurrency` massifs are fetched ahead
+                yield huts
+
+        try:
+            yield from self._unique(results())
+        finally:
+            executor.shutdown(cancel_futures=True)  # stopped early or failed
+
+    async def _aiter_massif_huts(
+        self, massif: t.Sequence[int], type_points: t.Sequence[int], limit: int
+    ) -> t.AsyncGenerator[RefugesInfoHutSource, None]:
+        if limit <= 0:
+            return
+        logger.info(f"get refuges.info data of {len(massif)} massifs from {self.request_url}")
+        massifs = iter(dict.fromkeys(massif))
+        pending: collections.deque[asyncio.Task[list[RefugesInfoHutSource]]] = collections.deque()
+
+        async def fetch(m: int) -> list[RefugesInfoHutSource]:
+            return t.cast(
+                list[RefugesInfoHutSource],
+                await _get_massif_huts_async(self.request_url, m, type_points, client=self.async_http_client),
             )
-            huts.append(refuges_hut)
+
+        def submit() -> None:
+            m = next(massifs, None)
+            if m is not None:
+                pending.append(asyncio.ensure_future(fetch(m)))
+
+        try:
+            for _ in range(self.massif_concurrency):
+                submit()
+            seen: set[str] = set()
+            while pending:
+                huts = await pending[0]
+                pending.popleft()
+                submit()
+                for hut in huts:
+                    if hut.source_id not in seen:
+                        seen.add(hut.source_id)
+                        yield hut
+                        if len(seen) >= limit:
+                            return
+        finally:
+            for task in pending:  # stopped early or failed
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    @staticmethod
+    def _unique(results: t.Iterable[list[RefugesInfoHutSource]]) -> t.Iterator[RefugesInfoHutSource]:
+        """Huts of all massifs, huts listed in more than one massif are only yielded once."""
+        seen: set[str] = set()
+        for massif_huts in results:
+            for hut in massif_huts:
+                if hut.source_id not in seen:
+                    seen.add(hut.source_id)
+                    yield hut
+
+    def _cached_huts(self, bbox: BBox, limit: int, type_points: t.Sequence[int]) -> list[RefugesInfoHutSource] | None:
+        """Huts of the same request or of cached tiles, `None` if nothing is cached for this area."""
+        fc = refuges_info_request.peek(
+            url=self.request_url,
+            bbox=bbox,
+            limit=limit,
+            type_points=type_points,
+            massif=None,
+            detail=True,
+            client=self.http_client,
+        )
+        if fc is not MISSING:
+            return self._huts_from_features(fc)
+        huts = t.cast(SpatialCache[RefugesInfoHutSource], self.spatial_cache).query(
+            bbox,
+            fetch=lambda strip: _fetch_huts(self.request_url, type_points, bbox=strip, client=self.http_client),
+            url=self.request_url,
+            type_points=type_points,
+            client=self.http_client,
+        )
+        return None if huts is None else huts[:limit]
+
+    def _populate(self, bbox: BBox, huts: list[RefugesInfoHutSource], type_points: t.Sequence[int]) -> None:
+        if self.spatial_cache is not None:
+            self.spatial_cache.populate(
+                bbox, huts, url=self.request_url, type_points=type_points, client=self.http_client
+            )
+
+    @staticmethod
+    def _huts_from_features(fc: RefugesInfoFeatureCollection) -> list[RefugesInfoHutSource]:
+        huts = [_hut_from_feature(feature) for feature in fc.features]
         logger.info(f"succesfully got {len(huts)} huts")
         return huts
 
+    async def convert_async(self, src: t.Mapping | t.Any, include_photos: bool = True) -> HutSchema:
+        hut_src = (
+            RefugesInfoHutSource(**src)
+            if isinstance(src, t.Mapping)
+            else RefugesInfoHutSource.model_validate(src, from_attributes=True)
+        )
+        hut = self.convert(hut_src, include_photos=False)
+        if not include_photos or hut_src.source_data is None:
+            return hut
+        hut_id = hut_src.source_data.get_id()
+        try:
+            photos = await get_original_images_async(hut_id, client=self.async_http_client)
+        except httpx.HTTPError as e:  # not cached, tried again next time
+            logger.warning(f"Could not get photos for refuges.info hut {hut_id}: {e}")
+            return hut
+        return hut.model_copy(update={"photos": photos})
+
     def convert(self, src: t.Mapping | t.Any, include_photos: bool = True) -> HutSchema:
         hut_src = (
             RefugesInfoHutSource(**src)
@@ -1,9 +1,8 @@
 import logging
-import time
 from io import BytesIO
 
 import dateparser
-import requests
+import httpx
 from bs4 import BeautifulSoup
 from PIL import ImageFile
 from pydantic_string_url import HttpUrl
@@ -12,13 +11,13 @@ from pydantic_string_url import HttpUrl
 from rich import print as rprint
 
 # from numpy import imag
-from hut_services.core.cache import file_cache
+from hut_services.core.cache import Codec, file_cache
+from hut_services.core.http import get_async_http_client, get_http_client
 from hut_services.core.schema._license import LicenseSchema, SourceSchema
 from hut_services.core.schema._photo import PhotoSchema
 from hut_services.core.schema.locale import TranslationSchema
 
 logging.getLogger("PIL").setLevel(logging.WARNING)
-logging.getLogger("requests").setLevel(logging.WARNING)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 logging.getLogger("chardet").setLevel(logging.WARNING)
 logging.getLogger("tzlocal").setLevel(logging.WARNING)
@@ -30,32 +29,53 @@ refuges_lic = LicenseSchema(
 )
 
 
-@file_cache(forever=True)
-def _get_image_size(url: HttpUrl, _delay: float = 0.2) -> tuple[int, int]:
-    response = requests.get(url, stream=True, timeout=15)
-    image_data = BytesIO()
-    image_file = ImageFile.Parser()
-    time.sleep(_delay)
-    for counter, chunk in enumerate(response.iter_content(4096)):
-        image_data.write(chunk)
-        image_file.feed(chunk)
-        if image_file.image:
-            logger.debug(f"Image size determined after {counter+1} iterations ({url})")
-            return image_file.image.size
+@file_cache(ignore=["client"], forever=True)
+def _get_image_size(url: HttpUrl, client: httpx.Client | None = None) -> tuple[int, int]:
+    client = client if client is not None else get_http_client()
+    # only the beginning of the image is downloaded, do not store it in the http cache
+    with client.stream("GET", str(url), timeout=15, headers={"Cache-Control": "no-store"}) as response:
+        response.raise_for_status()
+        image_data = BytesIO()
+        image_file = ImageFile.Parser()
+        for counter, chunk in enumerate(response.iter_bytes(4096)):
+            image_data.write(chunk)
+            image_file.feed(chunk)
+            if image_file.image:
+                logger.debug(f"Image size determined after {counter + 1} iterations ({url})")
+                return image_file.image.size
     return 0, 0
 
 
-@file_cache(forever=True)
-def _get_original_images_request(hut_id: str, _delay: float = 1.5) -> bytes:
+@file_cache(ignore=["client"], forever=True)
+def _get_original_images_request(hut_id: str, client: httpx.Client | None = None) -> bytes:
+    client = client if client is not None else get_http_client()
     url = f"https://www.refuges.info/point/{hut_id}"
-    response = requests.get(url, timeout=15)
-    time.sleep(_delay)
+    response = client.get(url, timeout=15, headers={"Cache-Control": "no-store"})  # cached forever above
+    response.raise_for_status()  # photo pages are throttled (see `HttpConfig.rate_limits`)
     return response.content
 
 
-@file_cache()
-def get_original_images(hut_id: str) -> list[PhotoSchema]:
-    soup = BeautifulSoup(_get_original_images_request(hut_id), "html.parser")
+@_get_original_images_request.register_async
+async def _get_original_images_request_async(hut_id: str, client: httpx.AsyncClient | None = None) -> bytes:
+    client = client if client is not None else get_async_http_client()
+    url = f"https://www.refuges.info/point/{hut_id}"
+    response = await client.get(url, timeout=15, headers={"Cache-Control": "no-store"})
+    response.raise_for_status()
+    return response.content
+
+
+@file_cache(ignore=["client"], codec=Codec("json", type_=list[PhotoSchema]))
+def get_original_images(hut_id: str, client: httpx.Client | None = None) -> list[PhotoSchema]:
+    return _parse_original_images(hut_id, _get_original_images_request(hut_id, client=client))
+
+
+@get_original_images.register_async
+async def get_original_images_async(hut_id: str, client: httpx.AsyncClient | None = None) -> list[PhotoSchema]:
+    return _parse_original_images(hut_id, await _get_original_images_request_async(hut_id, client=client))
+
+
+def _parse_original_images(hut_id: str, page: bytes) -> list[PhotoSchema]:
+    soup = BeautifulSoup(page, "html.parser")
     comments = soup.find_all("li")
     original_images = []
     for comment in comments:
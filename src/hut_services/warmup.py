@@ -0,0 +1,150 @@
+"""Fill the caches of the services for a region ahead of traffic (e.g. on a new node).
+
+Usage:
+    ```bash
+    hut-services-warmup --services osm refuges --bbox 5.9 45.8 10.5 47.8 --photos --workers 4
+    hut-services-warmup --services refuges --massif 12 339 --export bundle.sqlite
+    hut-services-warmup --import bundle.sqlite  # on other nodes
+    ```
+"""
+
+import argparse
+import logging
+import sys
+import typing as t
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pydantic import BaseModel
+
+from hut_services.core.cache import export_cache, import_cache
+from hut_services.core.schema.geo import BBox
+
+__all__ = ["PrefetchResult", "main", "prefetch"]
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class PrefetchResult(BaseModel):
+    """Result of [`prefetch()`][hut_services.warmup.prefetch] for one service.
+
+    Attributes:
+        service: Name of the service.
+        huts: Number of huts fetched from the source.
+        converted: Number of converted huts (their photos and lookups are cached now).
+        failed: Number of huts which could not be converted.
+    """
+
+    service: str
+    huts: int = 0
+    converted: int = 0
+    failed: int = 0
+
+
+def prefetch(
+    services: Sequence[str] = ("osm", "refuges"),
+    bbox: BBox | None = None,
+    massif: Sequence[int] | None = None,
+    limit: int = 5000,
+    include_photos: bool = True,
+    workers: int = 4,
+    progress: ProgressCallback | None = None,
+) -> list[PrefetchResult]:
+    """Fills the caches of the services by fetching and converting all huts of a region.
+
+    Converting a hut caches the additional requests as well (e.g. photos from refuges.info,
+    wikidata and wikicommons lookups).
+
+    Args:
+        services: Names of the services (see `hut_services.services.SERVICES`).
+        bbox: Region to fetch as `(min_lon, min_lat, max_lon, max_lat)`, converted into the axis order
+            of each service (e.g. `(south, west, north, east)` for OSM). The default region of each service if not set.
+        massif: refuges.info massif ids (only used by the `refuges` service).
+        limit: Maximal number of huts per service.
+        include_photos: Fetch the photos as well.
+        workers: Number of huts converted at the same time.
+        progress: Called with the service name, the number of processed and of all huts.
+
+    Returns:
+        Results per service.
+    """
+    from hut_services.services import SERVICES
+
+    results = []
+    for name in services:
+        service = SERVICES[name]
+        result = PrefetchResult(service=name)
+        results.append(result)
+        kwargs: dict[str, t.Any] = {"massif": massif} if massif and name == "refuges" else {}
+        try:
+            huts = service.get_huts_from_source(bbox=_service_bbox(service, bbox), limit=limit, **kwargs)
+        except Exception as e:
+            logger.warning(f"Could not get huts from '{name}': {e}")
+            continue
+        result.huts = len(huts)
+        if progress is not None:
+            progress(name, 0, len(huts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"hut-warmup-{name}") as executor:
+            futures = [executor.submit(service.convert, hut, include_photos=include_photos) for hut in huts]
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    future.result()
+                    result.converted += 1
+                except Exception as e:
+                    result.failed += 1
+                    logger.warning(f"Could not convert '{name}' hut: {e}")
+                if progress is not None:
+                    progress(name, done, len(huts))
+    return results
+
+
+def _service_bbox(service: t.Any, bbox: BBox | None) -> BBox | None:
+    """Boundary box `(min_lon, min_lat, max_lon, max_lat)` in the axis order of a service."""
+    if bbox is None or not service.bbox_lat_first:
+        return bbox
+    return (bbox[1], bbox[0], bbox[3], bbox[2])
+
+
+def _print_progress(service: str, done: int, total: int) -> None:
+    end = "\n" if done == total else ""
+    print(f"\r{service:<10} {done:>6}/{total:<6}", end=end, file=sys.stderr, flush=True)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Command line entry point (`hut-services-warmup`)."""
+    parser = argparse.ArgumentParser(description="Fill the hut services caches for a region.")
+    parser.add_argument("--services", nargs="+", default=["osm", "refuges"], help="services to prefetch")
+    parser.add_argument("--bbox", nargs=4, type=float, metavar=("MIN_LON", "MIN_LAT", "MAX_LON", "MAX_LAT"))
+    parser.add_argument("--massif", nargs="+", type=int, help="refuges.info massif ids")
+    parser.add_argument("--limit", type=int, default=5000, help="maximal number of huts per service")
+    parser.add_argument("--photos", action="store_true", help="fetch photos as well")
+    parser.add_argument("--workers", type=int, default=4, help="number of huts converted at the same time")
+    parser.add_argument("--export", metavar="BUNDLE", help="export the cache into a bundle afterwards")
+    parser.add_argument("--import", dest="import_", metavar="BUNDLE", help="import a bundle instead of prefetching")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.INFO if args.verbose else logging.WARNING)
+
+    if args.import_:
+        print(f"imported {import_cache(args.import_)} cache entries", file=sys.stderr)
+        return 0
+    results = prefetch(
+        services=args.services,
+        bbox=tuple(args.bbox) if args.bbox else None,
+        massif=args.massif,
+        limit=args.limit,
+        include_photos=args.photos,
+        workers=args.workers,
+        progress=_print_progress,
+    )
+    for result in results:
+        print(f"{result.service:<10} {result.huts} huts, {result.converted} converted, {result.failed} failed")
+    if args.export:
+        print(f"exported {export_cache(args.export)} cache entries to '{args.export}'", file=sys.stderr)
+    return 1 if any(r.failed or not r.huts for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
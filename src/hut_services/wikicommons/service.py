@@ -8,7 +8,7 @@ from typing import Any, cast
 from urllib.parse import quote, urlparse
 
 import defusedxml.ElementTree
-import requests
+import httpx
 
 # from typing import Any, Literal, Mapping
 from bs4 import BeautifulSoup, Tag
@@ -24,6 +24,7 @@ from hut_services import (
     TranslationSchema,
     file_cache,
 )
+from hut_services.core.http import get_async_http_client, get_http_client
 from hut_services.core.schema import HutSchema
 from hut_services.core.schema.geo import BBox
 
@@ -93,26 +94,53 @@ def _resize_image_url(url: str, max_dimension: int) -> str:
     return (url + f"/{max_dimension}px-{filename}").replace("commons/", "commons/thumb/")
 
 
-@file_cache()
+@file_cache(ignore=["client"])
 def _wikicommon_api_call(
-    filename: str, api_url: str = "https://magnus-toolserver.toolforge.org/commonsapi.php"
+    filename: str,
+    api_url: str = "https://magnus-toolserver.toolforge.org/commonsapi.php",
+    client: httpx.Client | None = None,
 ) -> bytes | None:
     """Fetch image information from Magnus Toolserver API and return structured data using Pydantic."""
-    api_url_image = f"{api_url}?image={filename}"
-    response = requests.get(api_url_image, timeout=20)
+    client = client if client is not None else get_http_client()
+    response = client.get(api_url, params={"image": filename}, timeout=20)
+    response.raise_for_status()  # transient errors are retried by the client, failures are not cached
+    return response.content if isinstance(response.content, bytes) else None
+
 
-    if response.status_code != 200:
-        err_msg = f"Error fetching data from Magnus Toolserver: {response.status_code}"
-        raise Exception(err_msg)  # noqa: TRY002
+@_wikicommon_api_call.register_async
+async def _wikicommon_api_call_async(
+    filename: str,
+    api_url: str = "https://magnus-toolserver.toolforge.org/commonsapi.php",
+    client: httpx.AsyncClient | None = None,
+) -> bytes | None:
+    client = client if client is not None else get_async_http_client()
+    response = await client.get(api_url, params={"image": filename}, timeout=20)
+    response.raise_for_status()
     return response.content if isinstance(response.content, bytes) else None
 
 
 def get_wikicommon_photo_info(
-    filename: str, api_url: str = "https://magnus-toolserver.toolforge.org/commonsapi.php", max_dimension: int = 3000
+    filename: str,
+    api_url: str = "https://magnus-toolserver.toolforge.org/commonsapi.php",
+    max_dimension: int = 3000,
+    client: httpx.Client | None = None,
 ) -> PhotoSchema:
     """Fetch image information from Magnus Toolserver API and return structured data using Pydantic."""
-    content = _wikicommon_api_call(filename, api_url)
+    return _parse_photo_info(_wikicommon_api_call(filename, api_url, client=client), max_dimension=max_dimension)
+
+
+async def get_wikicommon_photo_info_async(
+    filename: str,
+    api_url: str = "https://magnus-toolserver.toolforge.org/commonsapi.php",
+    max_dimension: int = 3000,
+    client: httpx.AsyncClient | None = None,
+) -> PhotoSchema:
+    """Async version of `get_wikicommon_photo_info()`."""
+    content = await _wikicommon_api_call_async(filename, api_url, client=client)
+    return _parse_photo_info(content, max_dimension=max_dimension)
 
+
+def _parse_photo_info(content: bytes, max_dimension: int) -> PhotoSchema:
     # Parse XML response
     root = defusedxml.ElementTree.fromstring(content)
 
@@ -232,19 +260,39 @@ class WikicommonsService:
 
     Note:
         This is only used to get photo information, not to get huts!
+
+    Args:
+        request_url: Url of the commons api.
+        max_dimension: Maximal width or height of the photo urls.
+        http_client: HTTP client, the shared client if not set.
+        async_http_client: Async HTTP client, the shared client of the running event loop if not set.
     """
 
     def __init__(
         self,
         request_url: str = "https://magnus-toolserver.toolforge.org/commonsapi.php",
         max_dimension: int = 3600,
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
     ):
         super().__init__()
         self.request_url = request_url
         self._max_dimension = max_dimension
+        self._http_client = http_client
+        self._async_http_client = async_http_client
 
     def get_photo(self, filename: str) -> PhotoSchema:
-        return get_wikicommon_photo_info(filename=filename, api_url=self.request_url, max_dimension=self._max_dimension)
+        return get_wikicommon_photo_info(
+            filename=filename, api_url=self.request_url, max_dimension=self._max_dimension, client=self._http_client
+        )
+
+    async def get_photo_async(self, filename: str) -> PhotoSchema:
+        return await get_wikicommon_photo_info_async(
+            filename=filename,
+            api_url=self.request_url,
+            max_dimension=self._max_dimension,
+            client=self._async_http_client,
+        )
 
     def get_huts_from_source(self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: dict) -> list:
         raise NotImplementedError("Get huts from source not implemented for WikiCommons.")
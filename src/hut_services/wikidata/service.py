@@ -1,16 +1,24 @@
 #!/usr/bin/env python
 # from functools import lru_cache
+import asyncio
 import logging
 import typing as t
+from urllib.parse import quote, urljoin
+
+import httpx
 
 # from typing import Any, Literal, Mapping
 from wikidata.client import Client
 from wikidata.entity import EntityId
 
 from hut_services import BaseService, file_cache
+from hut_services.core.cache import Codec
+from hut_services.core.http import get_async_http_client, get_http_client
 from hut_services.core.schema import HutSchema
 from hut_services.core.schema.geo import BBox
+from hut_services.osm.schema import OsmHutSource
 from hut_services.osm.service import OsmService
+from hut_services.wikicommons.service import WikicommonsService
 from hut_services.wikidata.schema import (
     WikidataHut0Convert,
     WikidataHutSchema,
@@ -30,43 +38,115 @@ if __name__ == "__main__":  # only for testing
 logger = logging.getLogger(__name__)
 
 
-@file_cache(ignore=["client"])
-def _get_photo(client: Client, qid: EntityId) -> WikidataPhoto | None:
-    image_prop = client.get(EntityId("P18"))  # image
-    entity = client.get(qid, load=True)
-    wikidata_url = f"https://www.wikidata.org/wiki/{qid.upper()}"
-    if image_prop not in entity:
-        logger.debug(f"No wikidata image for: '{wikidata_url}'")
+def _entity_url(client: Client, qid: EntityId) -> str:
+    # same request as the wikidata client, sent with the httpx client
+    return urljoin(client.base_url, f"wiki/Special:EntityData/{quote(qid)}.json")
+
+
+def _entity_attributes(response: httpx.Response, qid: EntityId) -> dict[str, t.Any]:
+    response.raise_for_status()
+    entities = response.json()["entities"]
+    return dict(entities.get(qid) or next(iter(entities.values())))  # redirected entities have another id
+
+
+def _photo_title(attributes: dict[str, t.Any], qid: EntityId) -> str | None:
+    """Title of the first image (`P18`) of an entity, `None` if it has none."""
+    claims = attributes.get("claims", {}).get("P18", [])
+    filenames = [c["mainsnak"]["datavalue"]["value"] for c in claims if "datavalue" in c["mainsnak"]]
+    if not filenames:
+        logger.debug(f"No wikidata image for: 'https://www.wikidata.org/wiki/{qid.upper()}'")
         return None
-    image = entity[image_prop]
-    logger.info(f"Got wikidata image entity: '{image.title}'")  # type: ignore[attr-defined]
-    return WikidataPhoto.model_validate(image)
+    return f"File:{filenames[0]}"
+
+
+def _photo_params(title: str) -> dict[str, str]:
+    return {
+        "action": "query",
+        "prop": "imageinfo|info",
+        "inprop": "url",
+        "iiprop": "url|size|mime",
+        "format": "json",
+        "titles": title,
+    }
+
+
+def _photo(response: httpx.Response, title: str) -> WikidataPhoto:
+    response.raise_for_status()
+    logger.info(f"Got wikidata image entity: '{title}'")
+    page = next(iter(response.json()["query"]["pages"].values()))
+    return WikidataPhoto.model_validate({"title": title, "attributes": page})
+
 
+@file_cache(ignore=["client", "http_client"])
+def _get_attributes(client: Client, qid: EntityId, http_client: httpx.Client | None = None) -> dict[str, t.Any]:
+    http_client = http_client if http_client is not None else get_http_client()
+    return _entity_attributes(http_client.get(_entity_url(client, qid)), qid)
 
-@file_cache(ignore=["client"])
-def _get_attributes(client: Client, qid: EntityId) -> dict[str, t.Any]:
-    entity = client.get(qid, load=True)
-    return dict(entity.attributes.items())
+
+@_get_attributes.register_async
+async def _get_attributes_async(
+    client: Client, qid: EntityId, http_client: httpx.AsyncClient | None = None
+) -> dict[str, t.Any]:
+    http_client = http_client if http_client is not None else get_async_http_client()
+    return _entity_attributes(await http_client.get(_entity_url(client, qid)), qid)
+
+
+@file_cache(ignore=["client", "http_client"], codec=Codec("json", type_=WikidataPhoto | None))
+def _get_photo(client: Client, qid: EntityId, http_client: httpx.Client | None = None) -> WikidataPhoto | None:
+    title = _photo_title(_get_attributes(client=client, qid=qid, http_client=http_client), qid)
+    if title is None:
+        return None
+    http_client = http_client if http_client is not None else get_http_client()
+    return _photo(http_client.get(urljoin(client.base_url, "w/api.php"), params=_photo_params(title)), title)
+
+
+@_get_photo.register_async
+async def _get_photo_async(
+    client: Client, qid: EntityId, http_client: httpx.AsyncClient | None = None
+) -> WikidataPhoto | None:
+    title = _photo_title(await _get_attributes_async(client=client, qid=qid, http_client=http_client), qid)
+    if title is None:
+        return None
+    http_client = http_client if http_client is not None else get_async_http_client()
+    response = await http_client.get(urljoin(client.base_url, "w/api.php"), params=_photo_params(title))
+    return _photo(response, title)
 
 
 class WikidataEntity:
-    def __init__(self, qid: EntityId, client: Client | None):
+    def __init__(
+        self,
+        qid: EntityId,
+        client: Client | None,
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
+    ):
         self.client = Client() if client is None else client
         self.qid = qid
+        self.http_client = http_client
+        self.async_http_client = async_http_client
 
     def get_photo(self) -> WikidataPhoto | None:
         """Get a list of photos from wikidata."""
-        photo: WikidataPhoto | None = _get_photo(client=self.client, qid=self.qid)
+        photo: WikidataPhoto | None = _get_photo(client=self.client, qid=self.qid, http_client=self.http_client)
         return photo
 
     def get_attributes(
         self,
     ) -> dict[str, t.Any]:
         """Get a list of photos from wikidata."""
-        attributes = _get_attributes(client=self.client, qid=self.qid)
-        # assert all(
-        #    isinstance(p, dict[str, t.Any]) for p in attributes
-        # ), "Wrong type, not a list of 'PhotoSchema'"
+        attributes = _get_attributes(client=self.client, qid=self.qid, http_client=self.http_client)
+        return t.cast(dict[str, t.Any], attributes)
+
+    async def get_photo_async(self) -> WikidataPhoto | None:
+        """Async version of `get_photo()`."""
+        photo: WikidataPhoto | None = await _get_photo_async(
+            client=self.client, qid=self.qid, http_client=self.async_http_client
+        )
+        return photo
+
+    async def get_attributes_async(self) -> dict[str, t.Any]:
+        """Async version of `get_attributes()`."""
+        attributes = await _get_attributes_async(client=self.client, qid=self.qid, http_client=self.async_http_client)
         return t.cast(dict[str, t.Any], attributes)
 
 
@@ -79,21 +159,25 @@ class WikidataService(BaseService[WikidataHutSource]):
         It is not (yet) possible to get huts and convert them.
     """
 
-    def __init__(self, request_url: str = "https://www.wikidata.org/"):
-        super().__init__(support_bbox=True, support_limit=True, support_offset=True, support_convert=True)
+    bbox_lat_first: t.ClassVar[bool] = True  # huts are found with the OSM service
+
+    def __init__(self, request_url: str = "https://www.wikidata.org/", http_client: httpx.Client | None = None):
+        super().__init__(
+            support_bbox=True, support_limit=True, support_offset=True, support_convert=True, http_client=http_client
+        )
         self.request_url = request_url
-        self.wikidata_client = Client(base_url=request_url)
+        self.wikidata_client = Client(base_url=request_url)  # only its url is used, requests are sent with httpx
 
     def get_entity(self, qid: str) -> WikidataEntity:
         qid_e = EntityId(qid)
-        return WikidataEntity(qid_e, self.wikidata_client)
+        return WikidataEntity(qid_e, self.wikidata_client, self._http_client, self._async_http_client)
 
     # NOT IMPLEMENTED:
 
     def get_huts_from_source(
         self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: dict
     ) -> list[WikidataHutSource]:
-        osm_service = OsmService()
+        osm_service = OsmService(http_client=self._http_client)
         osm_huts = osm_service.get_huts_from_source(bbox=bbox, limit=limit * 10, offset=offset, **kwargs)
         huts = []
         for oh in osm_huts:
@@ -104,7 +188,7 @@ class WikidataService(BaseService[WikidataHutSource]):
             if not qid:
                 continue
             logger.info(f" Wikidata entry {qid:<15} ({oh.name})")
-            wikidata = wikidata_service.get_entity(qid)
+            wikidata = self.get_entity(qid)
             lon, lat = oh.location.lon_lat if oh.location else (None, None)
             wikidata_hut = WikidataHutSchema(
                 id=qid,
@@ -126,6 +210,32 @@ class WikidataService(BaseService[WikidataHutSource]):
                 break
         return huts
 
+    async def get_huts_from_source_async(
+        self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: dict
+    ) -> list[WikidataHutSource]:
+        osm_service = OsmService(http_client=self._http_client)
+        osm_service._async_http_client = self._async_http_client
+        osm_huts = await osm_service.get_huts_from_source_async(bbox=bbox, limit=limit * 10, offset=offset, **kwargs)
+        qids = [(oh, oh.source_data.tags.wikidata if oh.source_data else None) for oh in osm_huts]
+        entries = [(oh, qid) for oh, qid in qids if qid][:limit]
+        return list(await asyncio.gather(*[self._hut_async(oh, qid) for oh, qid in entries]))
+
+    async def _hut_async(self, osm_hut: OsmHutSource, qid: str) -> WikidataHutSource:
+        logger.info(f" Wikidata entry {qid:<15} ({osm_hut.name})")
+        wikidata = self.get_entity(qid)
+        attributes, photo = await asyncio.gather(wikidata.get_attributes_async(), wikidata.get_photo_async())
+        lon, lat = osm_hut.location.lon_lat if osm_hut.location else (None, None)
+        wikidata_hut = WikidataHutSchema(
+            id=qid, name=osm_hut.name, lat=lat, lon=lon, attributes=attributes, photo=photo
+        )
+        return WikidataHutSource(
+            name=wikidata_hut.get_name(),
+            source_id=wikidata_hut.get_id(),
+            location=wikidata_hut.get_location(),
+            source_data=wikidata_hut,
+            source_properties=WikidataProperties(),
+        )
+
     def convert(self, src: t.Mapping | t.Any, include_photos: bool = True) -> HutSchema:
         hut_src = (
             WikidataHutSource(**src)
@@ -141,6 +251,20 @@ class WikidataService(BaseService[WikidataHutSource]):
             err_msg = f"Conversion for '{hut_src.source_name}' version {hut_src.version} not implemented."
             raise NotImplementedError(err_msg)
 
+    async def convert_async(self, src: t.Mapping | t.Any, include_photos: bool = True) -> HutSchema:
+        hut_src = (
+            WikidataHutSource(**src)
+            if isinstance(src, t.Mapping)
+            else WikidataHutSource.model_validate(src, from_attributes=True)
+        )
+        hut = self.convert(hut_src, include_photos=False)
+        image = hut_src.source_data.photo if hut_src.source_data is not None else None
+        if not include_photos or image is None:
+            return hut
+        wikicommons = WikicommonsService(async_http_client=self._async_http_client)
+        photo = await wikicommons.get_photo_async(image.title.replace("File:", ""))
+        return hut.model_copy(update={"photos": [photo]})
+
 
 wikidata_service = WikidataService()
 
@@ -0,0 +1,541 @@
+import asyncio
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from hut_services import HutSourceSchema
+from hut_services.core.cache import (
+    MISSING,
+    CacheBackend,
+    CacheEntry,
+    CachePriority,
+    Codec,
+    FileLock,
+    JoblibBackend,
+    MemoryTier,
+    SpatialCache,
+    SQLiteBackend,
+    cache_stats,
+    canonical,
+    canonical_key,
+    compact_cache,
+    export_cache,
+    file_cache,
+    get_key_locks,
+    import_cache,
+    invalidate_cache,
+    reset_cache_stats,
+)
+from hut_services.core.schema.geo import bbox_grid, bbox_intersects, bbox_split
+from hut_services.core.service import BaseService
+
+
+def test_memory_tier_lru_entries() -> None:
+    tier = MemoryTier(max_entries=2, max_bytes=1024, ttl=60)
+    tier.set("a", 1, size=1)
+    tier.set("b", 2, size=1)
+    assert tier.get("a") == 1  # 'b' is now least recently used
+    tier.set("c", 3, size=1)
+    assert tier.get("b") is MISSING
+    assert tier.get("a") == 1
+    assert tier.get("c") == 3
+
+
+def test_memory_tier_lru_bytes() -> None:
+    tier = MemoryTier(max_entries=10, max_bytes=100, ttl=60)
+    tier.set("a", "a", size=60)
+    tier.set("b", "b", size=60)
+    assert tier.get("a") is MISSING
+    assert tier.get("b") == "b"
+    assert tier.nbytes == 60
+    tier.set("c", "c", size=200)  # too big
+    assert tier.get("c") is MISSING
+
+
+def test_memory_tier_ttl() -> None:
+    tier = MemoryTier(max_entries=10, max_bytes=100, ttl=0.01)
+    tier.set("a", 1)
+    time.sleep(0.02)
+    assert tier.get("a") is MISSING
+    assert len(tier) == 0
+
+
+def test_file_cache_memory_tier() -> None:
+    calls: list[int] = []
+
+    @file_cache(memory_entries=4)
+    def _square(value: int, items: list[int]) -> int:
+        calls.append(value)
+        return value * value
+
+    _square.clear()
+    assert _square(3, items=[1, 2]) == 9
+    assert _square(3, items=[1, 2]) == 9
+    assert calls == [3]
+    assert _square.memory is not None
+    assert len(_square.memory) == 1
+    # served from disk after the memory tier is cleared
+    _square.memory.clear()
+    assert _square(3, items=[1, 2]) == 9
+    assert calls == [3]
+    _square.clear()
+
+
+def test_file_cache_without_memory_tier() -> None:
+    @file_cache(memory_entries=0)
+    def _double(value: int) -> int:
+        return value * 2
+
+    assert _double.memory is None
+    assert _double(2) == 4
+    _double.clear()
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 5) -> None:
+    start = time.time()
+    while not condition() and time.time() - start < timeout:
+        time.sleep(0.01)
+
+
+def test_file_cache_stale_while_revalidate() -> None:
+    calls: list[int] = []
+
+    @file_cache(expire_in_seconds=0, stale_ttl=60, memory_entries=0)
+    def _counter() -> int:
+        calls.append(1)
+        return len(calls)
+
+    _counter.clear()
+    assert _counter() == 1
+    assert _counter() == 1  # expired, stale value returned and refreshed in the background
+    _wait_for(lambda: len(calls) == 2)
+    _wait_for(lambda: not _counter._refreshing)
+    assert _counter() == 2
+    _counter.clear()
+
+
+def test_file_cache_refresh_ahead() -> None:
+    calls: list[int] = []
+
+    @file_cache(expire_in_seconds=60, refresh_ahead=60, memory_entries=0)
+    def _counter() -> int:
+        calls.append(1)
+        return len(calls)
+
+    _counter.clear()
+    assert _counter() == 1
+    assert _counter() == 1  # still valid, refreshed ahead of expiration
+    _wait_for(lambda: len(calls) == 2)
+    _wait_for(lambda: not _counter._refreshing)
+    assert _counter() == 2
+    _counter.clear()
+
+
+def test_cache_stats() -> None:
+    @file_cache(memory_entries=4)
+    def _add(a: int, b: int) -> int:
+        return a + b
+
+    _add.clear()
+    reset_cache_stats(_add)
+    _add(1, 2)
+    _add(1, 2)
+    _add.memory.clear()
+    _add(1, 2)
+    stats = cache_stats(_add)[_add.func_id]
+    assert stats.misses == 1
+    assert stats.memory_hits == 1
+    assert stats.disk_hits == 1
+    assert stats.hits == 2
+    assert stats.bytes_written > 0
+    assert stats.bytes_read == stats.bytes_written
+    assert _add.func_id in cache_stats()
+    reset_cache_stats(_add)
+    assert cache_stats(_add)[_add.func_id].hits == 0
+    _add.clear()
+
+
+@pytest.mark.parametrize("backend_cls", [JoblibBackend, SQLiteBackend])
+def test_cache_backend(backend_cls: type[CacheBackend], tmp_path: Path) -> None:
+    backend = backend_cls(str(tmp_path / "cache"))
+    entry = CacheEntry(b"payload", created=time.time(), expires=time.time() + 60, duration=0.1)
+    backend.set("module/func", "key", entry)
+    backend.set("module/other", "key", entry)
+    assert backend.get("module/func", "key") == entry
+    assert backend.get("module/func", "missing") is None
+    backend.delete("module/func", "key")
+    assert backend.get("module/func", "key") is None
+    backend.set("module/func", "key", entry)
+    backend.clear("module/func")
+    assert backend.get("module/func", "key") is None
+    assert backend.get("module/other", "key") == entry
+    backend.clear()
+    assert backend.get("module/other", "key") is None
+
+
+def test_file_cache_sqlite_backend(tmp_path: Path) -> None:
+    calls: list[int] = []
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+
+    @file_cache(backend=backend, memory_entries=0)
+    def _square(value: int) -> int:
+        calls.append(value)
+        return value * value
+
+    assert _square(4) == 16
+    assert _square(4) == 16
+    assert calls == [4]
+    assert backend.get(_square.func_id, _square._key((4,), {})) is not None
+
+
+@pytest.mark.parametrize("backend_cls", [JoblibBackend, SQLiteBackend])
+def test_compact_cache(backend_cls: type[CacheBackend], tmp_path: Path) -> None:
+    backend = backend_cls(str(tmp_path / "cache"))
+    now = time.time()
+    payload = b"x" * 1000
+    backend.set("ns", "expired", CacheEntry(payload, created=now - 10, expires=now - 1))
+    backend.set("ns", "forever", CacheEntry(payload, created=now, expires=now + 60, priority=CachePriority.high))
+    for key in ["old", "new"]:
+        backend.set("ns", key, CacheEntry(payload, created=now, expires=now + 60))
+        time.sleep(0.01)
+    assert sum(e.size for e in backend.entries()) >= 4000
+    removed, _ = compact_cache(backend, max_bytes=2500, target=1)
+    assert removed == 2
+    assert backend.get("ns", "expired") is None
+    assert backend.get("ns", "old") is None
+    assert backend.get("ns", "new") is not None
+    assert backend.get("ns", "forever") is not None
+
+
+class _Point(BaseModel):
+    name: str
+    lon: float
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+@pytest.mark.parametrize("serializer", ["pickle", "json"])
+def test_codec_roundtrip(serializer: str, compression: str) -> None:
+    codec = Codec(serializer, compression, type_=list[_Point])  # type: ignore[arg-type]
+    value = [_Point(name="a", lon=7.5), _Point(name="b", lon=8.0)]
+    payload = codec.dumps(value)
+    assert payload[:1] == (b"J" if serializer == "json" else b"P")
+    assert codec.loads(payload) == value
+    assert codec.loads(codec.dumps(b"raw")) == b"raw"
+    assert codec.dumps(b"raw") == b"R0raw"
+
+
+def test_codec_fallback() -> None:
+    codec = Codec("json", type_=list[_Point])
+    payload = codec.dumps({"not": "a list"})  # does not match the type, pickled instead
+    assert payload[:1] == b"P"
+    assert codec.loads(payload) == {"not": "a list"}
+    # entries can be read after the codec of a function changed
+    assert Codec("pickle", "zlib", type_=list[_Point]).loads(codec.dumps([_Point(name="a", lon=1)])) == [
+        _Point(name="a", lon=1)
+    ]
+    with pytest.raises(ValueError, match="requires 'type_'"):
+        Codec("json")
+
+
+@pytest.mark.parametrize("backend_cls", [JoblibBackend, SQLiteBackend])
+def test_invalidate_cache(backend_cls: type[CacheBackend], tmp_path: Path) -> None:
+    backend = backend_cls(str(tmp_path / "cache"))
+
+    @file_cache(backend=backend, memory_entries=4, namespace="tests.huts")
+    def _huts(bbox: tuple[float, ...] | None = None, limit: int = 1) -> int:
+        return limit
+
+    @file_cache(backend=backend, namespace="tests.photos")
+    def _photos(url: str) -> str:
+        return url
+
+    _huts((0, 0, 1, 1))
+    _huts((5, 5, 6, 6))
+    _huts(None, limit=2)
+    _photos("a")
+    assert invalidate_cache(_huts, where=lambda args: args["bbox"] is not None and args["bbox"][0] > 2) == 1
+    assert invalidate_cache("tests.hut") == 0  # only full namespace parts match
+    assert invalidate_cache("tests.huts") == 2
+    assert _huts.memory is not None
+    assert len(_huts.memory) == 0
+    assert invalidate_cache("tests") == 1
+
+
+def test_service_clear_cache(tmp_path: Path) -> None:
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+
+    class _Service(BaseService):
+        cache_namespace = "tests.service"
+
+    @file_cache(backend=backend, namespace="tests.service")
+    def _huts(bbox: tuple[float, ...] | None = None) -> int:
+        return 1
+
+    @file_cache(backend=backend, namespace="tests.other")
+    def _other(bbox: tuple[float, ...] | None = None) -> int:
+        return 1
+
+    for bbox in [(0, 0, 1, 1), (5, 5, 6, 6), None]:
+        _huts(bbox)
+        _other(bbox)
+    assert _Service.clear_cache(bbox=(0.5, 0.5, 2, 2)) == 2  # (0, 0, 1, 1) and None
+    assert _Service.clear_cache() == 1
+    assert len(list(backend.entries())) == 3
+    assert BaseService.get_cache_namespace() == "hut_services.core.service"
+
+
+def test_bbox_intersects() -> None:
+    assert bbox_intersects((0, 0, 2, 2), (1, 1, 3, 3))
+    assert bbox_intersects((0, 0, 2, 2), (2, 2, 3, 3))
+    assert not bbox_intersects((0, 0, 2, 2), (2.1, 0, 3, 3))
+    assert bbox_intersects((0, 0, 0, 2, 2, 100), (1, 1, 3, 3))
+
+
+def test_bbox_tiles() -> None:
+    assert bbox_split((0, 0, 2, 2)) == [(0, 0, 1, 1), (1, 0, 2, 1), (0, 1, 1, 2), (1, 1, 2, 2)]
+    assert bbox_grid((0, 0, 2.5, 1), 1) == [(0, 0, 1, 1), (1, 0, 2, 1), (2, 0, 2.5, 1)]
+    assert bbox_grid((0, 0, 0.5, 0.5), 1) == [(0, 0, 0.5, 0.5)]
+
+
+def test_file_cache_memory_copies() -> None:
+    """A hit of the memory tier is a copy, changing a returned value does not change the cache."""
+    calls: list[int] = []
+
+    @file_cache()
+    def _huts(value: int) -> list[HutSourceSchema]:
+        calls.append(value)
+        return [HutSourceSchema(name="Hut", source_id=str(value))]
+
+    _huts.clear()
+    huts = _huts(1)
+    huts.append(HutSourceSchema(name="Other", source_id="2"))
+    huts[0].name = "Changed"
+    again = _huts(1)  # from the memory tier
+    assert [h.name for h in again] == ["Hut"]
+    again[0].name = "Changed"
+    assert [h.name for h in _huts(1)] == ["Hut"]
+    assert calls == [1]
+    assert cache_stats(_huts)[_huts.func_id].memory_hits == 2
+    _huts.clear()
+
+
+def test_file_cache_negative() -> None:
+    calls: list[int] = []
+
+    @file_cache(memory_entries=0, negative_ttl=0.05)
+    def _fail(value: int) -> int:
+        calls.append(value)
+        if len(calls) == 1:
+            err_msg = "upstream failed"
+            raise ValueError(err_msg)
+        return value
+
+    _fail.clear()
+    reset_cache_stats(_fail)
+    with pytest.raises(ValueError, match="upstream failed"):
+        _fail(1)
+    with pytest.raises(ValueError, match="upstream failed"):
+        _fail(1)  # remembered, not called again
+    assert calls == [1]
+    assert _fail(2) == 2  # other arguments are not affected
+    time.sleep(0.06)
+    assert _fail(1) == 1  # failure was not written to the disk cache
+    assert calls == [1, 2, 1]
+    stats = cache_stats(_fail)[_fail.func_id]
+    assert stats.errors == 1
+    assert stats.negative_hits == 1
+    _fail.clear()
+
+
+def test_file_cache_single_flight() -> None:
+    calls: list[int] = []
+
+    @file_cache(memory_entries=0)
+    def _slow(value: int) -> int:
+        calls.append(value)
+        time.sleep(0.1)
+        return value
+
+    _slow.clear()
+    reset_cache_stats(_slow)
+    results: list[int] = []
+    threads = [threading.Thread(target=lambda: results.append(_slow(1))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [1, 1, 1, 1]
+    assert calls == [1]
+    assert cache_stats(_slow)[_slow.func_id].coalesced == 3
+    _slow.clear()
+
+
+def test_file_cache_async() -> None:
+    calls: list[str] = []
+
+    @file_cache(memory_entries=0, negative_ttl=60)
+    def _square(value: int) -> int:
+        calls.append("sync")
+        return value * value
+
+    @_square.register_async
+    async def _square_async(value: int) -> int:
+        calls.append("async")
+        await asyncio.sleep(0.05)
+        if value < 0:
+            err_msg = "negative value"
+            raise ValueError(err_msg)
+        return value * value
+
+    async def run() -> list[int]:
+        return list(await asyncio.gather(*[_square_async(3) for _ in range(4)]))
+
+    _square.clear()
+    reset_cache_stats(_square)
+    assert asyncio.run(run()) == [9, 9, 9, 9]
+    assert calls == ["async"]  # single flight
+    assert cache_stats(_square)[_square.func_id].coalesced == 3
+    assert _square(3) == 9  # shared cache
+    assert calls == ["async"]
+    with pytest.raises(ValueError, match="negative value"):
+        asyncio.run(_square_async(-1))
+    with pytest.raises(ValueError, match="negative value"):
+        _square(-1)  # remembered failure
+    assert calls == ["async", "async"]
+    _square.clear()
+
+
+def test_file_lock(tmp_path: Path) -> None:
+    path = str(tmp_path / "locks" / "1.lock")
+    lock, other = FileLock(path), FileLock(path)
+    assert lock.acquire(timeout=0)
+    assert not other.acquire(timeout=0.05)
+    lock.release()
+    assert other.acquire(timeout=0)
+    other.release()
+
+
+def test_file_cache_nested_lock(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Nested cached calls on the same lock file do not wait for their own process."""
+    from hut_services.core.cache import _locks
+
+    monkeypatch.setattr(_locks, "lock_stripes", 1)  # all keys collide
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    locks = get_key_locks(backend.lock_directory)
+    locks.timeout = 2
+
+    @file_cache(backend=backend, memory_entries=0)
+    def _inner(value: int) -> int:
+        return value * 2
+
+    @file_cache(backend=backend, memory_entries=0)
+    def _outer(value: int) -> int:
+        return _inner(value) + 1
+
+    start = time.monotonic()
+    assert _outer(3) == 7
+    assert time.monotonic() - start < 1
+    other = FileLock(os.path.join(str(backend.lock_directory), "0.lock"))  # e.g. another process
+    assert other.acquire(timeout=0)  # released by this process after the calls
+    with locks.try_hold("abc") as free:
+        assert not free
+    other.release()
+    with locks.hold("abc"), locks.hold("def") as waited:
+        assert not waited
+        assert not other.acquire(timeout=0)
+
+
+def test_joblib_backend_incomplete_entry(tmp_path: Path) -> None:
+    backend = JoblibBackend(str(tmp_path / "cache"))
+    backend.set("ns", "key", CacheEntry(b"payload", created=time.time(), expires=time.time() + 60))
+    # metadata of a concurrent writer which did not finish writing the payload
+    backend._store.store_metadata(
+        ["ns", "key"], {"time": time.time(), "expires": time.time() + 60, "duration": 0, "size": 3, "checksum": 1}
+    )
+    assert backend.get("ns", "key") is None
+    assert backend.lock_directory == str(tmp_path / "cache" / "locks")
+
+
+def test_file_cache_key_function() -> None:
+    calls: list[tuple[float, ...]] = []
+
+    @file_cache(memory_entries=0, key=canonical_key)
+    def _area(bbox: tuple[float, ...], points: list[_Point]) -> int:
+        calls.append(bbox)
+        return len(points)
+
+    _area.clear()
+    points = [_Point(name="a", lon=7.5)]
+    assert _area((7.0, 46.0, 8.0, 47.0), points) == 1
+    assert _area((7.0000000001, 46.0, 8.0, 47.0), [_Point(name="a", lon=7.5)]) == 1  # float noise
+    assert len(calls) == 1
+    _area((7.1, 46.0, 8.0, 47.0), points)
+    assert len(calls) == 2
+    _area.clear()
+
+
+def test_canonical() -> None:
+    assert canonical({"b": [1.00000001, -0.0], "a": {3, 1}}) == (("a", (1, 3)), ("b", (1.0, 0.0)))
+    assert canonical(_Point(name="a", lon=1 / 3), digits=2) == ("_Point", (("lon", 0.33), ("name", "a")))
+
+
+def test_cache_bundle(tmp_path: Path) -> None:
+    source = JoblibBackend(str(tmp_path / "source"))
+    now = time.time()
+    source.set("hut_services/osm/func", "a", CacheEntry(b"osm", created=now, expires=now + 60))
+    source.set("hut_services/refuges_info/func", "b", CacheEntry(b"refuges", created=now, expires=now + 60))
+    source.set("hut_services/osm/func", "expired", CacheEntry(b"old", created=now - 10, expires=now - 1))
+    bundle = str(tmp_path / "bundle.sqlite")
+    assert export_cache(bundle, source) == 2
+    assert export_cache(bundle, source, namespaces=["hut_services/osm"]) == 1
+    target = SQLiteBackend(str(tmp_path / "target.sqlite"))
+    assert import_cache(bundle, target) == 1
+    assert target.get("hut_services/osm/func", "a") == source.get("hut_services/osm/func", "a")
+    assert import_cache(bundle, target) == 0  # already up to date
+
+
+class _Location(BaseModel):
+    lon: float
+    lat: float
+
+
+class _Hut(BaseModel):
+    source_id: str
+    location: _Location
+
+
+def test_spatial_cache(tmp_path: Path) -> None:
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    huts = [_Hut(source_id=str(i), location=_Location(lon=7.1 + i * 0.2, lat=46.1 + i * 0.1)) for i in range(10)]
+    fetched: list[tuple[float, ...]] = []
+
+    def fetch(bbox: tuple[float, ...]) -> list[_Hut]:
+        fetched.append(bbox)
+        x0, y0, x1, y1 = bbox
+        return [h for h in huts if x0 <= h.location.lon <= x1 and y0 <= h.location.lat <= y1]
+
+    @file_cache(backend=backend, memory_entries=0)
+    def _tile_huts(bbox: tuple[float, ...]) -> list[_Hut]:
+        return fetch(bbox)
+
+    spatial = SpatialCache(_tile_huts, tile_size=0.5)
+    assert _tile_huts.peek((7.0, 46.0, 7.5, 46.5)) is MISSING
+    assert spatial.query((7.2, 46.2, 8.3, 46.8), fetch) is None  # nothing cached
+    assert spatial.populate((7.0, 46.0, 9.0, 47.0), fetch((7.0, 46.0, 9.0, 47.0))) == 8
+    assert _tile_huts.peek((7.0, 46.0, 7.5, 46.5)) == huts[:2]
+    fetched.clear()
+    # answered from the cached tiles
+    assert [h.source_id for h in spatial.query((7.2, 46.2, 8.3, 46.8), fetch) or []] == ["1", "2", "3", "4", "5", "6"]
+    assert fetched == []
+    # only the missing tiles are fetched (one request per row)
+    result = spatial.query((8.2, 46.2, 9.4, 47.4), fetch) or []
+    assert [h.source_id for h in result] == ["6", "7", "8", "9"]
+    assert fetched == [(9.0, 46.0, 9.5, 46.5), (9.0, 46.5, 9.5, 47.0), (8.0, 47.0, 9.5, 47.5)]
+    fetched.clear()
+    spatial.query((8.2, 46.2, 9.4, 47.4), fetch)
+    assert fetched == []
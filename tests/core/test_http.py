@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from hut_services.core.cache import SQLiteBackend
+from hut_services.core.http import (
+    AsyncCachingTransport,
+    CachingTransport,
+    HttpConfig,
+    RateLimit,
+    RateLimiter,
+    RetryPolicy,
+    RetryTransport,
+    TokenBucket,
+    configure_http,
+    get_async_http_client,
+    get_http_client,
+)
+
+
+def _upstream(requests: list[httpx.Request], headers: dict[str, str]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(200, headers={"etag": '"v1"', **headers}, content=b"huts")
+
+    return httpx.MockTransport(handler)
+
+
+def test_caching_transport_revalidate(tmp_path: Path) -> None:
+    requests: list[httpx.Request] = []
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    client = httpx.Client(transport=CachingTransport(_upstream(requests, {}), backend=backend))
+    first = client.get("https://example.com/huts", params={"massif": "12"})
+    assert first.content == b"huts"
+    assert first.extensions["hut_cache"] == "miss"
+    second = client.get("https://example.com/huts", params={"massif": "12"})
+    assert second.status_code == 200
+    assert second.content == b"huts"
+    assert second.extensions["hut_cache"] == "revalidated"
+    assert requests[1].headers["if-none-match"] == '"v1"'
+    assert client.get("https://example.com/huts").extensions["hut_cache"] == "miss"  # other url
+
+
+def test_caching_transport_cache_control(tmp_path: Path) -> None:
+    requests: list[httpx.Request] = []
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    client = httpx.Client(
+        transport=CachingTransport(_upstream(requests, {"cache-control": "max-age=60"}), backend=backend)
+    )
+    client.get("https://example.com/huts")
+    response = client.get("https://example.com/huts")
+    assert response.extensions["hut_cache"] == "hit"
+    assert len(requests) == 1
+    response = client.get("https://example.com/huts", headers={"cache-control": "no-cache"})
+    assert response.extensions["hut_cache"] == "revalidated"
+    assert len(requests) == 2
+
+    requests.clear()
+    client = httpx.Client(
+        transport=CachingTransport(_upstream(requests, {"cache-control": "no-store"}), backend=backend)
+    )
+    client.get("https://example.com/other")
+    client.get("https://example.com/other")
+    assert "if-none-match" not in requests[1].headers
+
+
+def test_async_caching_transport(tmp_path: Path) -> None:
+    requests: list[httpx.Request] = []
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+
+    async def run() -> list[str]:
+        transport = AsyncCachingTransport(_upstream(requests, {}), backend=backend)
+        async with httpx.AsyncClient(transport=transport) as client:
+            first = await client.get("https://example.com/huts")
+            assert await first.aread() == b"huts"
+            second = await client.get("https://example.com/huts")
+            assert second.content == b"huts"
+            return [first.extensions["hut_cache"], second.extensions["hut_cache"]]
+
+    assert asyncio.run(run()) == ["miss", "revalidated"]
+    assert requests[1].headers["if-none-match"] == '"v1"'
+    sync_client = httpx.Client(transport=CachingTransport(_upstream(requests, {}), backend=backend))
+    assert sync_client.get("https://example.com/huts").extensions["hut_cache"] == "revalidated"  # shared cache
+
+
+def test_token_bucket() -> None:
+    bucket = TokenBucket(rate=20, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0  # burst
+    assert 0.04 < bucket.reserve() <= 0.05
+    assert 0.09 < bucket.reserve() <= 0.1  # reserved in order
+
+    bucket = TokenBucket(rate=50)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    async def acquire() -> None:
+        await asyncio.gather(*[bucket.acquire_async() for _ in range(2)])
+
+    asyncio.run(acquire())
+    assert time.monotonic() - start >= 4 / 50  # five requests, the first one is free
+
+
+def test_rate_limiter() -> None:
+    limiter = RateLimiter({"example.com": RateLimit(rate=1, burst=3)})
+    bucket = limiter.bucket("api.example.com")
+    assert bucket is not None
+    assert bucket.burst == 3
+    assert limiter.bucket("api.example.com") is bucket
+    assert limiter.bucket("example.com") is not bucket  # own bucket per host
+    assert limiter.bucket("example.org") is None
+    limiter.set_limit("example.org", rate=2)
+    assert limiter.bucket("example.org") is not None
+
+
+def test_rate_limiter_path() -> None:
+    limiter = RateLimiter(HttpConfig().rate_limits)
+    page = limiter.bucket("www.refuges.info", "/point/123")
+    assert page is not None
+    assert limiter.bucket("www.refuges.info", "/point/456") is page  # one bucket for all photo pages
+    assert limiter.bucket("www.refuges.info", "/api/massif") is None  # api is not throttled
+    assert limiter.bucket("www.refuges.info", "/api/point") is None
+    limiter.set_limit("www.refuges.info", rate=5)
+    host = limiter.bucket("www.refuges.info", "/api/bbox")
+    page = limiter.bucket("www.refuges.info", "/point/123")
+    assert host is not None
+    assert page is not None
+    assert page is not host  # longest match wins
+    assert page.rate < host.rate
+
+
+def test_retry_transport() -> None:
+    responses = [httpx.ConnectError("refused"), httpx.Response(502), httpx.Response(200, content=b"huts")]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    policy = RetryPolicy(attempts=3, backoff=0.01)
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(handler), policy))
+    assert client.get("https://example.com/huts").content == b"huts"
+    assert not responses
+
+    responses.extend([httpx.Response(503, headers={"retry-after": "0.05"}), httpx.Response(200)])
+    start = time.monotonic()
+    assert client.get("https://example.com/huts").status_code == 200
+    assert time.monotonic() - start >= 0.05  # waited as asked for
+
+    responses.extend([httpx.Response(429, headers={"retry-after": "120"}), httpx.Response(200)])
+    assert client.get("https://example.com/huts").status_code == 429  # longer than the budget
+    responses.clear()
+
+
+def test_http_config() -> None:
+    client = get_http_client()
+    assert client is get_http_client()
+    assert configure_http(user_agent="test-agent/1.0").user_agent == "test-agent/1.0"
+    assert client.is_closed
+    assert get_http_client().headers["user-agent"] == "test-agent/1.0"
+
+    async def async_client() -> httpx.AsyncClient:
+        client = get_async_http_client()
+        assert client is get_async_http_client()
+        return client
+
+    assert asyncio.run(async_client()).headers["user-agent"] == "test-agent/1.0"
+    configure_http(HttpConfig())
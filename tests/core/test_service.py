@@ -0,0 +1,85 @@
+import asyncio
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from hut_services import HutSourceSchema
+from hut_services.core.cache import SQLiteBackend, get_cache_backend, set_cache_backend
+from hut_services.core.schema.geo import BBox
+from hut_services.core.service import BaseService
+from hut_services.core.service._pagination import snapshots
+
+
+@pytest.fixture
+def backend(tmp_path: Path) -> Iterator[SQLiteBackend]:
+    """Own cache backend for the snapshots of a test."""
+    previous = get_cache_backend()
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    set_cache_backend(backend)
+    snapshots.clear()
+    yield backend
+    snapshots.clear()
+    set_cache_backend(previous)
+
+
+def _service(results: list[list[int] | Exception]) -> tuple[BaseService[HutSourceSchema], list[int]]:
+    """Service returning (or raising) one result per call."""
+    calls: list[int] = []
+
+    class _Service(BaseService[HutSourceSchema]):
+        request_url = "https://pages.test"
+
+        def get_huts_from_source(
+            self, bbox: BBox | None = None, limit: int = 1, offset: int = 0, **kwargs: Any
+        ) -> list[HutSourceSchema]:
+            calls.append(limit)
+            result = results[min(len(calls), len(results)) - 1]
+            if isinstance(result, Exception):
+                raise result
+            return [HutSourceSchema(name=f"Hut {i}", source_id=str(i)) for i in result]
+
+    return _Service(), calls
+
+
+def test_service_pages(backend: SQLiteBackend) -> None:
+    """Pages are sliced from one snapshot in a stable order, even if the source changes."""
+    service, calls = _service([[12, 3, 7, 100, 5], [1, 2]])
+    first = service.get_huts_page(limit=2, region="pages")
+    assert ([h.source_id for h in first.huts], first.total) == (["3", "5"], 5)
+    assert [h.source_id for h in service.get_huts_page(limit=2, offset=2, region="pages").huts] == ["7", "12"]
+    assert first.next_cursor is not None
+    last = asyncio.run(service.get_huts_page_async(limit=5, cursor=first.next_cursor))
+    assert ([h.source_id for h in last.huts], last.offset, last.next_cursor) == (["7", "12", "100"], 2, None)
+    assert calls == [BaseService.snapshot_limit]
+    refreshed = service.get_huts_page(limit=2, region="pages", refresh=True)
+    assert ([h.source_id for h in refreshed.huts], refreshed.next_cursor) == (["1", "2"], None)
+    with pytest.raises(BaseService.SnapshotExpiredError):
+        service.get_huts_page(cursor=first.next_cursor)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        service.get_huts_page(cursor="not a cursor")
+
+
+def test_service_pages_shared(backend: SQLiteBackend) -> None:
+    """Snapshots are kept in the cache backend, a cursor works in another process."""
+    service, calls = _service([[3, 1, 2]])
+    first = service.get_huts_page(limit=1)
+    assert first.next_cursor is not None
+    snapshots.clear()  # e.g. another worker
+    second = service.get_huts_page(limit=1, cursor=first.next_cursor)
+    assert ([h.source_id for h in second.huts], second.offset) == (["2"], 1)
+    assert calls == [BaseService.snapshot_limit]
+
+
+def test_service_pages_not_snapshotted(backend: SQLiteBackend) -> None:
+    """A failed or empty fetch is raised or returned, but never kept as snapshot."""
+    service, calls = _service([RuntimeError("upstream failed"), [], [2, 1]])
+    with pytest.raises(RuntimeError, match="upstream failed"):
+        service.get_huts_page(limit=1)
+    empty = service.get_huts_page(limit=1)
+    assert (empty.huts, empty.total, empty.next_cursor) == ([], 0, None)
+    assert [h.source_id for h in service.get_huts_page(limit=1).huts] == ["1"]
+    assert len(calls) == 3
+    assert service.get_huts_page(limit=1, offset=1).total == 2  # kept now
+    assert len(calls) == 3
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import random
+import typing as t
+
+import pytest
+
+from hut_services.core.utils import JsonArrayParser, aiter_json_array, iter_json_array
+
+
+def _chunks(data: bytes, seed: int) -> list[bytes]:
+    rnd = random.Random(seed)  # noqa: S311
+    chunks = []
+    while data:
+        size = rnd.randint(1, 40)
+        chunks.append(data[:size])
+        data = data[size:]
+    return chunks
+
+
+def test_json_array_parser() -> None:
+    doc = {
+        "version": 0.6,
+        "generator": "Overpass API ü",
+        "elements": [{"id": i, "lat": 46.5 + i / 7, "tags": {"name": f"Hütte {i}"}} for i in range(50)]
+        + [12345, -1.5e10, True, None, "text"],
+        "remark": "runtime error",
+    }
+    data = json.dumps(doc, ensure_ascii=False, indent=1).encode()
+    for seed in range(20):  # numbers, strings and multi byte characters split between chunks
+        parser = JsonArrayParser("elements")
+        items = [item for chunk in _chunks(data, seed) for item in parser.feed(chunk)]
+        items.extend(parser.close())
+        assert items == doc["elements"]
+        assert parser.fields == {"version": 0.6, "generator": "Overpass API ü", "remark": "runtime error"}
+
+
+def test_iter_json_array() -> None:
+    parser = JsonArrayParser("features")
+    assert parser.feed(b'{"features": [{"id": 1}, {"id"') == [{"id": 1}]  # first item before the end
+    assert list(iter_json_array([b'{"features": []}'], "features")) == []
+
+    async def collect(chunks: list[bytes]) -> list[t.Any]:
+        async def stream() -> t.AsyncIterator[bytes]:
+            for chunk in chunks:
+                yield chunk
+
+        return [item async for item in aiter_json_array(stream(), "features")]
+
+    assert asyncio.run(collect([b'{"features": [1,', b" 2]}"])) == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "data", [b'{"type": "FeatureCollection"}', b'{"features": [1, 2', b"[1, 2]", b'{"features": [1 2]}']
+)
+def test_iter_json_array_invalid(data: bytes) -> None:
+    with pytest.raises(ValueError):
+        list(iter_json_array([data], "features"))
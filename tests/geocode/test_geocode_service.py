@@ -25,3 +25,25 @@ def test_geocode_get_elevations() -> None:
     assert pytest.approx(eles[1].ele) == 1087
     ele = service.get_elevation(location)
     assert pytest.approx(ele.ele) == eles[0].ele
+
+
+def test_geocode_error_not_cached() -> None:
+    """Error responses are raised instead of being cached as empty results."""
+    import httpx
+
+    from hut_services.geocode.service import GeocodeService, _get_elevations
+
+    responses = [httpx.Response(503, text="busy"), httpx.Response(200, json={"results": [{"elevation": 1234}]})]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    _get_elevations.clear()
+    service = GeocodeService(http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    location = LocationSchema(lat=45.123456, lon=7.123456)
+    with pytest.raises(httpx.HTTPStatusError):
+        service.get_elevation(location)
+    if _get_elevations.negative is not None:  # failures are only remembered shortly
+        _get_elevations.negative.clear()
+    assert service.get_elevation(location).ele == 1234
+    _get_elevations.clear()
@@ -1,3 +1,6 @@
+import asyncio
+from unittest import mock
+
 import pytest
 
 from hut_services.core.schema import HutSchema
@@ -76,3 +79,288 @@ def test_osm_service_convert_obj2_online(hut_sources: list[OsmHutSource], servic
         h_obj = MySource(data=h.source_data.model_dump(by_alias=True) if h.source_data else {}, name="MyName")
         h_c = service.convert(h_obj)
         assert h_c.name.i18n == h.name
+
+
+def test_overpass_httpx() -> None:
+    """Overpass queries are sent with the httpx client."""
+    import httpx
+    import overpy  # type: ignore[import-untyped]
+
+    from hut_services.osm.overpass import Overpass
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if b"fail" in request.content:
+            return httpx.Response(504)
+        data = {"elements": [{"type": "node", "id": 1, "lat": 46.5, "lon": 7.5, "tags": {"name": "Hut"}}]}
+        return httpx.Response(200, json=data)
+
+    api = Overpass(url="https://overpass.test/api/", client=httpx.Client(transport=httpx.MockTransport(handler)))
+    result = api.query("[out:json];node;out;")
+    assert result.nodes[0].tags["name"] == "Hut"
+    with pytest.raises(overpy.exception.OverpassGatewayTimeout):
+        api.query("fail")
+    api = Overpass(
+        url="https://overpass.test/api/", async_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    result = asyncio.run(api.query_async("[out:json];node;out;"))
+    assert result.nodes[0].tags["name"] == "Hut"
+
+
+def test_overpass_stream() -> None:
+    """Elements are streamed and converted one at a time."""
+    import httpx
+    import overpy
+
+    from hut_services.osm.overpass import Overpass
+    from hut_services.osm.service import iter_huts_from_elements
+
+    elements = [
+        {"type": "node", "id": 1, "lat": 46.5, "lon": 7.5, "tags": {"name": "Hut", "tourism": "alpine_hut"}},
+        {
+            "type": "way",
+            "id": 2,
+            "center": {"lat": 46.6, "lon": 7.6},
+            "nodes": [3, 4],
+            "tags": {"name": "Shelter", "tourism": "wilderness_hut"},
+        },
+        {"type": "relation", "id": 5, "members": []},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        data: dict = {"version": 0.6, "elements": elements}
+        if b"fail" in request.content:
+            data["remark"] = 'runtime error: Query timed out in "query" at line 1 after 2 seconds.'
+        return httpx.Response(200, json=data)
+
+    api = Overpass(url="https://overpass.test/api/", client=httpx.Client(transport=httpx.MockTransport(handler)))
+    huts = list(iter_huts_from_elements(api.iter_elements("[out:json];nw;out center;")))
+    assert [(h.name, h.source_properties.osm_type) for h in huts] == [("Hut", "node"), ("Shelter", "way")]
+    assert huts[1].location.lat == 46.6
+    with pytest.raises(overpy.exception.OverpassRuntimeError):
+        list(api.iter_elements("fail"))
+
+
+def test_iter_huts_fast() -> None:
+    """Raw elements validated in batches give the same huts as the overpy objects."""
+    from hut_services.osm import service as osm_service
+
+    elements = [
+        {
+            "type": "node",
+            "id": i,
+            "lat": 46.5,
+            "lon": 7.5,
+            "tags": {"name": f"Hut {i}", "tourism": "alpine_hut", "ele": "2100"},
+        }
+        for i in range(5)
+    ]
+    elements.insert(2, {"type": "relation", "id": 9, "members": []})
+    elements.append(
+        {
+            "type": "way",
+            "id": 10,
+            "center": {"lat": 46.6, "lon": 7.6},
+            "nodes": [3, 4],
+            "tags": {"name": "Shelter", "tourism": "wilderness_hut"},
+        }
+    )
+    slow = list(osm_service.iter_huts_from_elements(elements, fast=False))
+    with mock.patch.object(osm_service, "batch_size", 2):
+        fast = list(osm_service.iter_huts_from_elements(elements))
+    assert [h.model_dump(exclude={"created"}) for h in fast] == [h.model_dump(exclude={"created"}) for h in slow]
+    assert [h.source_properties.osm_type for h in fast] == ["node"] * 5 + ["way"]
+    assert fast[-1].location.lat == 46.6
+    assert fast[0].location.ele == 2100
+
+
+def test_harvest_tiles() -> None:
+    """Tiles which time out or are full are split, huts on tile borders are only returned once."""
+    import overpy
+
+    from hut_services.osm.service import iter_huts_from_elements
+    from hut_services.osm.tiling import OverpassTiling, aharvest_tiles, harvest_tiles
+
+    elements = [
+        {
+            "type": "node",
+            "id": i,
+            "lat": 46.1 + i * 0.1,
+            "lon": 7.1 + i * 0.1,
+            "tags": {"name": f"Hut {i}", "tourism": "alpine_hut"},
+        }
+        for i in range(8)
+    ]
+    elements.append(
+        {
+            "type": "way",
+            "id": 1,
+            "center": {"lat": 46.5, "lon": 7.5},
+            "tags": {"name": "Border", "tourism": "alpine_hut"},
+        }
+    )
+    tiles: list[tuple[float, ...]] = []
+
+    def fetch(tile: tuple[float, ...]) -> list[OsmHutSource]:
+        tiles.append(tile)
+        if tile[2] - tile[0] > 0.5:
+            raise overpy.exception.OverpassGatewayTimeout
+        south, west, north, east = tile
+        inside = [
+            e for e in elements if e["type"] == "way" or (south <= e["lat"] <= north and west <= e["lon"] <= east)
+        ]
+        return list(iter_huts_from_elements(inside[:4]))
+
+    tiling = OverpassTiling(size=1, slots=2, max_depth=3, max_elements=4)
+    huts = harvest_tiles(fetch, (46, 7, 47, 8), tiling)
+    ids = [h.source_id for h in huts]
+    assert ids == [str(i) for i in range(8)] + ["1"]
+    assert tiles[0] == (46, 7, 47, 8)
+    assert len(tiles) > 5
+
+    async def afetch(tile: tuple[float, ...]) -> list[OsmHutSource]:
+        return fetch(tile)
+
+    assert [h.source_id for h in asyncio.run(aharvest_tiles(afetch, (46, 7, 47, 8), tiling))] == ids
+    with pytest.raises(overpy.exception.OverpassGatewayTimeout):
+        harvest_tiles(fetch, (46, 7, 47, 8), tiling.model_copy(update={"max_depth": 0}))
+
+
+def test_osm_service_lean() -> None:
+    """Lean queries return derived elements with a few tags, the full record is loaded per hut."""
+    import httpx
+
+    from hut_services.osm.service import _get_hut_from_source, _get_huts_from_source
+
+    lean_element = {
+        "type": "hut",
+        "id": 2,
+        "geometry": {"type": "Point", "coordinates": [7.6, 46.6]},
+        "tags": {"osm_type": "way", "name": "Shelter", "tourism": "wilderness_hut", "ele": "", "operator": ""},
+    }
+    full_element = {
+        "type": "way",
+        "id": 2,
+        "center": {"lat": 46.6, "lon": 7.6},
+        "nodes": [3, 4],
+        "tags": {"name": "Shelter", "tourism": "wilderness_hut", "website": "https://shelter.test"},
+    }
+    queries: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        queries.append(request.content)
+        element = lean_element if b"convert hut" in request.content else full_element
+        return httpx.Response(200, json={"version": 0.6, "elements": [element]})
+
+    _get_huts_from_source.clear()
+    _get_hut_from_source.clear()
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    service = OsmService(request_url="https://overpass.test/api/", http_client=client, spatial_cache=None)
+    (lean,) = service.get_huts_from_source(bbox=(46, 7, 47, 8), limit=10, lean=True)
+    assert (lean.source_properties.osm_type, lean.source_id, lean.location.lat) == ("way", "2", 46.6)
+    assert lean.source_data.tags.website is None
+    assert lean.source_data.tags.ele is None
+    full = service.get_hut_from_source(lean)
+    assert full.source_data.tags.website == "https://shelter.test"
+    assert b"way(2);" in queries[-1]
+    assert asyncio.run(service.get_hut_from_source_async(lean.model_dump(by_alias=True))).source_id == "2"
+    assert len(queries) == 2  # cached
+    _get_huts_from_source.clear()
+    _get_hut_from_source.clear()
+
+
+def test_osm_service_iter_huts() -> None:
+    """Huts are streamed from Overpass and converted one at a time."""
+    import httpx
+
+    from hut_services.osm.service import _get_huts_from_source
+
+    elements = [
+        {"type": "node", "id": i, "lat": 46.5, "lon": 7.5, "tags": {"name": f"Hut {i}", "tourism": "alpine_hut"}}
+        for i in range(3)
+    ]
+
+    requests: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.content)
+        return httpx.Response(200, json={"version": 0.6, "elements": elements})
+
+    _get_huts_from_source.clear()
+    service = OsmService(
+        request_url="https://overpass.test/api/",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        spatial_cache=None,
+    )
+    service._async_http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    huts = service.iter_huts(bbox=(46, 7, 47, 8), limit=10, include_photos=False)
+    assert next(huts).name.i18n == "Hut 0"
+    assert [h.name.i18n for h in huts] == ["Hut 1", "Hut 2"]
+    assert len(service.get_huts_from_source(bbox=(46, 7, 47, 8), limit=10)) == 3
+    assert len(requests) == 1  # complete stream is cached
+
+    async def aiter_names() -> list[str]:
+        return [h.name.i18n async for h in service.aiter_huts(bbox=(46, 8, 47, 9), limit=10)]
+
+    assert asyncio.run(aiter_names()) == ["Hut 0", "Hut 1", "Hut 2"]
+    assert asyncio.run(aiter_names()) == ["Hut 0", "Hut 1", "Hut 2"]
+    assert len(requests) == 2
+    _get_huts_from_source.clear()
+
+
+def test_osm_service_iter_huts_failed() -> None:
+    """A query which fails after the first huts is raised and the partial stream is not cached."""
+    import httpx
+    import overpy
+
+    from hut_services.osm.service import _get_huts_from_source
+
+    elements = [{"type": "node", "id": 1, "lat": 46.5, "lon": 7.5, "tags": {"name": "Hut", "tourism": "alpine_hut"}}]
+    requests: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.content)
+        remark = 'runtime error: Query timed out in "query" at line 1 after 2 seconds.'
+        return httpx.Response(200, json={"version": 0.6, "elements": elements, "remark": remark})
+
+    _get_huts_from_source.clear()
+    service = OsmService(
+        request_url="https://overpass.test/api/",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        fast=False,  # one element at a time
+        spatial_cache=None,
+    )
+    service._async_http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    huts: list[OsmHutSource] = []
+    with pytest.raises(overpy.exception.OverpassRuntimeError):
+        for hut in service.iter_huts_from_source(bbox=(46, 7, 47, 8), limit=10):
+            huts.append(hut)
+    assert [h.source_id for h in huts] == ["1"]  # yielded before the error
+
+    async def aiter_ids() -> list[str]:
+        return [h.source_id async for h in service.aiter_huts_from_source(bbox=(46, 7, 47, 8), limit=10)]
+
+    with pytest.raises(overpy.exception.OverpassRuntimeError):
+        asyncio.run(aiter_ids())
+    assert len(requests) == 2  # not cached
+    _get_huts_from_source.clear()
+
+
+def test_osm_service_timeout_raised() -> None:
+    """A gateway timeout is raised (and not cached) instead of returning no huts."""
+    import httpx
+    import overpy
+
+    from hut_services.osm.service import _get_huts_from_source
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(504, text="timeout")
+
+    _get_huts_from_source.clear()
+    service = OsmService(
+        request_url="https://overpass.test/api/",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        spatial_cache=None,
+    )
+    with pytest.raises(overpy.exception.OverpassGatewayTimeout):
+        service.get_huts_from_source(bbox=(46, 7, 47, 8), limit=10)
+    _get_huts_from_source.clear()
@@ -1,3 +1,8 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
 from hut_services.core.schema import HutSchema
 from hut_services.refuges_info import RefugesInfoService
 from hut_services.refuges_info.schema import RefugesInfoHutSource
@@ -22,3 +27,155 @@ def test_refuges_info_service_hut_online() -> None:
     huts = osm_service.get_huts(limit=limit)
     assert len(huts) == 2
     assert type(huts[0]) is HutSchema
+
+
+def _valeur(nom: str, valeur: str | None = None) -> dict:
+    return {"nom": nom, "valeur": valeur}
+
+
+def _feature(ident: int) -> dict:
+    return {
+        "type": "Feature",
+        "id": ident,
+        "geometry": {"type": "Point", "coordinates": [6.5, 45.5]},
+        "properties": {
+            "id": ident,
+            "lien": f"https://www.refuges.info/point/{ident}/cabane-non-gardee/cabane-{ident}/",
+            "nom": f"Cabane {ident}",
+            "sym": "Cabane Non-Gardee",
+            "coord": {"alt": 2000, "long": 6.5, "lat": 45.5, "precision": {"nom": "GPS"}},
+            "type": {"id": 7, "valeur": "cabane non gardée", "icone": "cabane"},
+            "places": _valeur("Places", "6"),
+            "etat": {"id": "ouverture", "valeur": "Ouverte"},
+            "date": {"derniere_modif": None, "creation": "2010-03-02 08:00:00"},
+            "remarque": _valeur("Remarque"),
+            "acces": _valeur("Accès"),
+            "proprio": _valeur("Propriétaire"),
+            "createur": {"id": 1, "nom": "contributeur"},
+            "article": {"demonstratif": "cette", "defini": "la", "partitif": "d'une"},
+            "info_comp": {
+                "site_officiel": {"nom": "Site officiel", "url": None, "valeur": None},
+                **{
+                    k: _valeur(k)
+                    for k in ["manque_un_mur", "cheminee", "poele", "couvertures", "latrines", "bois", "eau"]
+                },
+                "places_matelas": {"nom": "Places sur matelas", "valeur": None, "nb": None},
+            },
+            "description": {"valeur": ""},
+        },
+    }
+
+
+def test_refuges_info_service_massifs() -> None:
+    """Massifs are fetched and cached one by one, a failing massif is raised."""
+    import httpx
+
+    from hut_services.refuges_info.service import _get_massif_huts
+
+    requests: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        massif = request.url.params["massif"]
+        requests.append(massif)
+        if massif == "3":
+            return httpx.Response(503)
+        ids = {"1": [10, 11], "2": [11, 20]}[massif]  # 11 is in both massifs
+        data = {"type": "FeatureCollection", "features": [_feature(i) for i in ids]}
+        return httpx.Response(200, json=data)
+
+    _get_massif_huts.clear()
+    service = RefugesInfoService(
+        request_url="https://refuges.test/api", http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    with pytest.raises(httpx.HTTPStatusError):  # no partial result
+        service.get_huts_from_source(limit=10, massif=[1, 2, 3])
+    assert sorted(requests) == ["1", "2", "3"]
+    requests.clear()
+    huts = service.get_huts_from_source(limit=10, massif=[1, 2])
+    assert [h.source_id for h in huts] == ["10", "11", "20"]
+    assert requests == []  # fetched massifs are cached
+    assert [h.source_id for h in service.get_huts_from_source(limit=2, massif=[2, 1])] == ["11", "20"]
+    assert [h.source_id for h in service.iter_huts_from_source(limit=2, massif=[1, 2])] == ["10", "11"]
+    assert [h.source_id for h in service.iter_huts_from_source(limit=2, massif=[1, 2], lean=False)] == ["10", "11"]
+    assert requests == []  # per massif cache, `lean` is not sent upstream
+    assert service.get_huts_from_source(limit=0, massif=[1]) == []
+
+    _get_massif_huts.clear()
+    service.massif_concurrency = 1
+    assert [h.source_id for h in service.get_huts_from_source(limit=2, massif=[1, 2, 3])] == ["10", "11"]
+    assert "3" not in requests  # stopped after the limit
+    requests.clear()
+
+    async def aiter_ids(massif: list[int], limit: int = 10) -> list[str]:
+        service._async_http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return [h.source_id async for h in service.aiter_huts_from_source(limit=limit, massif=massif)]
+
+    assert asyncio.run(aiter_ids([2, 1, 3], limit=3)) == ["11", "20", "10"]
+    assert "3" not in requests
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(aiter_ids([2, 3, 1]))
+    _get_massif_huts.clear()
+
+
+def test_refuges_info_service_lean() -> None:
+    """Lean requests use `detail=simple`, the full record is loaded per hut."""
+    import httpx
+
+    from hut_services.refuges_info.service import _get_lean_huts, _get_point_huts
+
+    requests: list[httpx.URL] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url)
+        if request.url.path.endswith("/point"):
+            ident = int(request.url.params["id"])
+            features = [_feature(ident)] if ident == 10 else []
+        else:
+            full = _feature(10)
+            props = {k: full["properties"][k] for k in ["id", "nom", "lien", "type"]}
+            features = [{**full, "properties": props}]
+        return httpx.Response(200, json={"type": "FeatureCollection", "features": features})
+
+    _get_lean_huts.clear()
+    _get_point_huts.clear()
+    service = RefugesInfoService(
+        request_url="https://refuges.test/api", http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    (lean,) = service.get_huts_from_source(bbox=(6, 45, 7, 46), limit=10, lean=True)
+    assert requests[0].params["detail"] == "simple"
+    assert lean.source_data is None
+    assert (lean.name, lean.location.lat, lean.source_properties.slug) == ("Cabane 10", 45.5, "cabane-10")
+    full = service.get_hut_from_source(lean)
+    assert requests[1].params["detail"] == "complet"
+    assert service.convert(full).name.i18n == "Cabane 10"
+    with pytest.raises(LookupError):
+        service.get_hut_from_source(lean.model_copy(update={"source_id": "11"}))
+    _get_lean_huts.clear()
+    _get_point_huts.clear()
+
+
+def test_refuges_info_massif_streamed(tmp_path: Path) -> None:
+    """Massif responses are streamed past the HTTP cache, only the huts are cached (per massif)."""
+    import httpx
+
+    from hut_services.core.cache import SQLiteBackend
+    from hut_services.core.http import CachingTransport
+    from hut_services.refuges_info.service import _get_massif_huts
+
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        data = {"type": "FeatureCollection", "features": [_feature(10)]}
+        return httpx.Response(200, headers={"etag": '"v1"'}, json=data)
+
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    transport = CachingTransport(httpx.MockTransport(handler), backend=backend, ttl=0)
+    service = RefugesInfoService(request_url="https://refuges.test/api", http_client=httpx.Client(transport=transport))
+    _get_massif_huts.clear()
+    assert [h.source_id for h in service.get_huts_from_source(limit=10, massif=[1])] == ["10"]
+    assert [h.source_id for h in service.get_huts_from_source(limit=10, massif=[1])] == ["10"]
+    assert len(requests) == 1  # cached per massif
+    assert "if-none-match" not in requests[0].headers
+    assert not [e for e in backend.entries() if e.namespace.startswith("http/")]  # not stored twice
+    _get_massif_huts.clear()
@@ -0,0 +1,27 @@
+import typing as t
+from unittest import mock
+
+from hut_services.core.schema.geo import BBox
+from hut_services.core.service import BaseService
+from hut_services.osm import OsmService
+from hut_services.refuges_info import RefugesInfoService
+from hut_services.warmup import main
+
+
+def test_warmup_bbox_axis_order() -> None:
+    """`--bbox` is given as lon/lat, OSM gets it in the Overpass order (south, west, north, east)."""
+    received: dict[str, BBox | None] = {}
+
+    def recorder(name: str) -> t.Callable[..., list]:
+        def get_huts_from_source(bbox: BBox | None = None, limit: int = 1, **kwargs: t.Any) -> list:
+            received[name] = bbox
+            return []
+
+        return get_huts_from_source
+
+    services: dict[str, BaseService] = {"osm": OsmService(), "refuges": RefugesInfoService()}
+    for name, service in services.items():
+        service.get_huts_from_source = recorder(name)  # type: ignore[method-assign]
+    with mock.patch.dict("hut_services.services.SERVICES", services):
+        main(["--services", "osm", "refuges", "--bbox", "5.9", "45.8", "10.5", "47.8"])
+    assert received == {"osm": (45.8, 5.9, 47.8, 10.5), "refuges": (5.9, 45.8, 10.5, 47.8)}
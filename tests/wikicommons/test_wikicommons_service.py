@@ -0,0 +1,29 @@
+import asyncio
+
+import httpx
+import pytest
+
+from hut_services.wikicommons.service import WikicommonsService, _wikicommon_api_call
+
+
+def test_wikicommons_service_http_client() -> None:
+    """Photo information is requested with the http client of the service, failures are raised."""
+    requests: list[str | None] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.params.get("image"))
+        return httpx.Response(503)
+
+    _wikicommon_api_call.clear()
+    service = WikicommonsService(
+        request_url="https://commons.test/api.php",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        async_http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        service.get_photo("Hut.jpg")
+    _wikicommon_api_call.negative.clear()
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(service.get_photo_async("Hut.jpg"))
+    assert requests == ["Hut.jpg", "Hut.jpg"]
+    _wikicommon_api_call.clear()
@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+
+from hut_services.wikidata.service import WikidataService, _get_attributes, _get_photo
+
+PAGE = {
+    "ns": 6,
+    "title": "File:Hut.jpg",
+    "missing": "",
+    "known": "",
+    "imagerepository": "shared",
+    "imageinfo": [
+        {
+            "size": 1000,
+            "width": 800,
+            "height": 600,
+            "url": "https://upload.wikimedia.test/Hut.jpg",
+            "descriptionurl": "https://commons.wikimedia.test/wiki/File:Hut.jpg",
+            "descriptionshorturl": "https://commons.wikimedia.test/w/index.php?curid=1",
+            "mime": "image/jpeg",
+        }
+    ],
+    "contentmodel": "wikitext",
+    "pagelanguage": "en",
+    "pagelanguagehtmlcode": "en",
+    "pagelanguagedir": "ltr",
+    "fullurl": "https://www.wikidata.test/wiki/File:Hut.jpg",
+    "editurl": "https://www.wikidata.test/w/index.php?title=File:Hut.jpg&action=edit",
+    "canonicalurl": "https://www.wikidata.test/wiki/File:Hut.jpg",
+}
+
+
+def test_wikidata_service_http_client() -> None:
+    """Entities and photos are requested with the http client of the service (sync and async)."""
+    requests: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path.endswith("/Q1.json"):
+            claim = {"mainsnak": {"datavalue": {"value": "Hut.jpg"}}}
+            return httpx.Response(200, json={"entities": {"Q1": {"id": "Q1", "claims": {"P18": [claim]}}}})
+        return httpx.Response(200, json={"query": {"pages": {"-1": PAGE}}})
+
+    _get_attributes.clear()
+    _get_photo.clear()
+    service = WikidataService(
+        request_url="https://www.wikidata.test/", http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    entity = service.get_entity("Q1")
+    assert entity.get_attributes()["id"] == "Q1"
+    photo = entity.get_photo()
+    assert photo is not None
+    assert photo.attributes.imageinfo[0].width == 800
+    assert requests == ["/wiki/Special:EntityData/Q1.json", "/w/api.php"]
+
+    _get_attributes.clear()
+    _get_photo.clear()
+
+    async def aphoto() -> str | None:
+        service._async_http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        photo = await service.get_entity("Q1").get_photo_async()
+        return None if photo is None else photo.title
+
+    assert asyncio.run(aphoto()) == "File:Hut.jpg"
+    assert len(requests) == 4
+    _get_attributes.clear()
+    _get_photo.clear()